@@ -0,0 +1,117 @@
+"""
+多账号
+每个账号有独立的 Cookie 存储和独立的连接池 (http_client.HttpClient)，互不串号、互不抢连接。
+- 默认账号沿用原来的 cookies.json 与进程共享的默认连接池，图形界面和旧任务不受影响
+- 其他账号以手机号为名，Cookie 存在 accounts/<手机号>.json，首次使用时创建
+
+任务里的 account 字段 (手机号) 指定用哪个账号下单，没有该字段的任务用默认账号。
+"""
+import os
+import re
+import threading
+
+import cookie_store
+import http_client
+
+# --- 配置 ---
+ACCOUNTS_DIR = 'accounts'
+DEFAULT_COOKIE_FILE = 'cookies.json'
+
+
+class Account:
+    """
+    一个登录身份
+    :param name: 账号名 (手机号)；默认账号为 None
+    :param client_factory: 创建连接池的函数，首次发请求时才调用
+    """
+
+    def __init__(self, name, cookie_file, client_factory=http_client.HttpClient):
+        self.name = name
+        self.cookies = cookie_store.CookieStore(cookie_file)
+        self._client_factory = client_factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self._client_factory()
+            return self._client
+
+    @property
+    def phone(self):
+        """登录时保存的手机号"""
+        return self.cookies.get('login_phone')
+
+    def __repr__(self):
+        return f"Account({self.name or '默认'})"
+
+
+class AccountRegistry:
+    def __init__(self, directory=ACCOUNTS_DIR, default_cookie_file=DEFAULT_COOKIE_FILE):
+        self.directory = directory
+        self.default = Account(None, default_cookie_file, http_client.get_client)
+        self._accounts = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        if not re.fullmatch(r'\d{5,20}', name):
+            raise ValueError(f"账号名应为手机号: {name!r}")
+        return os.path.join(self.directory, f"{name}.json")
+
+    def canonical(self, name):
+        """任务里 account 字段的规范形式: 默认账号 (包括写成默认账号手机号的) 为 None，其他为手机号"""
+        if not name or name == self.default.phone:
+            return None
+        return name
+
+    def get(self, name=None):
+        """按手机号取账号 (首次使用时创建)；name 为空或与默认账号的手机号相同时返回默认账号"""
+        name = self.canonical(name)
+        if name is None:
+            return self.default
+        with self._lock:
+            account = self._accounts.get(name)
+            if account is None:
+                os.makedirs(self.directory, exist_ok=True)
+                account = self._accounts[name] = Account(name, self._path(name))
+            return account
+
+    def names(self):
+        """已保存的账号 (手机号) 列表，不含默认账号"""
+        saved = set()
+        if os.path.isdir(self.directory):
+            saved = {f[:-5] for f in os.listdir(self.directory) if f.endswith('.json')}
+        with self._lock:
+            saved.update(self._accounts)
+        return sorted(saved)
+
+    def remove(self, name):
+        """注销账号: 清空 Cookie 并删除文件"""
+        account = self.get(name)
+        if account is self.default:
+            raise ValueError("默认账号请用 api_handler.clear_login_info 注销")
+        account.cookies.clear()
+        with self._lock:
+            self._accounts.pop(name, None)
+
+
+# 进程内共享的默认注册表
+_default_registry = AccountRegistry()
+
+
+def get_registry():
+    return _default_registry
+
+
+def get_account(name=None):
+    return _default_registry.get(name)
+
+
+def list_accounts():
+    return _default_registry.names()
+
+
+def canonical(name):
+    return _default_registry.canonical(name)
@@ -1,13 +1,25 @@
 import requests
-import json
-import os
-from urllib.parse import quote
-from bs4 import BeautifulSoup
+import threading
+from urllib.parse import quote, urlencode, urlparse
 import datetime
+import os
 import random
+import time
+
+import accounts
+import html_extract
+import http_client
+import metrics
+import tracing
 
 # --- 配置 ---
-COOKIE_FILE = 'cookies.json'
+COOKIE_FILE = accounts.DEFAULT_COOKIE_FILE
+DEFAULT_BASE_URL = 'http://yyticket.jinanaoti.com'
+# 可用环境变量 YYTICKET_BASE_URL 指向本地替身服务 (mock_server.py)，或运行时调用 set_base_url
+BASE_URL = os.environ.get('YYTICKET_BASE_URL', DEFAULT_BASE_URL).rstrip('/')
+# 下单接口：现有抓包中没有这一请求，路径与参数名是按页面字段推测的，需按实际抓包核对
+BOOKING_PATH = '/cd/SubmitOrder'
+WARMUP_PATH = '/cd/home'
 BASE_HEADERS = {
     'Host': 'yyticket.jinanaoti.com',
     'Proxy-Connection': 'keep-alive',
@@ -18,72 +30,16 @@ BASE_HEADERS = {
     'Accept-Language': 'zh-CN,zh;q=0.9',
 }
 
-def load_cookies_from_file():
-    """从 JSON 文件加载 Cookies 到字典中"""
-    if not os.path.exists(COOKIE_FILE):
-        return {}
-    try:
-        with open(COOKIE_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"加载 Cookie 失败: {e}")
-        return {}
+# 每个账号有自己的 Cookie 存储 (请求时直接读内存，变化时才延迟写盘) 与连接池 (见 accounts.py)，
+# 接口通过 account 参数选择，默认账号为 None
+def _account(account):
+    """account 可以是 accounts.Account、手机号或 None (默认账号)"""
+    if isinstance(account, accounts.Account):
+        return account
+    return accounts.get_account(account)
 
-def save_cookies_to_file(session_cookies):
-    """
-    将 Session 中的 Cookies 更新到 JSON 文件中。
-    Requests 的 session 会自动合并新旧 Cookie，我们只需保存最终状态。
-    """
-    try:
-        # 获取当前的 Cookie 字典
-        current_cookies = requests.utils.dict_from_cookiejar(session_cookies)
-        
-        # 为了防止覆盖掉文件中存在但 session 中没有的旧 cookie（虽然 session 通常会包含所有），
-        # 我们先读取文件，更新后再写入。
-        saved_cookies = load_cookies_from_file()
-        saved_cookies.update(current_cookies)
-        
-        with open(COOKIE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(saved_cookies, f, indent=4, ensure_ascii=False)
-            
-    except Exception as e:
-        print(f"保存 Cookie 失败: {e}")
-
-def _make_request(url, referer):
-    """
-    内部通用请求函数，处理 Cookie 的加载和保存
-    """
-    # 1. 创建 Session 对象 (它会自动处理 Cookie)
-    session = requests.Session()
-    
-    # 2. 设置 Header
-    headers = BASE_HEADERS.copy()
-    headers['Referer'] = referer
-    session.headers.update(headers)
-    
-    # 3. 加载并设置 Cookies
-    cookies_dict = load_cookies_from_file()
-    session.cookies.update(cookies_dict)
-    
-    try:
-        # 4. 发送请求
-        response = session.get(url, timeout=10)
-        
-        # 5. 请求成功后，立即保存/更新 Cookies 到文件
-        # session.cookies 中现在包含了发送时的 cookie 和服务器返回的新 cookie
-        save_cookies_to_file(session.cookies)
-        
-        return True, response.json()
-        
-    except Exception as e:
-        return False, str(e)
-
-def _make_request(url, referer, is_json=True):
-    """
-    内部通用请求函数，处理 Cookie 的加载和保存
-    新增 is_json 参数，用于区分返回 HTML 还是 JSON
-    """
-    session = requests.Session()
+def _build_headers(referer):
+    """构造请求 Header (同步/异步接口共用)"""
     # 设置 Header
     headers = BASE_HEADERS.copy()
     headers['Referer'] = referer
@@ -93,33 +49,64 @@ def _make_request(url, referer, is_json=True):
         headers.update(BASE_HEADERS)
     # else if referer.endswith("CD/Index2"):
     #     headers.update(DASHBOARD_HEADERS) 
-    
-    session.headers.update(headers)
-    session.cookies.update(load_cookies_from_file())
+    return headers
+
+def _make_request(url, referer, is_json=True, account=None):
+    """
+    内部通用请求函数，处理 Cookie 的加载和保存
+    同一账号的请求共用该账号的长连接池
+    新增 is_json 参数，用于区分返回 HTML 还是 JSON
+    """
+    headers = _build_headers(referer)
+    account = _account(account)
+    started = time.perf_counter()
+    response = None
     
     try:
-        response = session.get(url, timeout=10)
+        with tracing.span("request", "net", url=url):
+            response = account.client.get(url, headers=headers, cookies=account.cookies.get_all())
         
-        # 保存可能更新的 Cookies
-        save_cookies_to_file(session.cookies)
+        # 合并可能更新的 Cookies (包括重定向过程中服务器下发的)，无变化时不会写盘
+        rotated = _merge_cookies(response, account.cookies)
+        _record(url, started, response, rotated=rotated)
         
-        if is_json:
-            return True, response.json()
-        else:
-            response.encoding = 'utf-8'
-            return True, response.text
+        with tracing.span("json" if is_json else "decode", "parse"):
+            if is_json:
+                return True, response.json()
+            else:
+                response.encoding = 'utf-8'
+                return True, response.text
         
     except Exception as e:
+        if response is None:
+            _record(url, started, error=e)
+        else:
+            # 拿到了响应但解析失败 (例如返回了错误页)，耗时已记录，只补记异常类型
+            metrics.record_request_error(url, e)
         return False, str(e)
 
+def _merge_cookies(response, store):
+    """把响应 (含重定向) 下发的 Cookie 合并进存储，返回保存的 Cookie 是否有变化"""
+    rotated = False
+    for r in response.history + [response]:
+        rotated = store.update(requests.utils.dict_from_cookiejar(r.cookies)) or rotated
+    return rotated
+
+def _record(url, started, response=None, error=None, rotated=False):
+    """记录一次请求的指标 (从 requests 的响应取状态码与字节数)"""
+    if response is None:
+        metrics.record_request(url, started, error=error, rotated=rotated)
+    else:
+        metrics.record_request(url, started, response.status_code, len(response.content), error, rotated)
+
 # --- 外部调用的接口方法 ---
 
-def send_sms_code(phone):
+def send_sms_code(phone, account=None):
     """发送验证码接口"""
-    url = f"http://yyticket.jinanaoti.com/JNMY/SendSMSVerifyCode?Phone={phone}"
-    referer = "http://yyticket.jinanaoti.com/JNMY/Login"
+    url = f"{BASE_URL}/JNMY/SendSMSVerifyCode?Phone={phone}"
+    referer = f"{BASE_URL}/JNMY/Login"
     
-    success, result = _make_request(url, referer)
+    success, result = _make_request(url, referer, account=account)
     
     if not success:
         return False, f"网络请求异常: {result}"
@@ -134,12 +121,12 @@ def send_sms_code(phone):
     else:
         return False, result.get("Msg", "未知错误")
 
-def check_login(phone, code):
-    """登录校验接口"""
-    url = f"http://yyticket.jinanaoti.com/JNMY/CheckPhoneCode?phone={phone}&code={code}"
-    referer = "http://yyticket.jinanaoti.com/jnmy/login"
+def check_login(phone, code, account=None):
+    """登录校验接口 (account 为登录到哪个账号的 Cookie 存储，默认账号为 None)"""
+    url = f"{BASE_URL}/JNMY/CheckPhoneCode?phone={phone}&code={code}"
+    referer = f"{BASE_URL}/jnmy/login"
     
-    success, result = _make_request(url, referer)
+    success, result = _make_request(url, referer, account=account)
     
     if not success:
         return False, f"网络请求异常: {result}"
@@ -162,70 +149,80 @@ DASHBOARD_HEADERS = {
     'Accept-Language': 'zh-CN,zh;q=0.9',
 }
 
-def get_dashboard_html():
+def set_base_url(url):
+    """切换接口地址 (例如本地替身服务)，同时更新写死在 Header 里的 Host / Referer"""
+    global BASE_URL
+    BASE_URL = url.rstrip('/')
+    host = urlparse(BASE_URL).netloc
+    BASE_HEADERS['Host'] = host
+    DASHBOARD_HEADERS['Host'] = host
+    DASHBOARD_HEADERS['Referer'] = f"{BASE_URL}/cd/home"
+
+if BASE_URL != DEFAULT_BASE_URL:
+    set_base_url(BASE_URL)
+
+def get_dashboard_html(account=None):
     """
     获取主页 HTML 内容 (修改为调用 _make_request)
     """
-    url = "http://yyticket.jinanaoti.com/CD/Index2"
-    referer = "http://yyticket.jinanaoti.com/cd/home"
-    
-    return _make_request(url, referer, is_json=False)
+    url, referer = _dashboard_request()
+    return _make_request(url, referer, is_json=False, account=account)
+
+def _dashboard_request():
+    """构造主页的 URL 和 Referer (同步/异步接口共用)"""
+    url = f"{BASE_URL}/CD/Index2"
+    referer = f"{BASE_URL}/cd/home"
+    return url, referer
 
 def fetch_image_bytes(image_url):
     """
     下载图片并返回字节流
     """
     if not image_url.startswith('http'):
-        image_url = 'http://yyticket.jinanaoti.com' + image_url
+        image_url = BASE_URL + image_url
         
-    session = requests.Session()
     # 图片请求通常不需要复杂的 Header，但带上 User-Agent 比较保险
-    session.headers.update({'User-Agent': DASHBOARD_HEADERS['User-Agent']})
+    headers = {'User-Agent': DASHBOARD_HEADERS['User-Agent']}
+    started = time.perf_counter()
     
     try:
-        resp = session.get(image_url, timeout=10)
+        resp = http_client.get_client().get(image_url, headers=headers)
+        _record(image_url, started, resp)
         if resp.status_code == 200:
             return resp.content
         return None
-    except:
+    except Exception as e:
+        _record(image_url, started, error=e)
         return None
     
 
 # 获取预订页面的配置信息 (日期和场地) 
-def get_booking_options(item_type):
+def get_booking_options(item_type, account=None):
     """
     访问 particulars 页面，解析可用的日期和场地名称
+    :param account: 用哪个账号的会话查询 (默认账号为 None)
     """
-    url = f"http://yyticket.jinanaoti.com/cd/particulars?type={item_type}"
+    url, referer = _booking_options_request(item_type)
+    success, content = _make_request(url, referer, is_json=False, account=account)
+    return _parse_booking_options(success, content)
+
+def _booking_options_request(item_type):
+    """构造 particulars 页面的 URL 和 Referer (同步/异步接口共用)"""
+    url = f"{BASE_URL}/cd/particulars?type={item_type}"
     # Referer 通常是列表页
-    referer = "http://yyticket.jinanaoti.com/CD/Index2"
-    
-    success, content = _make_request(url, referer, is_json=False)
-    
+    referer = f"{BASE_URL}/CD/Index2"
+    return url, referer
+
+def _parse_booking_options(success, content):
+    """解析 particulars 页面的请求结果 (同步/异步接口共用)"""
     if not success:
         return False, f"请求页面失败: {content}"
     
     try:
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # 1. 解析日期 (class="dataCont")
-        dates = []
-        date_cont = soup.find('div', class_='dataCont')
-        if date_cont:
-            for span in date_cont.find_all('span'):
-                day = span.get('data-day')
-                if day:
-                    dates.append(day)
-                    
-        # 2. 解析场地名称 (class="dataCont123")
-        areas = []
-        area_cont = soup.find('div', class_='dataCont123')
-        if area_cont:
-            for span in area_cont.find_all('span'):
-                # 获取 data-day 属性作为场地名称 (例如: 羽毛球北训场)
-                area_name = span.get('data-day')
-                if area_name:
-                    areas.append(area_name)
+        # 只提取 class="dataCont" (日期) 与 class="dataCont123" (场地名称) 下 span 的 data-day，
+        # 场地名称例如: 羽毛球北训场
+        with tracing.span("booking_options", "parse"):
+            dates, areas = html_extract.extract_booking_options(content)
         
         if not dates:
             return False, "未找到可用日期信息"
@@ -245,24 +242,33 @@ def get_booking_options(item_type):
         return False, f"解析页面出错: {e}"
 
 
-def get_venue_data(item_type, evaluate_name, day):
+def get_venue_data(item_type, evaluate_name, day, mock_empty=True, account=None):
     """
     获取某一运动项目在特定日期的场地数据
     :param item_type: 运动项目类型，如 '0004'
     :param evaluate_name: 场地名称，如 '羽毛球北讯场' (中文需要编码)
     :param day: 日期，如 '2025-11-21'
+    :param mock_empty: 接口没有数据时是否生成模拟数据 (后台监视等需要真实数据的调用方传 False，得到空列表)
+    :param account: 用哪个账号的会话查询 (默认账号为 None)
     :return: 成功状态 (bool) 和 结果 (dict/str)
     """
+    url, referer = _venue_data_request(item_type, evaluate_name, day)
+    success, result = _make_request(url, referer, is_json=True, account=account)
+    return _parse_venue_data(success, result, item_type, evaluate_name, day, mock_empty)
+
+def _venue_data_request(item_type, evaluate_name, day):
+    """构造 GetDayPlay 的 URL 和 Referer (同步/异步接口共用)"""
     # 编码中文参数
     encoded_evaluate = quote(evaluate_name)
     
     # 构造请求 URL
-    url = f"http://yyticket.jinanaoti.com/cd/GetDayPlay?type={item_type}&Evaluate={encoded_evaluate}&Day={day}"
+    url = f"{BASE_URL}/cd/GetDayPlay?type={item_type}&Evaluate={encoded_evaluate}&Day={day}"
     # 构造 Referer (根据抓包，Referer 应该是 particulars 页面)
-    referer = f"http://yyticket.jinanaoti.com/cd/particulars?type={item_type}"
-    
-    success, result = _make_request(url, referer, is_json=True)
-    
+    referer = f"{BASE_URL}/cd/particulars?type={item_type}"
+    return url, referer
+
+def _parse_venue_data(success, result, item_type, evaluate_name, day, mock_empty=True):
+    """解析 GetDayPlay 的请求结果 (同步/异步接口共用)"""
     if not success:
         return False, f"网络请求异常: {result}"
         
@@ -271,11 +277,78 @@ def get_venue_data(item_type, evaluate_name, day):
         data = result.get("Data")
         # 如果 Data 为空 或者 长度为0，视为无数据
         if not data:
+            if not mock_empty:
+                return True, []
             return True, generate_mock_venue_data(item_type, evaluate_name, day)
         return True, data
     else:
         return False, result.get("Msg", "未知错误")
     
+def prepare_booking(task):
+    """
+    提前构造好下单请求 (URL、编码后的参数、Header、Cookie)，放行时直接发送
+    :param task: task_manager 中保存的任务；带 account 字段时用该账号的 Cookie 与连接池
+    """
+    account = _account(task.get('account'))
+    url, referer = _booking_request(task)
+    prepared = account.client.prepare(url, headers=_build_headers(referer), cookies=account.cookies.get_all())
+    prepared.account = account  # send_booking 用同一账号的连接池发送
+    return prepared
+
+def _booking_request(task):
+    """构造下单接口的 URL 和 Referer"""
+    data = task['data']
+    item_type = task.get('item_type', '')
+    params = {
+        'type': item_type,
+        'Evaluate': task['area_name'],
+        'Day': task['date'],
+        'TicketTypeNo': data['TicketTypeNo'],
+        'TicketLevelNo': data['TicketLevelNo'],
+    }
+    url = f"{BASE_URL}{BOOKING_PATH}?{urlencode(params)}"
+    referer = f"{BASE_URL}/cd/particulars?type={item_type}"
+    return url, referer
+
+def send_booking(prepared):
+    """发送 prepare_booking 构造好的请求，返回 (success, msg)"""
+    account = getattr(prepared, 'account', None) or _account(None)
+    started = time.perf_counter()
+    response = None
+    try:
+        response = account.client.send(prepared)
+        _record(prepared.url, started, response, rotated=_merge_cookies(response, account.cookies))
+        result = response.json()
+    except Exception as e:
+        if response is None:
+            _record(prepared.url, started, error=e)
+        else:
+            metrics.record_request_error(prepared.url, e)
+        return False, f"网络请求异常: {e}"
+
+    if result.get("Code") == 1:
+        return True, result.get("Msg", "预订成功")
+    else:
+        return False, result.get("Msg", "未知错误")
+
+def warm_connections(count, account=None):
+    """并发发出 count 个轻量请求，让 (该账号的) 连接池里提前备好长连接"""
+    url = f"{BASE_URL}{WARMUP_PATH}"
+    headers = {'User-Agent': DASHBOARD_HEADERS['User-Agent']}
+    client = _account(account).client
+
+    def _warm():
+        try:
+            client.get(url, headers=headers)
+        except Exception:
+            pass
+
+    threads = [threading.Thread(target=_warm) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
 def get_next_7_days():
     """获取今天开始的未来7天日期列表"""
     dates = []
@@ -328,47 +401,46 @@ def generate_mock_venue_data(item_type, area_name, date):
         
     return mock_data
 
-def save_user_phone(phone):
-    """登录成功后，将手机号强制写入 cookies.json 方便读取"""
-    cookies = load_cookies_from_file()
-    cookies['login_phone'] = phone
-    try:
-        with open(COOKIE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cookies, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"保存手机号失败: {e}")
+def save_user_phone(phone, account=None):
+    """登录成功后，将手机号强制写入 cookies.json (或该账号的 Cookie 文件) 方便读取"""
+    store = _account(account).cookies
+    store.set('login_phone', phone)
+    # 登录是低频操作，立即落盘，避免进程被强制结束时丢失
+    store.flush()
 
-def get_current_user():
+def get_current_user(account=None):
     """获取当前存储的登录手机号，如果没有则返回 None"""
-    cookies = load_cookies_from_file()
-    return cookies.get('login_phone')
+    return _account(account).phone
 
-def clear_login_info():
-    """注销：删除 cookie 文件"""
-    if os.path.exists(COOKIE_FILE):
-        try:
-            os.remove(COOKIE_FILE)
-        except Exception as e:
-            print(f"删除凭证失败: {e}")
+def clear_login_info(account=None):
+    """注销：清空内存中的 Cookie 并删除 cookie 文件"""
+    _account(account).cookies.clear()
 
-def validate_session():
+def check_session(account=None):
     """
     尝试访问主页来验证 Cookie 是否过期。
-    返回: (bool) True=有效, False=失效
+    返回: (valid, html) —— html 为验证时拿到的主页，可直接给主面板复用，避免再下载一次
     """
-    if not os.path.exists(COOKIE_FILE):
-        return False
+    if not _account(account).cookies.get_all():
+        return False, None
     
     # 尝试请求主页，看是否包含特定元素（例如 "退出" 按钮或用户信息）
     # 或者简单判断请求是否成功 (Code 200) 且没有重定向到登录页
-    success, html = get_dashboard_html()
+    success, html = get_dashboard_html(account)
     if not success:
-        return False
+        return False, None
     
     # 简单的关键词判断，根据实际页面特征调整
     # 如果页面里包含了 "登录" 按钮的特征字符，说明 cookie 失效了
     # 这里假设 get_dashboard_html 成功返回了内容且能解析出菜单，即视为有效
     if "menuCont" in html: 
-        return True
+        return True, html
         
-    return False    
\ No newline at end of file
+    return False, None
+
+def validate_session(account=None):
+    """
+    尝试访问主页来验证 Cookie 是否过期。
+    返回: (bool) True=有效, False=失效
+    """
+    return check_session(account)[0]
@@ -0,0 +1,148 @@
+"""
+api_handler 的协程版本
+在一个事件循环里并发发出成百上千个请求，而不是每个请求占用一个线程。
+返回值与同步接口完全一致: (success, result)。
+
+用法 (在工作线程中):
+    async def fetch_all():
+        return await asyncio.gather(*(
+            async_api.get_venue_data(item_type, area, day) for day in days
+        ))
+    results = async_api.run(fetch_all())
+"""
+import asyncio
+import json
+import time
+import weakref
+
+import aiohttp
+
+import api_handler
+import metrics
+import tracing
+
+# --- 配置 ---
+MAX_CONCURRENCY = 64   # 同一事件循环内同时在途的请求上限
+LIMIT_PER_HOST = 32    # 单主机连接上限
+DEFAULT_TIMEOUT = 10
+
+
+class AsyncClient:
+    """绑定在一个事件循环上的 aiohttp 客户端，带全局并发上限"""
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, limit_per_host=LIMIT_PER_HOST):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=limit_per_host)
+        # Cookie 统一由 api_handler 的 Cookie 存储管理，Session 自身不保存
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+        )
+
+    async def request(self, url, referer, is_json=True, account=None):
+        """与 api_handler._make_request 相同的约定 (Cookie 读写该账号的存储，连接仍由本客户端复用)"""
+        headers = api_handler._build_headers(referer)
+        cookies = api_handler._account(account).cookies
+        async with self._semaphore:
+            started = time.perf_counter()
+            recorded = False
+            net = tracing.span("request", "net", url=url)
+            try:
+                async with self._session.get(url, headers=headers,
+                                             cookies=cookies.get_all()) as resp:
+                    rotated = False
+                    for r in list(resp.history) + [resp]:
+                        changed = cookies.update({k: m.value for k, m in r.cookies.items()})
+                        rotated = rotated or changed
+
+                    body = await resp.read()
+                    net.end(status=resp.status)
+                    metrics.record_request(url, started, resp.status, len(body), rotated=rotated)
+                    recorded = True
+                    with tracing.span("json" if is_json else "decode", "parse"):
+                        text = body.decode('utf-8')
+                        if is_json:
+                            return True, json.loads(text)
+                        return True, text
+            except Exception as e:
+                net.end(error=type(e).__name__)
+                if recorded:
+                    metrics.record_request_error(url, e)
+                else:
+                    metrics.record_request(url, started, error=e)
+                return False, str(e)
+
+    async def fetch_bytes(self, url, headers=None):
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                async with self._session.get(url, headers=headers) as resp:
+                    body = await resp.read()
+                    metrics.record_request(url, started, resp.status, len(body))
+                    if resp.status == 200:
+                        return body
+                    return None
+            except Exception as e:
+                metrics.record_request(url, started, error=e)
+                return None
+
+    async def close(self):
+        await self._session.close()
+
+
+# 每个事件循环一个客户端，循环结束后自动释放
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """获取当前事件循环的共享客户端 (必须在协程中调用)"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = AsyncClient()
+        _clients[loop] = client
+    return client
+
+
+async def aclose():
+    """关闭当前事件循环的客户端"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def run(coro):
+    """在新的事件循环中运行协程，结束后关闭该循环的客户端 (供工作线程调用)"""
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await aclose()
+    return asyncio.run(_main())
+
+
+# --- 外部调用的接口方法 (与 api_handler 同名同返回值) ---
+
+async def get_dashboard_html(account=None):
+    url, referer = api_handler._dashboard_request()
+    return await get_client().request(url, referer, is_json=False, account=account)
+
+
+async def get_booking_options(item_type, account=None):
+    url, referer = api_handler._booking_options_request(item_type)
+    success, content = await get_client().request(url, referer, is_json=False, account=account)
+    return api_handler._parse_booking_options(success, content)
+
+
+async def get_venue_data(item_type, evaluate_name, day, account=None):
+    url, referer = api_handler._venue_data_request(item_type, evaluate_name, day)
+    success, result = await get_client().request(url, referer, is_json=True, account=account)
+    return api_handler._parse_venue_data(success, result, item_type, evaluate_name, day)
+
+
+async def fetch_image_bytes(image_url):
+    if not image_url.startswith('http'):
+        image_url = api_handler.BASE_URL + image_url
+    headers = {'User-Agent': api_handler.DASHBOARD_HEADERS['User-Agent']}
+    return await get_client().fetch_bytes(image_url, headers=headers)
@@ -0,0 +1,100 @@
+"""
+线程版 vs 协程版 get_venue_data 对比
+在本地起一个带固定延迟的 GetDayPlay 桩服务，分别用
+"每个请求一个线程" (main.py 现在的做法) 和 async_api 并发 10 / 100 / 1000 次。
+
+运行: python -m benchmarks.bench_async
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import api_handler
+import async_api
+
+SERVER_DELAY = 0.02  # 桩服务每个请求的处理延迟 (秒)
+LEVELS = (10, 100, 1000)
+
+_PAYLOAD = json.dumps({
+    "Code": 1,
+    "Data": [{
+        "name": f"{i}号场",
+        "rtnlist": [{"TicketLevelName": f"{h:02d}:00", "MemberPrice": 40.0,
+                     "TicketTypeNo": f"t{i}", "TicketLevelNo": f"l{h}",
+                     "CDefault7": None, "CDefault8": "0", "Description": None}
+                    for h in range(7, 22)],
+    } for i in range(1, 21)],
+}).encode('utf-8')
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(SERVER_DELAY)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(_PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(_PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 2048
+
+
+def _run_threaded(n):
+    results = [None] * n
+
+    def worker(i):
+        results[i] = api_handler.get_venue_data('0004', '羽毛球北训场', '2025-12-07')
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def _run_async(n):
+    async def fetch_all():
+        return await asyncio.gather(*(
+            async_api.get_venue_data('0004', '羽毛球北训场', '2025-12-07') for _ in range(n)
+        ))
+    return async_api.run(fetch_all())
+
+
+def main():
+    server = _StubServer(('127.0.0.1', 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_handler.set_base_url(f"http://127.0.0.1:{server.server_port}")
+
+    print(f"桩服务延迟 {SERVER_DELAY * 1000:.0f}ms, "
+          f"线程版连接池上限 {api_handler.http_client.POOL_MAXSIZE}/主机, "
+          f"协程版并发上限 {async_api.MAX_CONCURRENCY}")
+    print(f"{'并发数':>8} {'线程版(s)':>12} {'协程版(s)':>12} {'加速比':>8}")
+    for n in LEVELS:
+        t0 = time.perf_counter()
+        threaded = _run_threaded(n)
+        t_threaded = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        coro = _run_async(n)
+        t_async = time.perf_counter() - t0
+
+        failed = sum(1 for ok, _ in threaded + coro if not ok)
+        print(f"{n:>8} {t_threaded:>12.3f} {t_async:>12.3f} {t_threaded / t_async:>8.2f}"
+              + (f"  (失败 {failed})" if failed else ""))
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+页面提取后端对比
+在 fixtures/ 下的主页与 particulars 页面上分别运行 bs4 / stream / lxml 三种后端，
+先校验输出与 BeautifulSoup 完全一致，再比较单次解析耗时。
+
+运行: python -m benchmarks.bench_html_extract
+"""
+import os
+import timeit
+
+import html_extract
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+REPEAT = 200
+
+CASES = (
+    ('particulars.html', 'extract_booking_options'),
+    ('dashboard.html', 'extract_menu_items'),
+)
+
+
+def _backends():
+    names = ['bs4', 'stream']
+    if html_extract.HAS_LXML:
+        names.append('lxml')
+    return names
+
+
+def main():
+    print(f"{'页面':<18} {'后端':<8} {'单次(ms)':>10} {'相对bs4':>8}")
+    for fixture, func_name in CASES:
+        with open(os.path.join(FIXTURE_DIR, fixture), 'r', encoding='utf-8') as f:
+            html = f.read()
+        func = getattr(html_extract, func_name)
+
+        expected = func(html, backend='bs4')
+        baseline = None
+        for backend in _backends():
+            output = func(html, backend=backend)
+            if output != expected:
+                raise SystemExit(f"{fixture}: {backend} 输出与 BeautifulSoup 不一致\n{output}\n{expected}")
+            per_call = min(timeit.repeat(lambda: func(html, backend=backend), number=REPEAT, repeat=3)) / REPEAT
+            baseline = baseline or per_call
+            print(f"{fixture:<18} {backend:<8} {per_call * 1000:>10.3f} {baseline / per_call:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
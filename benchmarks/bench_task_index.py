@@ -0,0 +1,97 @@
+"""
+任务索引查找开销
+库中存 100 / 1000 / 10000 个任务，对一个 40 场地 × 15 时段的网格逐格判断
+"是否已设自动抢"，对比原来的线性扫描与 task_manager 的内存索引。
+索引版的耗时应当与任务总数无关。
+
+运行: python -m benchmarks.bench_task_index
+"""
+import datetime
+import os
+import tempfile
+import time
+
+import task_manager
+
+COURTS = 40
+TIMES = [f"{h:02d}:00" for h in range(7, 22)]
+SIZES = (100, 1000, 10000)
+AREA = "羽毛球北训场"
+DATE = "2025-12-07"
+
+
+def make_tasks(n):
+    """生成 n 个任务，分布在多个区域与日期上，其中一部分落在被测网格里"""
+    areas = [AREA, "羽毛球南训场", "体育馆羽毛球场", "全民健身中心羽毛球场"]
+    base = datetime.date(2025, 12, 1)
+    tasks = []
+    for i in range(n):
+        tasks.append({
+            "venue_name": f"{i % COURTS + 1}号场",
+            "area_name": areas[i % len(areas)],
+            "date": (base + datetime.timedelta(days=(i // (COURTS * len(TIMES))) % 30)).strftime("%Y-%m-%d"),
+            "time": TIMES[(i // COURTS) % len(TIMES)],
+            "price": 40.0,
+            "data": {"TicketTypeNo": f"t{i}", "TicketLevelNo": f"l{i}"},
+        })
+    return tasks
+
+
+def _grid_linear(saved_tasks):
+    """原 _draw_grid 的做法: 每个格子扫描全部任务"""
+    hits = 0
+    for c in range(COURTS):
+        venue = f"{c + 1}号场"
+        for time_slot in TIMES:
+            for t in saved_tasks:
+                if (t['date'] == DATE and t['time'] == time_slot and
+                        t['venue_name'] == venue and t['area_name'] == AREA):
+                    hits += 1
+                    break
+    return hits
+
+
+def _grid_indexed():
+    scheduled = task_manager.get_scheduled_slots(AREA, DATE)
+    hits = 0
+    for c in range(COURTS):
+        venue = f"{c + 1}号场"
+        for time_slot in TIMES:
+            if (venue, time_slot) in scheduled:
+                hits += 1
+    return hits
+
+
+def _timed(func, *args, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    task_manager.TASK_FILE = os.path.join(workdir, 'booking_tasks.json')  # 不迁移真实任务文件
+    print(f"网格 {COURTS} 场地 × {len(TIMES)} 时段")
+    print(f"{'任务数':>8} {'线性扫描(ms)':>14} {'索引(ms)':>10} {'保存(ms)':>10}")
+    for n in SIZES:
+        task_manager.TASK_DB = os.path.join(workdir, f"tasks_{n}.db")
+        task_manager.reload_index()
+        tasks = make_tasks(n)
+
+        start = time.perf_counter()
+        task_manager.save_task(tasks)
+        t_save = time.perf_counter() - start
+
+        saved = task_manager.load_tasks()
+        t_linear, hits_linear = _timed(_grid_linear, saved, repeat=1 if n >= 10000 else 3)
+        t_index, hits_index = _timed(_grid_indexed)
+        assert hits_linear == hits_index, (hits_linear, hits_index)
+        print(f"{n:>8} {t_linear * 1000:>14.2f} {t_index * 1000:>10.3f} {t_save * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+场地网格渲染开销
+对比原来的 "每格一个 tk.Button" 写法与 venue_grid.VenueGrid (单 Canvas、只画可见区域)，
+在 10 / 40 / 100 个场地 × 15 个时段下分别测:
+- 开窗: 创建网格并完成首次绘制 (update_idletasks 之后)
+- 重绘: 提交任务后再刷新一次 (按钮写法整表重建；Canvas 写法只改有变化的格子)
+
+需要图形环境 (DISPLAY)；没有时直接退出。
+运行: python -m benchmarks.bench_venue_grid
+"""
+import functools
+import time
+import tkinter as tk
+
+import api_handler
+import venue_grid
+
+SIZES = (10, 40, 100)
+TIMES = [f"{h:02d}:00" for h in range(7, 22)]
+REPEAT = 3
+WINDOW_SIZE = "1200x800"
+
+
+def _make_venue_data(courts):
+    """用模拟数据 (每次 10 个场地) 拼出指定数量的场地"""
+    mock = api_handler.generate_mock_venue_data('0004', "北训场", '2025-12-07')
+    return [{"name": f"北训场{i + 1}号场", "rtnlist": mock[i % len(mock)]['rtnlist']} for i in range(courts)]
+
+
+def _draw_buttons(container, venue_data, scheduled):
+    """原 VenueSelectionWindow._draw_grid 的控件写法 (去掉了与渲染无关的部分)"""
+    for widget in container.winfo_children():
+        widget.destroy()
+    canvas = tk.Canvas(container, bg="#e0e0e0")
+    canvas.pack(fill="both", expand=True)
+    frame = tk.Frame(canvas)
+    canvas.create_window((0, 0), window=frame, anchor="nw")
+
+    tk.Label(frame, text="时间", width=8, height=2, relief="raised", bg="#ddd").grid(row=0, column=0, sticky="nsew")
+    for col, venue_obj in enumerate(venue_data):
+        tk.Label(frame, text=venue_obj['name'], width=12, height=2, relief="raised", bg="#ddd",
+                 wraplength=90).grid(row=0, column=col + 1, sticky="nsew")
+    for row, time_slot in enumerate(TIMES):
+        tk.Label(frame, text=time_slot, width=8, height=3, relief="raised", bg="#ddd").grid(row=row + 1, column=0, sticky="nsew")
+
+    cells = venue_grid.build_cells(venue_data, TIMES, scheduled)
+    for (row, col), (status, text, _) in cells.items():
+        bg, fg, clickable = venue_grid.STYLES[status]
+        btn = tk.Button(frame, text=text, bg=bg, width=10, height=3, relief="groove")
+        if clickable:
+            btn.config(command=functools.partial(print, row, col))
+        else:
+            btn.config(state=tk.DISABLED, disabledforeground=fg)
+        btn.grid(row=row + 1, column=col + 1, padx=1, pady=1, sticky="nsew")
+
+
+def _draw_canvas(grid, venue_data, scheduled):
+    cells = venue_grid.build_cells(venue_data, TIMES, scheduled)
+    grid.update_cells([v['name'] for v in venue_data], TIMES, cells)
+
+
+def _timed(root, func):
+    start = time.perf_counter()
+    func()
+    root.update_idletasks()
+    root.update()
+    return time.perf_counter() - start
+
+
+def _bench(root, courts):
+    venue_data = _make_venue_data(courts)
+    scheduled = set()
+    results = {}
+
+    # 原写法
+    opens, redraws = [], []
+    for _ in range(REPEAT):
+        win = tk.Toplevel(root)
+        win.geometry(WINDOW_SIZE)
+        container = tk.Frame(win)
+        container.pack(fill="both", expand=True)
+        opens.append(_timed(root, lambda: _draw_buttons(container, venue_data, scheduled)))
+        redraws.append(_timed(root, lambda: _draw_buttons(container, venue_data, scheduled)))
+        win.destroy()
+    results['buttons'] = (min(opens), min(redraws))
+
+    # Canvas 写法
+    opens, redraws = [], []
+    for _ in range(REPEAT):
+        win = tk.Toplevel(root)
+        win.geometry(WINDOW_SIZE)
+        holder = {}
+
+        def open_grid():
+            holder['grid'] = venue_grid.VenueGrid(win)
+            holder['grid'].pack(fill="both", expand=True)
+            root.update_idletasks()  # 先确定视口大小，再按视口绘制
+            _draw_canvas(holder['grid'], venue_data, scheduled)
+
+        opens.append(_timed(root, open_grid))
+        redraws.append(_timed(root, lambda: _draw_canvas(holder['grid'], venue_data, scheduled)))
+        win.destroy()
+    results['canvas'] = (min(opens), min(redraws))
+    return results
+
+
+def main():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"没有可用的图形环境，跳过: {e}")
+        return
+    root.withdraw()
+
+    print(f"{'场地数':>6} {'格子数':>6} {'写法':<8} {'开窗(ms)':>10} {'重绘(ms)':>10}")
+    for courts in SIZES:
+        results = _bench(root, courts)
+        for name, (t_open, t_redraw) in results.items():
+            print(f"{courts:>6} {courts * len(TIMES):>6} {name:<8} {t_open * 1000:>10.1f} {t_redraw * 1000:>10.1f}")
+    root.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""
+微基准套件 (可重复运行，结果为 JSON，可与保存的基线比较)
+覆盖的热点:
+- parse.*        particulars 页面解析 (get_booking_options 的解析部分)、主页 menuCont 解析
+- task_store.*   save_task / load_tasks / get_scheduled_cells，任务数 100 / 1k / 10k
+- grid.*         场地网格每格状态判断 (原 _draw_grid 的逻辑，现为 venue_grid.build_cells / cell_status，不需要显示器)
+- mock.*         generate_mock_venue_data
+- metrics.*      每次请求记录指标的开销 (开启 / 关闭)
+
+运行:
+    python -m benchmarks.suite                          # 运行并与 benchmarks/baseline.json 比较
+    python -m benchmarks.suite --json out.json          # 结果另存为 JSON
+    python -m benchmarks.suite --save-baseline          # 用本次结果覆盖基线
+    python -m benchmarks.suite -k task_store --quick    # 只跑名字包含 task_store 的项，少采样
+有项目比基线慢超过阈值时退出码为 1，可直接用在提交前的检查里。
+基线与机器相关，换机器后请先 --save-baseline。
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import api_handler
+import html_extract
+import metrics
+import task_manager
+import venue_grid
+
+# 网格规模与任务数据和 bench_task_index 共用一份
+from benchmarks.bench_task_index import AREA, COURTS, DATE, TIMES, make_tasks
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+
+# --- 配置 ---
+REPEAT = 7               # 每项采样次数，比较时用最快一次 (受其他进程干扰最少)
+QUICK_REPEAT = 3
+MIN_SAMPLE_TIME = 0.05   # 秒，每次采样至少运行这么久 (自动确定循环次数)
+THRESHOLD = 1.3          # 默认阈值: 比基线慢 30% 以上视为退化
+THRESHOLDS = {           # 涉及磁盘 I/O 的项波动大，放宽
+    'task_store.save': 2.0,
+}
+TASK_SIZES = (100, 1000, 10000)
+
+
+# --- 采样 ---
+def _calibrate(func):
+    """确定每次采样的循环次数，使单次采样不少于 MIN_SAMPLE_TIME"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_TIME or number >= 1_000_000:
+            return number
+        number *= 10 if elapsed < MIN_SAMPLE_TIME / 10 else 2
+
+
+def measure(func, repeat, setup=None):
+    """
+    返回每次调用的耗时样本 (秒)
+    :param setup: 每次采样前调用，返回值作为 func 的参数；有 setup 时每次采样只调用一次 func
+                  (用于 save_task 这类会改变状态、需要重新准备的项)
+    """
+    if setup is not None:
+        samples = []
+        for _ in range(repeat):
+            arg = setup()
+            start = time.perf_counter()
+            func(arg)
+            samples.append(time.perf_counter() - start)
+        return samples, 1
+    number = _calibrate(func)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples, number
+
+
+# --- 数据 ---
+def _read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def make_venue_data():
+    """COURTS 个场地 × TIMES 的 GetDayPlay 数据，各种状态都有"""
+    data = []
+    for c in range(COURTS):
+        rtnlist = []
+        for r, t in enumerate(TIMES):
+            k = (c * 7 + r * 3) % 10
+            rtnlist.append({
+                "TicketLevelName": t, "MemberPrice": 40.0,
+                "TicketTypeNo": f"T{c}", "TicketLevelNo": f"L{c}-{r}",
+                "CDefault7": "不可预约" if k == 0 else "可预约",
+                "CDefault8": "1" if k in (1, 2, 3) else "0",
+                "Description": "锁场" if k == 4 else None,
+            })
+        data.append({"name": f"{c + 1}号场", "rtnlist": rtnlist})
+    return data
+
+
+def _use_task_db(workdir, name):
+    """把 task_manager 指向临时库，不碰真实任务文件"""
+    task_manager.TASK_FILE = os.path.join(workdir, 'booking_tasks.json')
+    task_manager.TASK_DB = os.path.join(workdir, name)
+    task_manager.reload_index()
+
+
+# --- 基准项 ---
+def bench_parse(repeat):
+    particulars = _read_fixture('particulars.html')
+    dashboard = _read_fixture('dashboard.html')
+    yield 'parse.booking_options', {}, lambda: measure(
+        lambda: api_handler._parse_booking_options(True, particulars), repeat)
+    yield 'parse.menu_items', {}, lambda: measure(lambda: html_extract.extract_menu_items(dashboard), repeat)
+
+
+def bench_task_store(repeat, sizes=TASK_SIZES):
+    workdir = tempfile.mkdtemp(prefix='bench_tasks_')
+    counter = iter(range(10 ** 9))
+    saved_paths = task_manager.TASK_FILE, task_manager.TASK_DB
+    try:
+        for n in sizes:
+            tasks = make_tasks(n)
+
+            def fresh_db():
+                _use_task_db(workdir, f"save_{n}_{next(counter)}.db")
+                task_manager.get_index()  # 建好空索引与表，只计写入本身
+                task_manager.load_tasks()
+                return tasks
+            yield 'task_store.save', {'n': n}, lambda: measure(task_manager.save_task, repeat, setup=fresh_db)
+
+            _use_task_db(workdir, f"read_{n}.db")
+            task_manager.save_task(tasks)
+            yield 'task_store.load', {'n': n}, lambda: measure(task_manager.load_tasks, repeat)
+            task_manager.get_index()
+            yield 'task_store.get_scheduled_cells', {'n': n}, lambda: measure(
+                lambda: task_manager.get_scheduled_cells(AREA, DATE), repeat)
+    finally:
+        task_manager.TASK_FILE, task_manager.TASK_DB = saved_paths
+        task_manager.reload_index()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_grid(repeat):
+    data = make_venue_data()
+    scheduled = {(f"{c + 1}号场", TIMES[c % len(TIMES)]) for c in range(0, COURTS, 3)}
+    cells = [(item, (venue['name'], item['TicketLevelName']) in scheduled)
+             for venue in data for item in venue['rtnlist']]
+    cells += [(None, False)] * COURTS
+
+    def status_all():
+        for cell_data, is_scheduled in cells:
+            venue_grid.cell_status(cell_data, is_scheduled)
+    yield 'grid.cell_status', {'cells': len(cells)}, lambda: measure(status_all, repeat)
+    yield 'grid.build_cells', {'courts': COURTS, 'times': len(TIMES)}, lambda: measure(
+        lambda: venue_grid.build_cells(data, TIMES, scheduled), repeat)
+
+
+def bench_mock(repeat):
+    def sample():
+        # generate_mock_venue_data 每次都会打印警告，丢弃掉，免得淹没结果
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            return measure(lambda: api_handler.generate_mock_venue_data('0004', AREA, DATE), repeat)
+    yield 'mock.generate_venue_data', {}, sample
+
+
+def bench_metrics(repeat):
+    url = f"{api_handler.DEFAULT_BASE_URL}/cd/GetDayPlay?type=0004&Evaluate=x&Day={DATE}"
+    m = metrics.Metrics(enabled=True)
+    yield 'metrics.record', {}, lambda: measure(lambda: m.record('GetDayPlay', 0.042, 200, 5120), repeat)
+
+    def record_request(enabled):
+        # 请求路径上的完整开销: 解析 URL 得到接口名 + 计时 + 记录；关闭时只剩一次判断
+        def sample():
+            saved = metrics.get_metrics().enabled
+            metrics.set_enabled(enabled)
+            try:
+                return measure(lambda: metrics.record_request(url, 0.0, 200, 5120), repeat)
+            finally:
+                metrics.set_enabled(saved)
+                metrics.reset()
+        return sample
+    yield 'metrics.record_request', {'enabled': 1}, record_request(True)
+    yield 'metrics.record_request', {'enabled': 0}, record_request(False)
+
+
+SUITES = (bench_parse, bench_task_store, bench_grid, bench_mock, bench_metrics)
+
+
+# --- 结果与比较 ---
+def result_key(name, params):
+    if not params:
+        return name
+    return name + '[' + ','.join(f"{k}={v}" for k, v in sorted(params.items())) + ']'
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(repeat=REPEAT, pattern=None):
+    results = {}
+    for suite in SUITES:
+        # 每个 suite 逐项产出 (名字, 参数, 采样函数)，被 -k 过滤掉的项不采样
+        for name, params, sample in suite(repeat):
+            key = result_key(name, params)
+            if pattern and pattern not in key:
+                continue
+            samples, number = sample()
+            results[key] = {
+                "name": name, "params": params, "number": number,
+                "median_us": round(statistics.median(samples) * 1e6, 3),
+                "min_us": round(min(samples) * 1e6, 3),
+                "stdev_us": round(statistics.stdev(samples) * 1e6, 3) if len(samples) > 1 else 0.0,
+            }
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "html_backend": "lxml" if html_extract.HAS_LXML else "stream",
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """给每项加上 baseline_us / ratio / regressed，返回退化的项名列表"""
+    regressed = []
+    base_results = baseline.get('results', {}) if baseline else {}
+    for key, r in report['results'].items():
+        base = base_results.get(key)
+        if not base:
+            continue
+        ratio = r['min_us'] / base['min_us'] if base['min_us'] else 1.0
+        limit = THRESHOLDS.get(r['name'], THRESHOLD)
+        r.update(baseline_us=base['min_us'], ratio=round(ratio, 3), regressed=ratio > limit)
+        if ratio > limit:
+            regressed.append(key)
+    return regressed
+
+
+def _print_table(report):
+    print(f"{'项目':<44} {'最快(us)':>12} {'中位数(us)':>12} {'基线(us)':>12} {'比值':>7}", file=sys.stderr)
+    for key, r in report['results'].items():
+        base = f"{r['baseline_us']:.1f}" if 'baseline_us' in r else '-'
+        ratio = f"{r['ratio']:.2f}" if 'ratio' in r else '-'
+        mark = '  <-- 退化' if r.get('regressed') else ''
+        print(f"{key:<44} {r['min_us']:>12.1f} {r['median_us']:>12.1f} {base:>12} {ratio:>7}{mark}",
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite', description="微基准套件")
+    parser.add_argument('-k', dest='pattern', help="只运行名字包含该字符串的项")
+    parser.add_argument('--quick', action='store_true', help=f"每项只采样 {QUICK_REPEAT} 次")
+    parser.add_argument('--json', help="结果写入该文件 (默认输出到标准输出)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="基线文件")
+    parser.add_argument('--save-baseline', action='store_true', help="用本次结果覆盖基线")
+    args = parser.parse_args(argv)
+
+    report = run(QUICK_REPEAT if args.quick else REPEAT, args.pattern)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressed = compare(report, baseline)
+    if baseline:
+        report['baseline_commit'] = baseline.get('commit')
+    report['regressed'] = regressed
+    _print_table(report)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        report.pop('regressed')
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"基线已保存到 {args.baseline}", file=sys.stderr)
+        return 0
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
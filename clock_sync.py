@@ -0,0 +1,151 @@
+"""
+服务器时钟偏差与 RTT 估计
+放号时刻以场馆服务器的时钟为准。这里向服务器发轻量请求，根据响应头 Date
+(精度 1 秒) 按 NTP 的思路给偏差定界:
+
+    请求发出 t0、收到响应头 t1 (本地时间)，Date 为 D，则服务器在 [t0, t1] 内某一时刻读数落在 [D, D+1)，
+    故 偏差 offset = 服务器时间 - 本地时间 ∈ [D - t1, D + 1 - t0]
+
+多次探测的区间取交集即为置信区间；探测时刻均匀错开在一秒内的不同相位，
+使 Date 跳秒的边界落进某些请求窗口，从而把区间收窄到接近 RTT 的量级。
+"""
+import email.utils
+import threading
+import time
+
+import api_handler
+import http_client
+import metrics
+
+# --- 配置 ---
+PROBE_PATH = '/cd/home'
+PROBE_SAMPLES = 10
+REFRESH_INTERVAL = 600  # 秒，后台定期重新估计的间隔
+SEND_MARGIN = 0.005     # 秒，计算发送时刻时额外留出的余量，确保请求落在放号之后
+
+
+def probe_once(url=None, clock=time.time):
+    """
+    发一次探测请求，返回 (t0, t1, server_date) ；失败返回 None
+    t1 取收到响应头的时刻，不包含下载正文的时间
+    """
+    url = url or f"{api_handler.BASE_URL}{PROBE_PATH}"
+    headers = {'User-Agent': api_handler.DASHBOARD_HEADERS['User-Agent']}
+    try:
+        t0 = clock()
+        resp = http_client.get_client().get(url, headers=headers, stream=True)
+        t1 = clock()
+        date_header = resp.headers.get('Date')
+        resp.content  # 读完正文，让连接回到连接池
+    except Exception as e:
+        print(f"时钟探测失败: {e}")
+        return None
+    if not date_header:
+        return None
+    return t0, t1, email.utils.parsedate_to_datetime(date_header).timestamp()
+
+
+def estimate(samples):
+    """
+    根据探测样本 [(t0, t1, server_date), ...] 计算估计结果:
+    offset (秒，服务器 - 本地)、lower/upper 置信区间、RTT 分位数与抖动
+    """
+    if not samples:
+        return None
+    rtts = [t1 - t0 for t0, t1, _ in samples]
+    lower = max(d - t1 for t0, t1, d in samples)
+    upper = min(d + 1 - t0 for t0, t1, d in samples)
+    consistent = lower <= upper
+    if not consistent:
+        # 区间没有交集 (服务器时钟跳变或多台服务器不同步)，退化为各样本中点的中位数
+        mids = sorted((d + 0.5) - (t0 + t1) / 2 for t0, t1, d in samples)
+        mid = mids[len(mids) // 2]
+        lower, upper = mids[0], mids[-1]
+    else:
+        mid = (lower + upper) / 2
+
+    sorted_rtts = sorted(rtts)
+    jitter = (sum(abs(b - a) for a, b in zip(rtts, rtts[1:])) / (len(rtts) - 1)) if len(rtts) > 1 else 0.0
+    return {
+        "offset": mid,
+        "lower": lower,
+        "upper": upper,
+        "consistent": consistent,
+        "rtt_min": sorted_rtts[0],
+        "rtt_p50": metrics.quantile(sorted_rtts, 0.50),
+        "rtt_p90": metrics.quantile(sorted_rtts, 0.90),
+        "rtt_p99": metrics.quantile(sorted_rtts, 0.99),
+        "jitter": jitter,
+        "samples": len(samples),
+    }
+
+
+class ClockSync:
+    def __init__(self, url=None, samples=PROBE_SAMPLES, clock=time.time, sleep=time.sleep):
+        self.url = url
+        self.samples = samples
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._estimate = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def measure(self):
+        """立即探测并更新估计；探测时刻在一秒内均匀错开"""
+        samples = []
+        for i in range(self.samples):
+            now = self._clock()
+            phase = (i / self.samples - (now % 1.0)) % 1.0
+            self._sleep(phase)
+            sample = probe_once(self.url, self._clock)
+            if sample:
+                samples.append(sample)
+        result = estimate(samples)
+        if result is not None:
+            result["measured_at"] = self._clock()
+            with self._lock:
+                self._estimate = result
+        return result
+
+    @property
+    def current(self):
+        with self._lock:
+            return self._estimate
+
+    def server_now(self):
+        """按当前估计换算的服务器时间 (未估计时等于本地时间)"""
+        est = self.current
+        return self._clock() + (est["offset"] if est else 0.0)
+
+    def local_send_time(self, release_server_ts, margin=SEND_MARGIN):
+        """
+        为了让请求恰好在服务器放号之后到达，本地应在何时发送
+        按偏差下界与最小单程时延 (RTT/2) 计算，保证在置信区间内都不会早到
+        """
+        est = self.current
+        if est is None:
+            return release_server_ts + margin
+        return release_server_ts - est["lower"] - est["rtt_min"] / 2 + margin
+
+    def start(self, interval=REFRESH_INTERVAL):
+        """后台定期重新估计；已有不到 interval 秒的估计 (例如启动时刚 measure 过) 时先等到期再测"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                est = self.current
+                age = self._clock() - est["measured_at"] if est else interval
+                if age >= interval:
+                    self.measure()
+                    age = 0
+                self._stop.wait(interval - age)
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
@@ -0,0 +1,105 @@
+"""
+进程内 Cookie 存储
+内存中的字典是唯一数据源，请求路径上不再读写文件；
+只有 Cookie 真正发生变化时才延迟合并写盘 (临时文件 + 原子替换)。
+"""
+import atexit
+import json
+import os
+import threading
+
+FLUSH_DELAY = 0.5  # 秒，这段时间内的多次变更合并为一次写盘
+
+
+class CookieStore:
+    def __init__(self, path, flush_delay=FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()        # 保护内存字典
+        self._write_lock = threading.Lock()  # 保证同一时刻只有一个线程在写文件
+        self._cookies = None
+        self._dirty = False
+        self._timer = None
+        atexit.register(self.flush)
+
+    def _ensure_loaded(self):
+        """首次访问时从文件加载 (调用方需持有 _lock)"""
+        if self._cookies is not None:
+            return
+        self._cookies = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._cookies = json.load(f)
+        except Exception as e:
+            print(f"加载 Cookie 失败: {e}")
+
+    def get_all(self):
+        """返回当前所有 Cookie 的副本"""
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._cookies)
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._ensure_loaded()
+            return self._cookies.get(key, default)
+
+    def update(self, mapping):
+        """合并新的 Cookie，返回是否有变化；有变化时安排一次延迟写盘"""
+        with self._lock:
+            self._ensure_loaded()
+            changed = {k: v for k, v in mapping.items() if self._cookies.get(k) != v}
+            if not changed:
+                return False
+            self._cookies.update(changed)
+            self._dirty = True
+            self._schedule_flush()
+            return True
+
+    def set(self, key, value):
+        return self.update({key: value})
+
+    def clear(self):
+        """清空内存并删除文件 (注销时使用)"""
+        with self._lock:
+            self._cookies = {}
+            self._dirty = False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        with self._write_lock:
+            if os.path.exists(self.path):
+                try:
+                    os.remove(self.path)
+                except Exception as e:
+                    print(f"删除凭证失败: {e}")
+
+    def _schedule_flush(self):
+        """调用方需持有 _lock；已有待执行的写盘时不重复安排"""
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(self.flush_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """立即把未写盘的变更落到文件"""
+        with self._write_lock:
+            with self._lock:
+                self._timer = None
+                if not self._dirty:
+                    return
+                snapshot = dict(self._cookies)
+                self._dirty = False
+
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, indent=4, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"保存 Cookie 失败: {e}")
+                with self._lock:
+                    self._dirty = True
@@ -0,0 +1,395 @@
+"""
+自动抢票执行器
+从 task_manager 读取待执行的任务，按放行时刻分批:
+1. 放行前 WARMUP_LEAD 秒: 预先构造好每个下单请求 (URL、编码参数、Header、Cookie)，
+   并提前建立好长连接
+2. 放行时刻: 先粗睡眠到最后 SPIN_THRESHOLD 秒，再忙等到毫秒级精确时刻，
+   所有已就绪的发送线程同时放行
+3. 对冲提交: 同一场地时段 (区域, 日期, 场地, 时间) 错开 HEDGE_STAGGER 秒并发发出
+   多份请求，任意一份成功即取消其余尚未发出的；同一账号在途请求数不超过 MAX_INFLIGHT。
+   放号瞬间单个请求的长尾延迟就会丢场，这里用多发几份换尾延迟
+   任务带候补阶梯时，首选失败后直接发下一级预先构造好的请求，不再查询场地数据
+   任务带 account 时用该账号的 Cookie 与连接池下单；同一批里的多个账号同时放行，
+   各账号的在途上限彼此独立，一个账号的请求不会挤占另一个账号
+4. 每个任务的结果写回任务库 (status / result / fired_at / latency / attempts)
+
+时钟可注入 (now / sleep / spin_until)，便于用假时钟对本地桩服务测试。
+传入 clock_sync.ClockSync 时，放行时刻按服务器时钟偏差与 RTT 换算成本地发送时刻。
+"""
+import datetime
+import threading
+import time
+
+import accounts
+import api_handler
+import task_manager
+
+# --- 配置 ---
+RELEASE_TIME = datetime.time(8, 0)  # 每天放号时刻
+RELEASE_DAYS_AFTER = 1              # 任务在创建后第 N 天的放号时刻提交 (界面上的“次日08:00提交”)
+LATE_GRACE = 60                     # 秒，错过放行时刻不超过这么久的任务立即补发，更晚的标记为过期
+WARMUP_LEAD = 3.0                   # 秒，提前多久构造请求并预热连接
+WARM_CONNECTIONS = 4                # 预热的长连接数 (至少与同批任务数取较大值)
+SPIN_THRESHOLD = 0.02               # 秒，最后这段时间改为忙等
+IDLE_INTERVAL = 60                  # 秒，没有临近任务时多久重新检查一次任务库
+ERROR_RETRY_INTERVAL = 5            # 秒，一批任务执行出错后隔多久重新调度
+HEDGE_ATTEMPTS = 3                  # 每张票并发提交的份数 (任务里的 hedge_attempts 可覆盖)
+HEDGE_STAGGER = 0.015               # 秒，相邻两份提交之间错开的间隔
+MAX_INFLIGHT = 8                    # 同一账号同时在途的下单请求上限
+
+STATUS_PENDING = 'pending'
+STATUS_SUCCESS = 'success'
+STATUS_FAILED = 'failed'
+STATUS_EXPIRED = 'expired'
+
+
+class SystemClock:
+    """真实时钟 (Unix 时间戳，秒)"""
+
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def spin_until(self, target):
+        while time.time() < target:
+            pass
+
+
+def wait_until(clock, target):
+    """等待到 target 时刻: 先粗睡眠，最后 SPIN_THRESHOLD 秒忙等"""
+    while True:
+        remaining = target - clock.now()
+        if remaining <= 0:
+            return
+        if remaining > SPIN_THRESHOLD:
+            clock.sleep(remaining - SPIN_THRESHOLD)
+        else:
+            clock.spin_until(target)
+            return
+
+
+def next_release(created_at):
+    """在 created_at (时间戳) 创建的任务的放行时刻: 创建后第 RELEASE_DAYS_AFTER 天的 RELEASE_TIME"""
+    day = datetime.date.fromtimestamp(created_at) + datetime.timedelta(days=RELEASE_DAYS_AFTER)
+    return datetime.datetime.combine(day, RELEASE_TIME).timestamp()
+
+
+def upcoming_release(now):
+    """now 之后 (含 now) 最近的一次放号时刻: 今天的 RELEASE_TIME 还没到就是今天，否则是明天"""
+    today = datetime.date.fromtimestamp(now)
+    release = datetime.datetime.combine(today, RELEASE_TIME).timestamp()
+    if release >= now:
+        return release
+    return datetime.datetime.combine(today + datetime.timedelta(days=1), RELEASE_TIME).timestamp()
+
+
+def release_time_for(task, now=None):
+    """
+    任务的放行时刻 (时间戳)；任务里带 release_at (ISO 格式) 时以它为准，否则按创建时间 created_at 计算
+    (没有 created_at 的旧任务按 now 计算，next_batch 会把它补写进任务库)
+    """
+    if task.get('release_at'):
+        return datetime.datetime.fromisoformat(task['release_at']).timestamp()
+    created_at = task.get('created_at')
+    if created_at is None:
+        created_at = time.time() if now is None else now
+    return next_release(created_at)
+
+
+def is_pending(task):
+    return task.get('status', STATUS_PENDING) == STATUS_PENDING
+
+
+def account_of(task):
+    """任务的下单账号名 (规范形式，默认账号为 None)；写成默认账号手机号的任务与不带 account 的是同一个账号"""
+    return accounts.get_account(task.get('account')).name
+
+
+def hedge_key(task):
+    """
+    对冲分组的键: 同一账号、同一场地时段的任务共用一组提交
+    (票号在不同区域、日期之间会重复，不能单独用来区分场地)
+    """
+    return account_of(task), task['area_name'], task['date'], task['venue_name'], task['time']
+
+
+class _Rung:
+    """候补阶梯中的一级 (一个场地): 一组对冲提交，first success 之后其余未发出的份数直接取消"""
+
+    def __init__(self, index, slot, prepared):
+        self.index = index
+        self.slot = slot
+        self.prepared = prepared
+        self.done = threading.Event()     # 有一份成功
+        self.settled = threading.Event()  # 已有结论: 成功，或全部份数都已失败/取消
+        self.attempts = [None] * len(prepared)
+        self._lock = threading.Lock()
+        self._remaining = len(prepared)
+
+    def record(self, n, **outcome):
+        self.attempts[n] = dict(n=n, rung=self.index, **outcome)
+        if outcome.get('success'):
+            self.done.set()
+        with self._lock:
+            self._remaining -= 1
+            if self.done.is_set() or self._remaining == 0:
+                self.settled.set()
+
+    def outcome(self):
+        """返回 (success, msg, fired_at, latency)：有成功取最先成功的一份，否则取最后一份失败"""
+        sent = [a for a in self.attempts if a and not a.get('cancelled')]
+        wins = [a for a in sent if a['success']]
+        if wins:
+            best = min(wins, key=lambda a: a['sent_at'] + a['latency'])
+        elif sent:
+            best = max(sent, key=lambda a: a['sent_at'] + a['latency'])
+        else:
+            return False, "未发出请求", None, 0.0
+        return best['success'], best['msg'], best['sent_at'], best['latency']
+
+
+class _HedgeGroup:
+    """同一场地时段的任务共用的一组提交: 按候补阶梯逐级尝试，每级内对冲发出多份"""
+
+    def __init__(self, tasks, rungs):
+        self.tasks = tasks
+        self.rungs = rungs
+        self.account = account_of(tasks[0])
+
+    @property
+    def attempts(self):
+        return [a for r in self.rungs for a in r.attempts if a is not None]
+
+    def outcome(self):
+        """返回 (success, msg, fired_at, latency, rung)；全部失败时取最后尝试的一级"""
+        tried = [r for r in self.rungs if r.settled.is_set()] or self.rungs[:1]
+        for r in tried:
+            if r.done.is_set():
+                return r.outcome() + (r,)
+        return tried[-1].outcome() + (tried[-1],)
+
+
+class BookingExecutor:
+    def __init__(self, clock=None, warmup_lead=WARMUP_LEAD, warm_connections=WARM_CONNECTIONS, clock_sync=None,
+                 hedge_attempts=HEDGE_ATTEMPTS, hedge_stagger=HEDGE_STAGGER, max_inflight=MAX_INFLIGHT):
+        self.clock = clock or SystemClock()
+        self.clock_sync = clock_sync
+        self.warmup_lead = warmup_lead
+        self.warm_connections = warm_connections
+        self.hedge_attempts = hedge_attempts
+        self.hedge_stagger = hedge_stagger
+        self.max_inflight = max_inflight
+        self._inflight = {}  # 账号 -> 在途请求信号量
+        self._inflight_lock = threading.Lock()
+        self._taken = set()  # 监视器报告已被占用的 (区域, 日期, 场地, 时间)
+
+    def observe(self, availability_watcher):
+        """订阅 watcher.AvailabilityWatcher，并监视所有待执行任务的区域/日期"""
+        availability_watcher.subscribe(self._on_availability)
+        for t in task_manager.load_tasks():
+            if is_pending(t):
+                availability_watcher.watch(t.get('item_type', ''), t['area_name'], t['date'],
+                                          release_time_for(t, self.clock.now()))
+
+    def _on_availability(self, key, changes, data):
+        _, area, date = key
+        for c in changes:
+            slot = (area, date, c['venue_name'], c['time'])
+            if c['new'] is not None and (c['new'][0] == "1" or c['new'][1] == "不可预约"):
+                self._taken.add(slot)
+            else:
+                self._taken.discard(slot)
+
+    def next_batch(self, tasks=None):
+        """
+        返回最早一批待执行任务 (release_at, [task, ...])，没有则返回 None
+        日期已过、或错过放行时刻超过 LATE_GRACE 秒的任务标记为过期并打印提示
+        """
+        if tasks is None:
+            tasks = task_manager.load_tasks()
+        now = self.clock.now()
+        today = datetime.date.fromtimestamp(now).strftime("%Y-%m-%d")
+        batches = {}
+        for t in tasks:
+            if not is_pending(t):
+                continue
+            if t['date'] < today:
+                task_manager.update_task(t['id'], status=STATUS_EXPIRED, result="场地日期已过")
+                continue
+            if t.get('created_at') is None and not t.get('release_at'):
+                t['created_at'] = now
+                task_manager.update_task(t['id'], created_at=now)
+            release_at = release_time_for(t, now)
+            if release_at < now - LATE_GRACE:
+                late = datetime.datetime.fromtimestamp(release_at).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"[执行器] 任务 {t['id']} ({t['date']} {t['venue_name']} {t['time']}) "
+                      f"已错过放行时刻 {late}，不再提交")
+                task_manager.update_task(t['id'], status=STATUS_EXPIRED, result=f"错过放行时刻 {late}")
+                continue
+            batches.setdefault(release_at, []).append(t)
+        if not batches:
+            return None
+        release_at = min(batches)
+        return release_at, batches[release_at]
+
+    def inflight_limit(self, account):
+        """账号的在途请求信号量 (每个账号各 max_inflight 个)；account 为手机号、Account 或 None"""
+        if not isinstance(account, accounts.Account):
+            account = accounts.get_account(account)
+        with self._inflight_lock:
+            sem = self._inflight.get(account.name)
+            if sem is None:
+                sem = self._inflight[account.name] = threading.BoundedSemaphore(self.max_inflight)
+            return sem
+
+    def fire_time(self, release_at):
+        """放行时刻 (服务器时钟) 对应的本地发送时刻"""
+        if self.clock_sync is None:
+            return release_at
+        return self.clock_sync.local_send_time(release_at)
+
+    def run_batch(self, release_at, tasks):
+        """执行一批同一时刻放行的任务，返回 {task_id: (success, msg)}"""
+        fire_at = self.fire_time(release_at)
+        wait_until(self.clock, fire_at - self.warmup_lead)
+
+        groups = self._prepare_groups(tasks)
+        self._warm_accounts(groups)
+
+        go = threading.Event()
+        workers = [threading.Thread(target=self._fire, args=(go, g, n))
+                   for g in groups for n in range(len(g.rungs[0].prepared))]
+        for w in workers:
+            w.start()
+
+        wait_until(self.clock, fire_at)
+        go.set()
+        for w in workers:
+            w.join()
+
+        results = {}
+        for g in groups:
+            success, msg, fired_at, latency, rung = g.outcome()
+            attempts = g.attempts
+            sent = sum(1 for a in attempts if not a.get('cancelled'))
+            fields = {}
+            if success and rung.index:
+                fields['booked_slot'] = [rung.slot['venue_name'], rung.slot['time']]
+            for t in g.tasks:
+                results[t['id']] = (success, msg)
+                task_manager.update_task(
+                    t['id'],
+                    status=STATUS_SUCCESS if success else STATUS_FAILED,
+                    result=msg,
+                    fired_at=fired_at,
+                    latency=round(latency, 4),
+                    rung=rung.index,
+                    attempts=attempts,
+                    **fields,
+                )
+                where = f"{rung.slot['venue_name']} {rung.slot['time']}"
+                ladder = f", 第 {rung.index + 1}/{len(g.rungs)} 候补" if len(g.rungs) > 1 else ""
+                who = f" [{g.account}]" if g.account else ""
+                print(f"[执行器]{who} {t['date']} {where}: "
+                      f"{'成功' if success else '失败'} {msg} ({latency * 1000:.0f}ms, "
+                      f"发出 {sent} 份{ladder})")
+        return results
+
+    def _warm_accounts(self, groups):
+        """每个账号的连接池各自预热 (账号之间并行)"""
+        per_account = {}
+        for g in groups:
+            per_account[g.account] = per_account.get(g.account, 0) + len(g.rungs[0].prepared)
+        threads = [threading.Thread(target=api_handler.warm_connections,
+                                    args=(max(self.warm_connections, min(total, self.max_inflight)), account))
+                   for account, total in per_account.items()]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def _prepare_groups(self, tasks):
+        """
+        按场地时段分组，为候补阶梯的每一级、每一份对冲都提前构造好请求
+        (同一 PreparedRequest 不在多个线程间共用)
+        """
+        by_key = {}
+        for t in tasks:
+            by_key.setdefault(hedge_key(t), []).append(t)
+        groups = []
+        for group_tasks in by_key.values():
+            count = max(1, max(t.get('hedge_attempts', self.hedge_attempts) for t in group_tasks))
+            head = group_tasks[0]
+            slots = task_manager.ladder_slots(head)
+            # 监视器已确认被占用的候补直接跳过 (全部被占时仍按原顺序尝试)
+            open_slots = [sl for sl in slots
+                          if (head['area_name'], head['date'], sl['venue_name'], sl['time']) not in self._taken]
+            rungs = []
+            for i, slot in enumerate(open_slots or slots):
+                rung_task = dict(head, venue_name=slot['venue_name'], time=slot['time'],
+                                 data={'TicketTypeNo': slot['TicketTypeNo'], 'TicketLevelNo': slot['TicketLevelNo']})
+                rungs.append(_Rung(i, slot, [api_handler.prepare_booking(rung_task) for _ in range(count)]))
+            groups.append(_HedgeGroup(group_tasks, rungs))
+        return groups
+
+    def _fire(self, go, group, n):
+        """第 n 份对冲: 逐级尝试，当前一级有结论后成功即停，失败则直接用下一级已构造好的请求"""
+        inflight = self.inflight_limit(group.account)
+        go.wait()
+        for rung in group.rungs:
+            self._attempt(rung, n, inflight)
+            rung.settled.wait()
+            if rung.done.is_set():
+                return
+
+    def _attempt(self, rung, n, inflight):
+        # 第 n 份错开 n 个间隔；等待期间已有一份成功则不再发出
+        if n and rung.done.wait(n * self.hedge_stagger):
+            rung.record(n, cancelled=True)
+            return
+        with inflight:
+            if rung.done.is_set():
+                rung.record(n, cancelled=True)
+                return
+            sent_at = self.clock.now()
+            start = time.perf_counter()
+            success, msg = api_handler.send_booking(rung.prepared[n])
+            latency = time.perf_counter() - start
+        rung.record(n, sent_at=sent_at, latency=round(latency, 4), success=success, msg=msg)
+
+    def run_once(self):
+        """执行最早的一批任务 (会等待到放行时刻)，没有待执行任务返回 None"""
+        batch = self.next_batch()
+        if batch is None:
+            return None
+        return self.run_batch(*batch)
+
+    def run_forever(self, stop_event=None, idle_interval=IDLE_INTERVAL, on_error=None):
+        """
+        持续调度: 距离下一批放行较远时每 idle_interval 秒重新读取任务库，
+        以便发现新添加或已取消的任务
+        某一批出错时调用 on_error(exc) (默认打印)，隔 ERROR_RETRY_INTERVAL 秒后继续调度，不会退出；
+        仍未执行的任务在错过放行时刻 LATE_GRACE 秒后按过期处理
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                batch = self.next_batch()
+                if batch is None:
+                    stop_event.wait(idle_interval)
+                    continue
+                release_at, tasks = batch
+                lead = self.fire_time(release_at) - self.warmup_lead - self.clock.now()
+                if lead > idle_interval:
+                    stop_event.wait(idle_interval)
+                    continue
+                self.run_batch(release_at, tasks)
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e)
+                else:
+                    print(f"[执行器] 调度出错: {e!r}")
+                stop_event.wait(ERROR_RETRY_INTERVAL)
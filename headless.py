@@ -0,0 +1,240 @@
+"""
+无界面运行: 不打开 Tk 窗口，直接执行任务库里的自动抢票任务
+复用 api_handler / task_manager / executor，从 Cookie 存储恢复登录状态，
+结果以 JSON 行的形式输出，便于长时间 (数天) 无人值守运行。
+不导入 tkinter / PIL，启动很快。
+
+运行:
+    python -m headless                 # 常驻，按放号时刻依次执行
+    python -m headless --once          # 只执行最近的一批任务后退出
+    python -m headless --log run.log   # 日志追加写入文件 (默认输出到标准输出)
+    python -m headless --metrics /var/lib/node_exporter/yyticket.prom   # 定期导出接口指标
+    python -m headless --add-account 13800000000   # 登录一个新账号 (从标准输入读取验证码)
+    python -m headless --trace trace.json          # 记录网络请求与解析的追踪，退出时导出
+
+任务带 account 字段时用对应账号下单；启动时验证所有待执行任务用到的账号。
+常驻运行时后台监视待执行任务的区域/日期，已被别人订走的首选场地直接跳到候补。
+"""
+import argparse
+import datetime
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+import accounts
+import api_handler
+import clock_sync
+import executor
+import http_client
+import metrics
+import task_manager
+import tracing
+import watcher
+
+# --- 配置 ---
+HEARTBEAT_INTERVAL = 600        # 秒，多久输出一次心跳 (待执行任务数、内存、连接池)
+SESSION_CHECK_INTERVAL = 3600   # 秒，多久重新验证一次登录状态
+
+EXIT_NO_SESSION = 2
+
+
+class JsonLog:
+    """每条日志一行 JSON: {"ts": ..., "event": ..., ...}"""
+
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._owned = bool(path)
+        self._file = open(path, 'a', encoding='utf-8') if path else sys.stdout
+
+    def __call__(self, event, **fields):
+        record = {"ts": datetime.datetime.now().isoformat(timespec='milliseconds'), "event": event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+
+
+def _rss_mb():
+    """当前常驻内存 (MB)，读不到时返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def _pending_count():
+    return sum(1 for t in task_manager.load_tasks() if executor.is_pending(t))
+
+
+def _task_accounts():
+    """待执行任务用到的账号 (默认账号为 None)；没有任务时只看默认账号"""
+    names = {t.get('account') for t in task_manager.load_tasks() if executor.is_pending(t)}
+    return sorted(names, key=lambda n: n or '') or [None]
+
+
+def restore_session(log):
+    """
+    从 Cookie 存储恢复各账号的登录状态 (无界面下无法收验证码重新登录)
+    失效的账号记录日志，其任务会执行失败；所有账号都无法恢复时返回 False
+    """
+    ok = 0
+    for name in _task_accounts():
+        account = accounts.get_account(name)
+        phone = account.phone
+        if not phone:
+            log("session_missing", account=name, msg="没有保存的登录信息，请先登录一次")
+            continue
+        if not api_handler.validate_session(account):
+            log("session_invalid", account=name, phone=phone, msg="登录已失效，请重新登录")
+            continue
+        log("session_ok", account=name, phone=phone)
+        ok += 1
+    return ok > 0
+
+
+def add_account(phone, log):
+    """交互登录一个账号: 发送验证码，从标准输入读取后校验，Cookie 存入该账号自己的文件"""
+    account = accounts.get_account(phone)
+    success, msg = api_handler.send_sms_code(phone, account=account)
+    if not success:
+        log("login_failed", account=phone, msg=msg)
+        return False
+    code = input(f"请输入发送到 {phone} 的验证码: ").strip()
+    success, msg = api_handler.check_login(phone, code, account=account)
+    if not success:
+        log("login_failed", account=phone, msg=msg)
+        return False
+    api_handler.save_user_phone(phone, account=account)
+    log("login_ok", account=phone)
+    return True
+
+
+def _on_task_changed(log):
+    """把执行器写回任务库的结果转成结构化日志"""
+    def callback(event, payload):
+        if event != 'updated':
+            return
+        task_id, fields = payload
+        if 'status' not in fields:
+            return
+        attempts = fields.get('attempts') or ()
+        log("task_result", task_id=task_id, status=fields['status'], result=fields.get('result'),
+            fired_at=fields.get('fired_at'), latency=fields.get('latency'), rung=fields.get('rung'),
+            booked_slot=fields.get('booked_slot'),
+            sent=sum(1 for a in attempts if not a.get('cancelled')))
+    return callback
+
+
+def _export_metrics(path):
+    """按扩展名导出接口指标: .json 为 JSON 快照，其他为 Prometheus 文本格式"""
+    if not path:
+        return
+    try:
+        if path.endswith('.json'):
+            metrics.write_json(path)
+        else:
+            metrics.write_prometheus(path)
+    except OSError as e:
+        print(f"导出指标失败: {e}")
+
+
+def _background(log, stop_event, sync, metrics_path=None):
+    """心跳、导出指标与定期验证登录状态"""
+    last_check = time.monotonic()
+    while not stop_event.wait(HEARTBEAT_INTERVAL):
+        _export_metrics(metrics_path)
+        fields = {"pending": _pending_count(), "rss_mb": _rss_mb(), "pool": http_client.get_stats()}
+        est = sync.current if sync else None
+        if est:
+            fields.update(offset=round(est['offset'], 4), rtt_p50=round(est['rtt_p50'], 4))
+        log("heartbeat", **fields)
+        if time.monotonic() - last_check >= SESSION_CHECK_INTERVAL:
+            last_check = time.monotonic()
+            for name in _task_accounts():
+                if not api_handler.validate_session(name):
+                    log("session_invalid", account=name, msg="登录已失效，后续任务会失败，请重新登录")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m headless', description="无界面执行自动抢票任务")
+    parser.add_argument('--once', action='store_true', help="只执行最近的一批任务后退出")
+    parser.add_argument('--log', help="日志文件路径 (JSON 行，追加写入)；默认输出到标准输出")
+    parser.add_argument('--no-clock-sync', action='store_true', help="不估计服务器时钟偏差，按本地时钟放行")
+    parser.add_argument('--add-account', metavar='PHONE', help="登录一个账号 (从标准输入读取验证码) 后退出")
+    parser.add_argument('--metrics', help="接口指标导出文件，随心跳与退出时更新 (.json 为 JSON，否则为 Prometheus 文本)")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="退出时导出 Chrome trace-event 格式的追踪 (或设置环境变量 YYTICKET_TRACE_FILE)")
+    args = parser.parse_args(argv)
+    tracing.export_on_exit(args.trace)
+
+    log = JsonLog(args.log)
+    # 各模块原有的 print 改走标准错误，标准输出只保留 JSON 日志
+    sys.stdout = sys.stderr
+    if args.add_account:
+        ok = add_account(args.add_account, log)
+        log.close()
+        return 0 if ok else EXIT_NO_SESSION
+    started = time.perf_counter()
+    log("start", pid=os.getpid(), pending=_pending_count())
+
+    if not restore_session(log):
+        log.close()
+        return EXIT_NO_SESSION
+
+    sync = None
+    if not args.no_clock_sync:
+        sync = clock_sync.ClockSync()
+        est = sync.measure()
+        if est:
+            log("clock_sync", offset=round(est['offset'], 4), lower=round(est['lower'], 4),
+                upper=round(est['upper'], 4), rtt_min=round(est['rtt_min'], 4), rtt_p90=round(est['rtt_p90'], 4))
+        sync.start()
+
+    listener = _on_task_changed(log)
+    task_manager.add_listener(listener)
+    runner = executor.BookingExecutor(clock_sync=sync)
+    log("ready", startup_ms=round((time.perf_counter() - started) * 1000, 1))
+
+    stop_event = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop_event.set())
+
+    try:
+        if args.once:
+            results = runner.run_once()
+            if results is None:
+                log("idle", msg="没有待执行的任务")
+        else:
+            threading.Thread(target=_background, args=(log, stop_event, sync, args.metrics), daemon=True).start()
+            runner.observe(watcher.get_watcher())
+            # 主线程只等待信号；调度放在后台线程，便于 Ctrl+C / SIGTERM 及时退出
+            # 单批出错只记日志，调度继续，不让一次异常结束整个服务
+            on_error = lambda e: log("batch_error", error=type(e).__name__, msg=str(e))
+            worker = threading.Thread(target=runner.run_forever, args=(stop_event,),
+                                      kwargs={"on_error": on_error}, daemon=True)
+            worker.start()
+            while worker.is_alive() and not stop_event.wait(1):
+                pass
+    finally:
+        stop_event.set()
+        task_manager.remove_listener(listener)
+        if sync:
+            sync.stop()
+        _export_metrics(args.metrics)
+        log("stop", pool=http_client.get_stats(), metrics=metrics.snapshot()['endpoints'])
+        log.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
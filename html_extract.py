@@ -0,0 +1,248 @@
+"""
+页面定点提取
+只取出代码真正需要的节点，不再为整页构建 BeautifulSoup 树:
+- particulars 页面: div.dataCont / div.dataCont123 下 span 的 data-day
+- 主页: div.menuCont 下每个 <a> 的 href、第一个 <p> 的文字、第一个 <img> 的 src
+
+默认使用流式解析 (标准库 html.parser，读完目标节点即停止，实测比整页解析的 lxml 更快)，
+也可切换到 lxml (已安装时)；快速后端出错时回退到 BeautifulSoup，输出与原实现一致。
+"""
+import importlib.util
+from html.parser import HTMLParser
+
+# bs4 / lxml 导入较慢，只在真正用到对应后端时才导入
+HAS_LXML = importlib.util.find_spec('lxml') is not None
+
+BACKEND = 'stream'  # 'stream' | 'lxml' | 'bs4'
+
+
+# --- 流式解析 ---
+class _StopParsing(Exception):
+    pass
+
+
+def _has_class(attrs, name):
+    for key, value in attrs:
+        if key == 'class' and value and name in value.split():
+            return True
+    return False
+
+
+class _SpanDataDayParser(HTMLParser):
+    """收集若干个 div 容器内所有 span 的 data-day，全部容器结束后立即停止"""
+
+    def __init__(self, class_names):
+        super().__init__()
+        self.results = {name: [] for name in class_names}
+        self._pending = set(class_names)
+        self._current = None   # 正在读取的容器 class
+        self._depth = 0        # 容器内 div 嵌套深度
+
+    def handle_starttag(self, tag, attrs):
+        if self._current is None:
+            if tag == 'div':
+                for name in self._pending:
+                    if _has_class(attrs, name):
+                        self._current = name
+                        self._depth = 1
+                        break
+            return
+        if tag == 'div':
+            self._depth += 1
+        elif tag == 'span':
+            for key, value in attrs:
+                if key == 'data-day':
+                    if value:
+                        self.results[self._current].append(value)
+                    break
+
+    def handle_endtag(self, tag):
+        if self._current is not None and tag == 'div':
+            self._depth -= 1
+            if self._depth == 0:
+                self._pending.discard(self._current)
+                self._current = None
+                if not self._pending:
+                    raise _StopParsing()
+
+
+class _MenuParser(HTMLParser):
+    """读取 div.menuCont 下的链接，容器结束后立即停止"""
+
+    def __init__(self):
+        super().__init__()
+        self.items = []
+        self._depth = 0      # menuCont 内 div 嵌套深度，0 表示不在容器内
+        self._item = None    # 当前 <a>
+        self._img_seen = False
+        self._p_depth = 0    # 当前 <a> 的第一个 <p> 嵌套深度
+        self._p_text = None
+
+    def handle_starttag(self, tag, attrs):
+        if self._depth == 0:
+            if tag == 'div' and _has_class(attrs, 'menuCont'):
+                self._depth = 1
+            return
+        if tag == 'div':
+            self._depth += 1
+        elif tag == 'a' and self._item is None:
+            self._item = {"name": None, "img_url": None, "href": dict(attrs).get('href')}
+            self._img_seen = False
+            self._p_text = None
+        elif self._item is not None:
+            if tag == 'p':
+                if self._p_depth:
+                    self._p_depth += 1
+                elif self._p_text is None:
+                    self._p_depth = 1
+                    self._p_text = []
+            elif tag == 'img' and not self._img_seen:
+                self._img_seen = True
+                self._item["img_url"] = dict(attrs).get('src')
+
+    def handle_data(self, data):
+        if self._p_depth:
+            self._p_text.append(data)
+
+    def handle_endtag(self, tag):
+        if self._depth == 0:
+            return
+        if tag == 'p' and self._p_depth:
+            self._p_depth -= 1
+        elif tag == 'a' and self._item is not None:
+            self._finish_item()
+        elif tag == 'div':
+            self._depth -= 1
+            if self._depth == 0:
+                if self._item is not None:
+                    self._finish_item()
+                raise _StopParsing()
+
+    def _finish_item(self):
+        item = self._item
+        item["name"] = ''.join(self._p_text).strip() if self._p_text is not None else "未知项目"
+        self.items.append(item)
+        self._item = None
+        self._p_depth = 0
+        self._p_text = None
+
+
+def _feed(parser, html):
+    try:
+        parser.feed(html)
+        parser.close()
+    except _StopParsing:
+        pass
+    return parser
+
+
+def _booking_options_stream(html):
+    parser = _feed(_SpanDataDayParser(('dataCont', 'dataCont123')), html)
+    return parser.results['dataCont'], parser.results['dataCont123']
+
+
+def _menu_items_stream(html):
+    return _feed(_MenuParser(), html).items
+
+
+# --- lxml ---
+def _class_xpath(name):
+    return f"//div[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')][1]"
+
+
+def _lxml_document(html):
+    import lxml.html
+    return lxml.html.fromstring(html)
+
+
+def _booking_options_lxml(html):
+    doc = _lxml_document(html)
+    results = []
+    for name in ('dataCont', 'dataCont123'):
+        found = doc.xpath(_class_xpath(name))
+        results.append([v for v in found[0].xpath('.//span/@data-day') if v] if found else [])
+    return results[0], results[1]
+
+
+def _menu_items_lxml(html):
+    doc = _lxml_document(html)
+    found = doc.xpath(_class_xpath('menuCont'))
+    items = []
+    if not found:
+        return items
+    for link in found[0].iter('a'):
+        p = link.find('.//p')
+        img = link.find('.//img')
+        items.append({
+            "name": p.text_content().strip() if p is not None else "未知项目",
+            "img_url": img.get('src') if img is not None else None,
+            "href": link.get('href'),
+        })
+    return items
+
+
+# --- BeautifulSoup (原实现，作为回退) ---
+def _soup(html):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'html.parser')
+
+
+def _booking_options_bs4(html):
+    soup = _soup(html)
+    results = []
+    for name in ('dataCont', 'dataCont123'):
+        values = []
+        cont = soup.find('div', class_=name)
+        if cont:
+            for span in cont.find_all('span'):
+                value = span.get('data-day')
+                if value:
+                    values.append(value)
+        results.append(values)
+    return results[0], results[1]
+
+
+def _menu_items_bs4(html):
+    soup = _soup(html)
+    menu_cont = soup.find('div', class_='menuCont')
+    items = []
+    if menu_cont:
+        for link in menu_cont.find_all('a'):
+            img_tag = link.find('img')
+            items.append({
+                "name": link.find('p').text.strip() if link.find('p') else "未知项目",
+                "img_url": img_tag.get('src') if img_tag else None,
+                "href": link.get('href'),
+            })
+    return items
+
+
+_BACKENDS = {
+    'lxml': (_booking_options_lxml, _menu_items_lxml),
+    'stream': (_booking_options_stream, _menu_items_stream),
+    'bs4': (_booking_options_bs4, _menu_items_bs4),
+}
+
+
+def _extract(kind, html, backend):
+    backend = backend or BACKEND
+    if backend == 'lxml' and not HAS_LXML:
+        backend = 'stream'
+    func = _BACKENDS[backend][kind]
+    if backend == 'bs4':
+        return func(html)
+    try:
+        return func(html)
+    except Exception as e:
+        print(f"快速解析失败 ({backend})，回退到 BeautifulSoup: {e}")
+        return _BACKENDS['bs4'][kind](html)
+
+
+def extract_booking_options(html, backend=None):
+    """返回 (dates, areas)，均为 data-day 字符串列表"""
+    return _extract(0, html, backend)
+
+
+def extract_menu_items(html, backend=None):
+    """返回 [{"name", "img_url", "href"}, ...]，顺序与页面一致"""
+    return _extract(1, html, backend)
@@ -0,0 +1,172 @@
+"""
+共享 HTTP 客户端
+进程内只维护一个长连接的 requests.Session，所有接口复用同一个有上限的连接池，
+避免每次请求都重新握手。Cookie 不由这里保存，由调用方在每次请求时显式传入。
+"""
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.poolmanager import PoolManager
+
+# --- 配置 ---
+POOL_CONNECTIONS = 4   # 最多缓存几个主机的连接池
+POOL_MAXSIZE = 16      # 每个主机最多保持的连接数 (单主机并发上限)
+POOL_BLOCK = True      # 连接用尽时排队等待，而不是临时再开新连接
+DEFAULT_TIMEOUT = 10
+
+
+class PoolStats:
+    """连接池计数器 (线程安全)"""
+    FIELDS = ('requests', 'pool_hits', 'pool_misses', 'connections_opened', 'pools_created')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+
+# --- urllib3 计数扩展 ---
+class _CountingConnectionMixin:
+    _stats = None
+
+    def connect(self):
+        super().connect()
+        if self._stats is not None:
+            self._stats.incr('connections_opened')
+
+
+class _CountingHTTPConnection(_CountingConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CountingHTTPSConnection(_CountingConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CountingPoolMixin:
+    _stats = None
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn._stats = self._stats
+        return conn
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        if self._stats is not None:
+            # 取出的连接仍持有 socket，说明复用了空闲的长连接
+            self._stats.incr('pool_hits' if conn.sock is not None else 'pool_misses')
+        return conn
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class _CountingPoolManager(PoolManager):
+    def __init__(self, stats, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats = stats
+        self.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool._stats = self._stats
+        self._stats.incr('pools_created')
+        return pool
+
+
+class _CountingAdapter(HTTPAdapter):
+    def __init__(self, stats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=POOL_BLOCK, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _CountingPoolManager(
+            self._stats, num_pools=connections, maxsize=maxsize, block=block, **pool_kwargs
+        )
+
+
+class _RejectAllCookies(DefaultCookiePolicy):
+    """Session 自身不保存 Cookie，避免多线程共用时互相串号"""
+    def set_ok(self, cookie, request):
+        return False
+
+
+class HttpClient:
+    """线程安全的长连接客户端，内部共享一个有上限的连接池"""
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK):
+        self.stats = PoolStats()
+        self.session = requests.Session()
+        self.session.cookies.set_policy(_RejectAllCookies())
+
+        adapter = _CountingAdapter(self.stats, pool_connections=pool_connections,
+                                   pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, headers=None, cookies=None, timeout=DEFAULT_TIMEOUT, stream=False):
+        self.stats.incr('requests')
+        return self.session.get(url, headers=headers, cookies=cookies, timeout=timeout, stream=stream)
+
+    def prepare(self, url, headers=None, cookies=None, method='GET'):
+        """提前构造好请求 (URL 编码、Header、Cookie)，之后用 send() 直接发送"""
+        request = requests.Request(method, url, headers=headers, cookies=cookies)
+        prepared = self.session.prepare_request(request)
+        # 与 session.get 相同的环境设置 (代理、证书)，这样才会命中同一个连接池
+        prepared.send_kwargs = self.session.merge_environment_settings(prepared.url, {}, None, None, None)
+        return prepared
+
+    def send(self, prepared, timeout=DEFAULT_TIMEOUT):
+        self.stats.incr('requests')
+        return self.session.send(prepared, timeout=timeout, **getattr(prepared, 'send_kwargs', {}))
+
+    def get_stats(self):
+        return self.stats.snapshot()
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    """获取进程内共享的默认客户端 (首次调用时创建)"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def get_stats():
+    """读取默认客户端的连接池计数: 命中 / 未命中 / 新建连接数"""
+    return get_client().get_stats()
@@ -0,0 +1,137 @@
+"""
+主页项目图标的磁盘缓存
+- 原图按内容 sha256 存放在 objects/ 下，缩略图 (默认 50x50 PNG) 存放在 thumbs/ 下
+- index.json 记录 图片URL -> 内容哈希，热启动时不发任何图片请求
+- 未命中的图片并发下载，缩放在后台线程完成，主线程只需直接加载 PNG
+"""
+import asyncio
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+# --- 配置 ---
+CACHE_DIR = 'image_cache'
+THUMB_SIZE = (50, 50)
+REFRESH_AGE = 7 * 24 * 3600  # 秒，超过这个时间的图标重新下载一次
+
+
+class ImageCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.thumbs_dir = os.path.join(cache_dir, 'thumbs')
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self._lock = threading.Lock()
+        self._index = None
+
+    def _load_index(self):
+        """调用方需持有 _lock"""
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.index_path):
+                try:
+                    with open(self.index_path, 'r', encoding='utf-8') as f:
+                        self._index = json.load(f)
+                except Exception as e:
+                    print(f"加载图片索引失败: {e}")
+        return self._index
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _thumb_path(self, digest, size):
+        return os.path.join(self.thumbs_dir, f"{digest}_{size[0]}x{size[1]}.png")
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get_thumbnails(self, urls, size=THUMB_SIZE):
+        """
+        返回 {url: 缩略图 PNG 字节 或 None}
+        只对缓存中没有的图片发起请求，且并发下载
+        """
+        result = {}
+        misses = []
+        stale = {}  # 到期需要重新下载的旧条目，下载失败时仍可使用
+        now = time.time()
+        with self._lock:
+            index = self._load_index()
+            entries = {url: index.get(url) for url in urls}
+
+        for url, entry in entries.items():
+            if entry and now - entry.get('fetched_at', 0) < REFRESH_AGE:
+                thumb = self._read(self._thumb_path(entry['hash'], size))
+                if thumb is None:
+                    # 有原图没有该尺寸的缩略图，本地重新生成即可
+                    raw = self._read(os.path.join(self.objects_dir, entry['hash']))
+                    if raw is not None:
+                        thumb = self._store_thumb(entry['hash'], raw, size)
+                if thumb is not None:
+                    result[url] = thumb
+                    continue
+            misses.append(url)
+            if entry:
+                stale[url] = entry
+
+        if misses:
+            fetched = _fetch_all(misses)
+            with self._lock:
+                index = self._load_index()
+                for url, raw in zip(misses, fetched):
+                    if not raw:
+                        old = stale.get(url)
+                        result[url] = self._read(self._thumb_path(old['hash'], size)) if old else None
+                        continue
+                    digest = hashlib.sha256(raw).hexdigest()
+                    self._write_atomic(os.path.join(self.objects_dir, digest), raw)
+                    result[url] = self._store_thumb(digest, raw, size)
+                    index[url] = {'hash': digest, 'fetched_at': now}
+                try:
+                    self._write_atomic(self.index_path, json.dumps(index, ensure_ascii=False).encode('utf-8'))
+                except Exception as e:
+                    print(f"保存图片索引失败: {e}")
+        return result
+
+    def _store_thumb(self, digest, raw, size):
+        """缩放并保存缩略图，失败返回 None"""
+        from PIL import Image  # 只有未命中缓存时才需要缩放，热启动不导入 PIL
+        try:
+            img = Image.open(io.BytesIO(raw))
+            if img.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+                img = img.convert('RGBA')
+            img = img.resize(size, Image.Resampling.LANCZOS)
+            buf = io.BytesIO()
+            img.save(buf, format='PNG')
+            thumb = buf.getvalue()
+        except Exception as e:
+            print(f"生成缩略图失败: {e}")
+            return None
+        self._write_atomic(self._thumb_path(digest, size), thumb)
+        return thumb
+
+
+def _fetch_all(urls):
+    """并发下载多张图片，按输入顺序返回字节 (失败为 None)"""
+    import async_api  # aiohttp 导入较慢，只在有图片需要下载时导入
+
+    async def fetch_all():
+        return await asyncio.gather(*(async_api.fetch_image_bytes(u) for u in urls))
+    return async_api.run(fetch_all())
+
+
+_cache = ImageCache()
+
+
+def get_thumbnails(urls, size=THUMB_SIZE):
+    return _cache.get_thumbnails(urls, size)
@@ -1,22 +1,121 @@
+import time
+_STARTUP_T0 = time.perf_counter()
+
+import argparse
+import atexit
+import importlib
 import json
+import sys
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
-from PIL import Image, ImageTk
-from bs4 import BeautifulSoup
-import io
 import re
 import threading
 import functools
 from urllib.parse import urlparse, parse_qs
 import os
+import hashlib
+import weakref
+
+# --- 命令行 ---
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog='main.py', description="场馆预订与自动抢票")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="输出启动耗时报告 (或设置环境变量 STARTUP_REPORT=1)")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="记录打开项目等流程，退出时导出为 Chrome trace-event 格式 (或设置环境变量 YYTICKET_TRACE_FILE)")
+    return parser.parse_known_args(argv)[0]
+
+
+ARGS = _parse_args(sys.argv[1:])
+
+# --- 启动耗时 ---
+STARTUP_REPORT = ARGS.startup_report or bool(os.environ.get('STARTUP_REPORT'))
+
+
+class StartupTimer:
+    """记录启动过程中各模块的导入耗时与关键时刻 (相对进程内计时起点)"""
+
+    def __init__(self, t0, enabled):
+        self.t0 = t0
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.imports = {}   # 模块名 -> (耗时, 导入所在线程)
+        self.marks = {}     # 事件 -> 距起点的秒数
+        self._reported = False
+
+    def record_import(self, name, seconds):
+        with self._lock:
+            self.imports.setdefault(name, (seconds, threading.current_thread().name))
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.setdefault(name, time.perf_counter() - self.t0)
+
+    def report(self):
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        print("===== 启动耗时 =====")
+        for name, (seconds, thread) in sorted(self.imports.items(), key=lambda x: -x[1][0]):
+            print(f"  导入 {name:<14} {seconds * 1000:>8.1f} ms  ({thread})")
+        for name, seconds in sorted(self.marks.items(), key=lambda x: x[1]):
+            print(f"  {name:<19} {seconds * 1000:>8.1f} ms")
+
+
+startup = StartupTimer(_STARTUP_T0, STARTUP_REPORT)
+
+# --- 追踪 ---
+TRACE_FILE = ARGS.trace or os.environ.get('YYTICKET_TRACE_FILE')
+
+
+class _LazyModule:
+    """
+    首次访问属性时才导入的模块 (requests / bs4 / PIL / aiohttp 等较重的依赖随之推迟)
+    多个线程同时首次访问时由导入锁保证只导入一次
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            startup.record_import(self._name, time.perf_counter() - start)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
 
 # --- 自定义模块引用 ---
-import api_handler
-import task_manager
+# 只依赖 tkinter 的界面模块和只用标准库的 tracing 直接导入；其余在首次使用时导入 (登录窗口先画出来)
+import task_list
+import tracing
+import venue_grid
+
+accounts = _LazyModule('accounts')
+api_handler = _LazyModule('api_handler')
+html_extract = _LazyModule('html_extract')
+image_cache = _LazyModule('image_cache')
+options_cache = _LazyModule('options_cache')
+prefetch = _LazyModule('prefetch')
+task_manager = _LazyModule('task_manager')
+venue_cache = _LazyModule('venue_cache')
+watcher = _LazyModule('watcher')
+
+# 登录窗口画出后在后台线程预先导入，用户点击时已经就绪 (按需要的先后排列)
+PRELOAD_MODULES = (api_handler, task_manager, html_extract, image_cache, venue_cache,
+                   options_cache, prefetch, watcher)
 
 # --- 全局变量 ---
-image_references = [] 
+# 图标 PhotoImage (缩略图内容哈希 -> PhotoImage)，只做复用不持有引用:
+# 引用由显示它的按钮持有 (btn.image)，按钮销毁后图片随之释放
+image_references = weakref.WeakValueDictionary()
 
 # --- 数据传递类 ---
 class ItemInfo:
@@ -42,9 +141,10 @@ class VenueSelectionWindow(tk.Toplevel):
         self.all_areas = all_areas
         self.all_dates = all_dates
         self.venue_data = initial_data
+        self._pending = None  # 正在等待网络返回的 (area, date)
         
         self.selected_items = []
-        self.buttons = {} 
+        self.grid_view = None
 
         self.title(f"{item_info.name} - 抢票任务设置")
         self.geometry("1200x800")
@@ -64,7 +164,14 @@ class VenueSelectionWindow(tk.Toplevel):
         self.times = self._get_all_times()
         self.venues = [v['name'] for v in self.venue_data]
 
-        self._setup_ui()
+        with tracing.span("setup_ui", "ui"):
+            self._setup_ui()
+
+        # 后台监视当前区域/日期，余量有变化时只重绘变化的格子
+        self._watcher = watcher.get_watcher()
+        self._watch_key = self._watcher.watch(self.item_info.item_type, self.current_area, self.current_date,
+                                              data=self.venue_data)
+        self._watcher.subscribe(self._on_availability)
         
         self.bind_all("<MouseWheel>", self._on_mousewheel)
         self.bind_all("<Button-4>", self._on_mousewheel)
@@ -72,20 +179,21 @@ class VenueSelectionWindow(tk.Toplevel):
         self.protocol("WM_DELETE_WINDOW", self._on_close)
 
     def _on_close(self):
+        self._watcher.unsubscribe(self._on_availability)
+        self._watcher.unwatch(self._watch_key)
         self.unbind_all("<MouseWheel>")
         self.unbind_all("<Button-4>")
         self.unbind_all("<Button-5>")
         self.destroy()
-        if hasattr(self.parent_root, 'refresh_task_list'):
-            self.parent_root.refresh_task_list()
+        # 新增的任务已经通过 task_manager 的通知增量加入列表，这里不再整表刷新
         self.parent_root.deiconify()
 
     def _on_mousewheel(self, event):
-        if hasattr(self, 'canvas'):
+        if self.grid_view is not None:
             if event.num == 5 or event.delta < 0:
-                self.canvas.yview_scroll(1, "units")
+                self.grid_view.yview_scroll(1, "units")
             elif event.num == 4 or event.delta > 0:
-                self.canvas.yview_scroll(-1, "units")
+                self.grid_view.yview_scroll(-1, "units")
 
     def _get_all_times(self):
         times = []
@@ -131,6 +239,20 @@ class VenueSelectionWindow(tk.Toplevel):
                                font=("微软雅黑", 12, "bold"), command=self._on_submit_task, padx=20, pady=5)
         btn_submit.pack(side="right", padx=20)
 
+        btn_ladder = tk.Button(bottom_frame, text="按点选顺序设为候补", bg="#4682B4", fg="white",
+                               font=("微软雅黑", 12, "bold"), command=self._on_submit_ladder, padx=20, pady=5)
+        btn_ladder.pack(side="right", padx=5)
+
+        # 保存了其他账号时，可选择这次的任务用哪个账号下单
+        self.account_combo = None
+        other_accounts = [a for a in accounts.list_accounts() if a != api_handler.get_current_user()]
+        if other_accounts:
+            self.account_combo = ttk.Combobox(bottom_frame, values=["当前账号"] + other_accounts,
+                                              state="readonly", width=14)
+            self.account_combo.set("当前账号")
+            self.account_combo.pack(side="right", padx=(0, 15))
+            tk.Label(bottom_frame, text="下单账号:", font=("微软雅黑", 10), bg="#eee").pack(side="right")
+
         self.grid_container = tk.Frame(self)
         self.grid_container.pack(fill="both", expand=True, padx=10, pady=5)
         self._draw_grid()
@@ -146,6 +268,17 @@ class VenueSelectionWindow(tk.Toplevel):
         new_area = self.area_combo.get()
         if new_date == self.current_date and new_area == self.current_area: return
 
+        # 预取/缓存命中时直接本地切换；过期数据会先展示，后台刷新后再重绘
+        on_refresh = functools.partial(self._on_cache_refresh, new_area, new_date)
+        cached = venue_cache.peek(self.item_info.item_type, new_area, new_date, on_refresh)
+        if cached is not None:
+            self.selected_items = []
+            self._update_footer_info()
+            self._pending = (new_area, new_date)
+            self._finish_reload(True, cached, new_area, new_date)
+            return
+
+        self._pending = (new_area, new_date)
         self.date_combo.config(state="disabled")
         self.area_combo.config(state="disabled")
         self.loading_label.pack(side="left", padx=10)
@@ -153,11 +286,37 @@ class VenueSelectionWindow(tk.Toplevel):
         self._update_footer_info()
         threading.Thread(target=self._thread_reload_data, args=(new_area, new_date)).start()
 
+    def add_prefetched(self, area, date, cell):
+        """后台预取的单元陆续到达 (主线程调用)：如果正好在等这一格，直接用上"""
+        if self._pending == (area, date) and cell["success"]:
+            self._finish_reload(True, cell["result"], area, date)
+
+    def _on_cache_refresh(self, area, date, data):
+        """缓存后台刷新完成 (刷新线程调用)，若仍在显示这一格则重绘"""
+        def apply():
+            if self.winfo_exists() and (area, date) == (self.current_area, self.current_date):
+                self.venue_data = data
+                self.venues = [v['name'] for v in self.venue_data]
+                self._draw_grid()
+        self.after(0, apply)
+
+    def _on_availability(self, key, changes, data):
+        """监视器发现余量变化 (监视线程调用)，若仍在显示这一格则增量重绘"""
+        def apply():
+            if self.winfo_exists() and key == self._watch_key:
+                self.venue_data = data
+                self.venues = [v['name'] for v in self.venue_data]
+                self._draw_grid()
+        self.after(0, apply)
+
     def _thread_reload_data(self, area, date):
-        success, result = api_handler.get_venue_data(self.item_info.item_type, area, date)
+        success, result = venue_cache.get_venue_data(self.item_info.item_type, area, date)
         self.after(0, lambda: self._finish_reload(success, result, area, date))
 
     def _finish_reload(self, success, result, area, date):
+        # 等待期间已被预取结果或更新的筛选取代，丢弃这次返回
+        if self._pending != (area, date): return
+        self._pending = None
         self.date_combo.config(state="readonly")
         self.area_combo.config(state="readonly")
         self.loading_label.pack_forget()
@@ -168,99 +327,53 @@ class VenueSelectionWindow(tk.Toplevel):
             self.current_date = date
             self.venues = [v['name'] for v in self.venue_data] 
             self._draw_grid() 
+            self._watcher.unwatch(self._watch_key)
+            self._watch_key = self._watcher.watch(self.item_info.item_type, area, date, data=result)
         else:
             messagebox.showerror("刷新失败", f"接口请求失败: {result}")
             self.date_combo.set(self.current_date)
             self.area_combo.set(self.current_area)
 
     def _draw_grid(self):
-        for widget in self.grid_container.winfo_children(): widget.destroy()
-
-        v_scroll = tk.Scrollbar(self.grid_container, orient="vertical")
-        h_scroll = tk.Scrollbar(self.grid_container, orient="horizontal")
-        self.canvas = tk.Canvas(self.grid_container, yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set, bg="#e0e0e0")
-        v_scroll.config(command=self.canvas.yview)
-        h_scroll.config(command=self.canvas.xview)
-
-        v_scroll.pack(side="right", fill="y")
-        h_scroll.pack(side="bottom", fill="x")
-        self.canvas.pack(side="left", fill="both", expand=True)
-
-        self.grid_frame = tk.Frame(self.canvas)
-        self.canvas.create_window((0, 0), window=self.grid_frame, anchor="nw")
-
-        def configure_scroll_region(event):
-            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        self.grid_frame.bind("<Configure>", configure_scroll_region)
-
-        # 绘制
-        tk.Label(self.grid_frame, text="时间", width=8, height=2, relief="raised", bg="#ddd", font=("Arial", 10, "bold")).grid(row=0, column=0, sticky="nsew")
-        for col_idx, venue in enumerate(self.venues):
-            lbl = tk.Label(self.grid_frame, text=venue, width=12, height=2, relief="raised", bg="#ddd", wraplength=90, font=("Arial", 9))
-            lbl.grid(row=0, column=col_idx+1, sticky="nsew")
-        for row_idx, time_slot in enumerate(self.times):
-            lbl = tk.Label(self.grid_frame, text=time_slot, width=8, height=3, relief="raised", bg="#ddd", font=("Arial", 10))
-            lbl.grid(row=row_idx+1, column=0, sticky="nsew")
-
-        self.buttons = {}
-        saved_tasks = task_manager.load_tasks()
-        
-        for col_idx, venue_obj in enumerate(self.venue_data):
-            time_map = {item['TicketLevelName']: item for item in venue_obj['rtnlist']}
-            for row_idx, time_slot in enumerate(self.times):
-                cell_data = time_map.get(time_slot)
-                
-                bg_color = "#ffffff" 
-                state = tk.NORMAL
-                text = "--"
-                is_clickable = False
-                
-                if cell_data:
-                    text = f"￥{cell_data['MemberPrice']}"
-                    
-                    is_scheduled = False
-                    for t in saved_tasks:
-                        if (t['date'] == self.current_date and 
-                            t['time'] == time_slot and 
-                            t['venue_name'] == venue_obj['name'] and
-                            t['area_name'] == self.current_area): 
-                            is_scheduled = True
-                            break
-                    
-                    if is_scheduled:
-                        bg_color = "#FFA500" 
-                        text = "已设自动"
-                        state = tk.DISABLED 
-                    elif cell_data.get('CDefault7') == "不可预约":
-                        bg_color = "#D3D3D3" 
-                        text = "不可预约"
-                        state = tk.DISABLED
-                    elif str(cell_data.get('CDefault8')) == "1":
-                        bg_color = "#87CEFA"
-                        text = "已占用"
-                        state = tk.DISABLED
-                    elif cell_data.get('Description') == "锁场":
-                        bg_color = "#D3D3D3" 
-                        text = "锁场"
-                        state = tk.DISABLED
-                    else:
-                        is_clickable = True
-                        bg_color = "#ffffff"
-                else:
-                    bg_color = "#D3D3D3"
-                    text = ""
-                    state = tk.DISABLED
-                
-                btn = tk.Button(self.grid_frame, text=text, bg=bg_color, width=10, height=3, relief="groove")
-                if is_clickable:
-                    btn.config(command=functools.partial(self._on_cell_click, btn, cell_data, venue_obj['name']))
-                else:
-                    btn.config(state=tk.DISABLED, disabledforeground="#333" if bg_color=="#FFA500" else "#888")
-
-                btn.grid(row=row_idx+1, column=col_idx+1, padx=1, pady=1, sticky="nsew")
-                self.buttons[(row_idx, col_idx)] = btn
-
-    def _on_cell_click(self, btn, cell_data, venue_name):
+        """
+        按当前数据刷新网格: 只改动状态有变化的格子 (场地列表变化时才整表重建)
+        本次选中且仍可预约的格子保持选中，已不可预约的从选择中移除
+        """
+        with tracing.span("draw_grid", "ui", area=self.current_area, date=self.current_date):
+            return self._draw_grid_traced()
+
+    def _draw_grid_traced(self):
+        if self.grid_view is None:
+            with tracing.span("create_grid", "ui"):
+                self.grid_view = venue_grid.VenueGrid(self.grid_container, on_click=self._on_cell_click)
+                self.grid_view.pack(fill="both", expand=True)
+
+        # 已设自动抢的 (场地, 时间)，每个格子只需一次哈希查找
+        with tracing.span("build_cells", "app"):
+            scheduled = task_manager.get_scheduled_slots(self.current_area, self.current_date)
+            cells = venue_grid.build_cells(self.venue_data, self.times, scheduled)
+
+        selected = {(item['venue_name'], item['time']) for item in self.selected_items}
+        if selected:
+            still_selected = set()
+            for (row, col), (status, text, cell_data) in cells.items():
+                slot = (self.venues[col], self.times[row])
+                if slot in selected and status == venue_grid.STATUS_AVAILABLE:
+                    cells[(row, col)] = (venue_grid.STATUS_SELECTED, text, cell_data)
+                    still_selected.add(slot)
+            if still_selected != selected:
+                self.selected_items = [x for x in self.selected_items
+                                       if (x['venue_name'], x['time']) in still_selected]
+                self._update_footer_info()
+
+        with tracing.span("update_cells", "ui") as trace:
+            touched = self.grid_view.update_cells(self.venues, self.times, cells)
+            trace.end(cells=len(cells), touched=touched)
+        return touched
+
+    def _on_cell_click(self, row, col):
+        cell_data = self.grid_view.cells[(row, col)][2]
+        venue_name = self.venues[col]
         item_id = (cell_data['TicketTypeNo'], cell_data['TicketLevelNo'])
         found_index = -1
         for i, item in enumerate(self.selected_items):
@@ -270,9 +383,10 @@ class VenueSelectionWindow(tk.Toplevel):
         
         if found_index != -1:
             self.selected_items.pop(found_index)
-            btn.config(bg="#ffffff") 
+            self.grid_view.set_cell(row, col, venue_grid.STATUS_AVAILABLE)
         else:
             selection_obj = {
+                "item_type": self.item_info.item_type,
                 "venue_name": venue_name,
                 "area_name": self.current_area,
                 "date": self.current_date, 
@@ -281,7 +395,7 @@ class VenueSelectionWindow(tk.Toplevel):
                 "data": cell_data
             }
             self.selected_items.append(selection_obj)
-            btn.config(bg="#90EE90") 
+            self.grid_view.set_cell(row, col, venue_grid.STATUS_SELECTED)
             
         self._update_footer_info()
 
@@ -290,26 +404,49 @@ class VenueSelectionWindow(tk.Toplevel):
         total_price = sum(float(x['price']) for x in self.selected_items)
         self.info_label.config(text=f"本次已选 {count} 个场地，总计: ￥{total_price:.2f}")
 
+    def _tag_account(self, tasks):
+        """选择了其他账号时，给任务带上 account (手机号)；当前账号的任务不带该字段"""
+        if self.account_combo is not None and self.account_combo.current() > 0:
+            account = self.account_combo.get()
+            for t in tasks:
+                t['account'] = account
+        return tasks
+
     def _on_submit_task(self):
         if not self.selected_items:
             messagebox.showwarning("提示", "请至少选择一个绿色场地")
             return
         
-        self.submit_callback(self.selected_items)
+        self.submit_callback(self._tag_account(self.selected_items))
         self.selected_items = []
         self._update_footer_info()
         self._draw_grid()
         messagebox.showinfo("成功", "抢票任务已添加！\n系统将自动在目标日期尝试抢票。\n请在主界面右侧查看任务列表。")
 
+    def _on_submit_ladder(self):
+        """把本次选中的格子按点选顺序合成一个任务: 第一个为首选，其余依次作为候补"""
+        if len(self.selected_items) < 2:
+            messagebox.showwarning("提示", "请按优先顺序至少选择两个场地")
+            return
+
+        task = task_manager.make_ladder_task(self.selected_items)
+        self.submit_callback(self._tag_account([task]))
+        self.selected_items = []
+        self._update_footer_info()
+        self._draw_grid()
+        messagebox.showinfo("成功", f"已添加带 {len(task['ladder'])} 个候补的抢票任务！\n"
+                                    f"首选: {task['venue_name']} {task['time']}，被抢走时按顺序尝试候补。")
+
 
 # =============================================================================
 #  主面板窗口 (Dashboard)
 # =============================================================================
 class DashboardWindow(tk.Toplevel):
-    def __init__(self, login_root, user_phone=""):
+    def __init__(self, login_root, user_phone="", initial_html=None):
         super().__init__()
         self.login_root = login_root
         self.user_phone = user_phone
+        self._initial_html = initial_html  # 自动登录验证时已下载的主页，首次加载直接复用
         self.title(f"场馆服务 & 任务管理器 - 用户: {user_phone}")
         self.geometry("1000x700")
         
@@ -334,6 +471,11 @@ class DashboardWindow(tk.Toplevel):
         self.load_venues()
         self.refresh_task_list()
 
+        # 自动登录与手动登录都在这里首次画出主面板
+        self.update_idletasks()
+        startup.mark("主面板显示")
+        startup.report()
+
     def on_exit(self):
         # 关闭主窗口时彻底退出程序
         self.login_root.destroy()
@@ -352,20 +494,11 @@ class DashboardWindow(tk.Toplevel):
         header = tk.Label(self.right_frame, text="自动抢票任务监控", font=("微软雅黑", 12, "bold"), bg="#f2f2f2", pady=15)
         header.pack(fill="x")
         
-        container = tk.Frame(self.right_frame, bg="#f2f2f2")
-        container.pack(fill="both", expand=True, padx=10, pady=5)
-        
-        canvas = tk.Canvas(container, bg="#f2f2f2", highlightthickness=0)
-        scrollbar = tk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        
-        self.task_list_frame = tk.Frame(canvas, bg="#f2f2f2")
-        self.task_list_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        
-        canvas.create_window((0, 0), window=self.task_list_frame, anchor="nw", width=310)
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        # 虚拟化列表: 只画可见的行，由 task_manager 的增删改通知增量更新
+        self.task_list = task_list.TaskListView(self.right_frame, on_delete=self._delete_task)
+        self.task_list.pack(fill="both", expand=True, padx=10, pady=5)
+        task_manager.add_listener(self._on_tasks_changed)
+        self.bind("<Destroy>", self._on_destroy, add="+")
 
         btn_refresh = tk.Button(self.right_frame, text="刷新任务状态", command=self.refresh_task_list, bg="#ddd")
         btn_refresh.pack(pady=10, fill="x", padx=10)
@@ -394,31 +527,34 @@ class DashboardWindow(tk.Toplevel):
         threading.Thread(target=self._thread_load_venues).start()
 
     def _thread_load_venues(self):
-        success, html_content = api_handler.get_dashboard_html()
+        if self._initial_html is not None:
+            success, html_content = True, self._initial_html
+            self._initial_html = None
+        else:
+            success, html_content = api_handler.get_dashboard_html()
         if not success:
             self.after(0, lambda: self.loading_label.config(text=f"加载失败: {html_content}"))
             return
         
-        soup = BeautifulSoup(html_content, 'html.parser')
-        menu_cont = soup.find('div', class_='menuCont')
         items_data = []
         
-        if menu_cont:
-            for link in menu_cont.find_all('a'):
-                name = link.find('p').text.strip() if link.find('p') else "未知项目"
-                img_tag = link.find('img')
-                img_url = img_tag.get('src') if img_tag else None
-                href = link.get('href')
-                if href:
-                    full_url = 'http://example.com' + href
-                    qp = parse_qs(urlparse(full_url).query)
-                    item_type = qp.get('type', [''])[0]
-                    if not item_type: continue
-                    item_info = ItemInfo(name, item_type, name)
-                    img_bytes = None
-                    if img_url:
-                        img_bytes = api_handler.fetch_image_bytes(img_url)
-                    items_data.append({"name": name, "img_bytes": img_bytes, "item_info": item_info})
+        # 只提取 menuCont 下的链接，不构建整页 DOM
+        for link in html_extract.extract_menu_items(html_content):
+            name = link["name"]
+            img_url = link["img_url"]
+            href = link["href"]
+            if href:
+                full_url = 'http://example.com' + href
+                qp = parse_qs(urlparse(full_url).query)
+                item_type = qp.get('type', [''])[0]
+                if not item_type: continue
+                item_info = ItemInfo(name, item_type, name)
+                items_data.append({"name": name, "img_url": img_url, "item_info": item_info})
+
+        # 图标走磁盘缓存，只有未命中的才并发下载，缩略图已在后台线程生成好
+        thumbs = image_cache.get_thumbnails([it["img_url"] for it in items_data if it["img_url"]])
+        for it in items_data:
+            it["thumb"] = thumbs.get(it["img_url"])
         
         self.after(0, lambda: self._render_venues(items_data))
 
@@ -430,42 +566,56 @@ class DashboardWindow(tk.Toplevel):
             cmd = lambda info=item["item_info"]: show_venue_page_flow(info, self)
             btn = tk.Button(self.venue_container, text=item["name"], command=cmd,
                             font=("微软雅黑", 10, "bold"), bg="white", relief="raised", bd=2, width=18, height=8)
-            if item["img_bytes"]:
+            if item["thumb"]:
                 try:
-                    pil_img = Image.open(io.BytesIO(item["img_bytes"])).resize((50, 50), Image.Resampling.LANCZOS)
-                    tk_img = ImageTk.PhotoImage(pil_img)
-                    image_references.append(tk_img)
+                    tk_img = _get_photo_image(item["thumb"])
                     btn.config(image=tk_img, compound="top", width=140, height=100)
+                    btn.image = tk_img
                 except: pass
             btn.grid(row=r, column=c, padx=15, pady=15)
 
+        # 后台刷新所有项目的日期/场地配置，之后打开任意项目都不用再等 particulars 页面
+        item_types = [item["item_info"].item_type for item in items]
+        threading.Thread(target=options_cache.refresh_all, args=(item_types,), daemon=True).start()
+
     # --- 右侧任务逻辑 ---
     def refresh_task_list(self):
-        for w in self.task_list_frame.winfo_children(): w.destroy()
-        tasks = task_manager.load_tasks()
-        if not tasks:
-            tk.Label(self.task_list_frame, text="暂无抢票任务", bg="#f2f2f2", fg="#888").pack(pady=20)
-            return
+        """从任务库整表重新加载 (首次打开或手动刷新)；平时由增删改通知增量更新"""
+        self.task_list.set_tasks(task_manager.load_tasks())
+
+    def _on_tasks_changed(self, event, payload):
+        """task_manager 的变动通知 (可能来自后台线程)，转到主线程更新列表"""
+        def apply():
+            if not self.winfo_exists():
+                return
+            if event == 'added':
+                self.task_list.add_tasks(payload)
+            elif event == 'deleted':
+                self.task_list.remove_task(payload)
+            elif event == 'updated':
+                self.task_list.update_task(*payload)
+        try:
+            self.after(0, apply)
+        except (RuntimeError, tk.TclError):
+            pass  # 窗口已关闭
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            task_manager.remove_listener(self._on_tasks_changed)
+
+    def _delete_task(self, task_id):
+        if messagebox.askyesno("确认", "确定要取消这个自动抢票任务吗？"):
+            task_manager.delete_task_by_id(task_id)
 
-        for idx, task in enumerate(tasks):
-            card = tk.Frame(self.task_list_frame, bg="white", bd=1, relief="solid")
-            card.pack(fill="x", padx=5, pady=5)
-            
-            info_frame = tk.Frame(card, bg="white")
-            info_frame.pack(side="left", padx=10, pady=5)
-            
-            tk.Label(info_frame, text=f"{task['date']}  {task['time']}", font=("Arial", 10, "bold"), bg="white", fg="#FF8C00").pack(anchor="w")
-            tk.Label(info_frame, text=f"{task['venue_name']}", font=("Arial", 9), bg="white").pack(anchor="w")
-            tk.Label(info_frame, text=f"区域: {task['area_name']}", font=("Arial", 9, "italic"), bg="white", fg="#666").pack(anchor="w")
-            
-            btn_del = tk.Button(card, text="取消", bg="#FF6347", fg="white", font=("Arial", 9), 
-                                relief="flat", command=lambda i=idx: self._delete_task(i))
-            btn_del.pack(side="right", padx=10, pady=10)
 
-    def _delete_task(self, index):
-        if messagebox.askyesno("确认", "确定要取消这个自动抢票任务吗？"):
-            task_manager.delete_task(index)
-            self.refresh_task_list()
+def _get_photo_image(png_bytes):
+    """从缩略图 PNG 创建 PhotoImage；内容相同的图标共用一个，内容变了自然得到新图片"""
+    digest = hashlib.sha256(png_bytes).digest()
+    tk_img = image_references.get(digest)
+    if tk_img is None:
+        tk_img = tk.PhotoImage(data=png_bytes)
+        image_references[digest] = tk_img
+    return tk_img
 
 
 # =============================================================================
@@ -479,6 +629,18 @@ def show_venue_page_flow(item_info, dashboard_window):
     2. 显示临时 Loading 窗口 (禁止关闭)
     3. 后台请求数据
     """
+    # 整个打开流程记为一条追踪，选择窗口画完时结束
+    trace = tracing.begin("open_item", item=item_info.name, item_type=item_info.item_type)
+    with tracing.activate(trace):
+        with tracing.span("loading_window", "ui"):
+            loading_win = _create_loading_window(item_info, dashboard_window)
+
+        # 启动后台线程 (线程真正开始运行前的时间记为 thread_start)
+        threading.Thread(target=tracing.wrap(thread_process_data, "thread_start"),
+                         args=(loading_win, dashboard_window, item_info, trace)).start()
+
+def _create_loading_window(item_info, dashboard_window):
+    """隐藏主面板并显示加载窗口"""
     dashboard_window.withdraw()
     
     loading_win = tk.Toplevel()
@@ -495,22 +657,23 @@ def show_venue_page_flow(item_info, dashboard_window):
     
     tk.Label(loading_win, text=f"正在连接 {item_info.name}...", font=("微软雅黑", 11)).pack(pady=15)
     tk.Label(loading_win, text="获取未来7天数据中...", fg="#666").pack()
+    return loading_win
 
-    # 启动后台线程
-    threading.Thread(target=thread_process_data, 
-                     args=(loading_win, dashboard_window, item_info)).start()
-
-def thread_process_data(loading_win, dashboard_window, item_info):
+def thread_process_data(loading_win, dashboard_window, item_info, trace=None):
     """
     后台线程：执行耗时操作
     增加了全局 try-except，确保无论发生什么错误，都能恢复主窗口显示
+    :param trace: 整个打开流程的追踪 span，窗口画完 (或出错) 时结束
     """
+    trace = trace or tracing.begin("open_item", item=item_info.name)
     try:
         # 1. 获取配置
-        success_opt, result_opt = api_handler.get_booking_options(item_info.item_type)
+        with tracing.span("get_booking_options", "app"):
+            success_opt, result_opt = options_cache.get_booking_options(item_info.item_type)
         
         if not success_opt:
             # 失败处理：回到主线程报错并恢复主窗口
+            trace.end(error="options")
             loading_win.after(0, lambda: _handle_error(loading_win, dashboard_window, f"获取配置失败: {result_opt}"))
             return
 
@@ -520,22 +683,42 @@ def thread_process_data(loading_win, dashboard_window, item_info):
         all_areas = result_opt['areas']
         target_date = all_dates[0]
         
-        # 2. 获取具体数据
-        success_data, result_data = api_handler.get_venue_data(item_info.item_type, default_area, target_date)
-        
-        if not success_data:
-            loading_win.after(0, lambda: _handle_error(loading_win, dashboard_window, f"加载数据异常: {result_data}"))
-            return
+        # 2. 并发预取所有区域 × 7天的数据，默认格子最先请求，到达后立即打开窗口；
+        #    其余格子陆续推送给窗口，之后切换日期/区域无需再等网络
+        first = (default_area, target_date)
+        state = {"window": None}
+
+        def on_cell(area, date, cell):
+            # 主线程中执行；数据本身已写入 venue_cache
+            if state["window"] is not None:
+                state["window"].add_prefetched(area, date, cell)
+            elif (area, date) == first:
+                if not cell["success"]:
+                    trace.end(error="venue_data")
+                    _handle_error(loading_win, dashboard_window, f"加载数据异常: {cell['result']}")
+                    return
+                # 3. 成功：在主线程打开选择窗口
+                with tracing.span("open_selection_window", "ui"):
+                    state["window"] = open_selection_window(
+                        loading_win, dashboard_window, 
+                        item_info, default_area, target_date, 
+                        all_areas, all_dates, cell["result"]
+                    )
+                if state["window"] is None:
+                    trace.end(error="window")
+                else:
+                    # 空闲回调排在窗口的布局与重绘之后，运行时窗口已经画完
+                    state["window"].after_idle(tracing.wrap(trace.end, "idle_draw"))
 
-        # 3. 成功：在主线程打开选择窗口
-        loading_win.after(0, lambda: open_selection_window(
-            loading_win, dashboard_window, 
-            item_info, default_area, target_date, 
-            all_areas, all_dates, result_data
-        ))
+        # on_cell 在事件循环线程中调用，经 after 队列转到主线程；首格的排队时间记为 tk_queue
+        with tracing.span("prefetch", "app", areas=len(all_areas), dates=len(all_dates)):
+            prefetch.prefetch(item_info.item_type, all_areas, all_dates, first=first,
+                              on_cell=lambda a, d, c: dashboard_window.after(
+                                  0, tracing.wrap(on_cell, "tk_queue"), a, d, c))
 
     except Exception as e:
         print(f"线程内部严重错误: {e}")
+        trace.end(error=type(e).__name__)
         # 发生未捕获异常时，务必恢复界面
         loading_win.after(0, lambda: _handle_error(loading_win, dashboard_window, f"系统错误: {str(e)}"))
 
@@ -549,7 +732,7 @@ def _handle_error(loading_win, dashboard_window, msg):
     dashboard_window.deiconify() # 重新显示主窗口        
 
 def open_selection_window(loading_win, dashboard_window, item_info, area, date, all_areas, all_dates, data):
-    """实例化窗口 A"""
+    """实例化窗口 A，返回窗口对象 (失败时返回 None)"""
     
     # 先销毁加载窗口
     try:
@@ -563,11 +746,12 @@ def open_selection_window(loading_win, dashboard_window, item_info, area, date,
     
     # --- 关键修复 2: 实例化窗口时增加保护，防止 init 崩溃导致主窗口消失 ---
     try:
-        VenueSelectionWindow(dashboard_window, item_info, area, date, 
-                             all_areas, all_dates, data, on_save_tasks)
+        return VenueSelectionWindow(dashboard_window, item_info, area, date, 
+                                    all_areas, all_dates, data, on_save_tasks)
     except Exception as e:
         messagebox.showerror("界面错误", f"无法打开预订窗口: {e}")
         dashboard_window.deiconify() # 救命稻草：显示回主窗口
+        return None
 
 
 # =============================================================================
@@ -615,6 +799,7 @@ def handle_login():
         root.after(0, lambda: login_button.config(text="登 录", state=tk.NORMAL))
         if success:
             # 登录成功，保存手机号
+            startup.mark("手动登录完成")
             api_handler.save_user_phone(phone)
             root.after(0, lambda: [root.withdraw(), DashboardWindow(root, phone)])
         else:
@@ -657,23 +842,43 @@ if __name__ == "__main__":
 
     # --- 自动登录检查逻辑 ---
     def check_auto_login():
+        """后台线程: 验证已保存的登录状态 (需要下载主页)，不阻塞界面"""
         print("检查自动登录...")
         saved_phone = api_handler.get_current_user()
-        if saved_phone:
-            print(f"发现已保存用户: {saved_phone}，验证 Session...")
-            # 验证 Session 是否有效
-            if api_handler.validate_session():
-                print("Session 有效，跳过登录")
-                root.withdraw()
-                DashboardWindow(root, saved_phone)
-            else:
-                print("Session 失效，请重新登录")
-                # 预填充手机号
-                phone_entry.insert(0, saved_phone)
-        else:
+        if not saved_phone:
             print("无保存用户")
+            return
+        print(f"发现已保存用户: {saved_phone}，验证 Session...")
+        valid, html = api_handler.check_session()
+        root.after(0, lambda: finish_auto_login(saved_phone, valid, html))
+
+    def finish_auto_login(saved_phone, valid, html):
+        if valid:
+            print("Session 有效，跳过登录")
+            root.withdraw()
+            DashboardWindow(root, saved_phone, initial_html=html)
+        else:
+            print("Session 失效，请重新登录")
+            # 预填充手机号
+            if not phone_entry.get():
+                phone_entry.insert(0, saved_phone)
+
+    def preload_modules():
+        for module in PRELOAD_MODULES:
+            try:
+                module._load()
+            except Exception as e:
+                print(f"预加载 {module._name} 失败: {e}")
+
+    tracing.export_on_exit(TRACE_FILE)
+
+    # 报告在主面板首次画出时输出；一直没有进入主面板 (未登录就退出) 时退出前输出
+    atexit.register(startup.report)
 
-    # 稍微延迟一下执行检查，让界面先初始化
-    root.after(100, check_auto_login)
+    # 先把登录窗口画出来，再在后台验证 Session、预加载其余模块
+    root.update()
+    startup.mark("登录窗口首次绘制")
+    threading.Thread(target=check_auto_login, daemon=True).start()
+    threading.Thread(target=preload_modules, daemon=True).start()
 
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
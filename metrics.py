@@ -0,0 +1,238 @@
+"""
+接口请求指标
+按接口 (URL 路径的最后一段，例如 GetDayPlay / SubmitOrder) 统计:
+- 耗时: 累计直方图 (供 Prometheus) + 最近 SAMPLE_WINDOW 次的样本 (算 p50 / p95 / p99)
+- 收到的字节数、HTTP 状态码、异常类型、服务器下发新 Cookie (会话轮换) 的次数
+导出为 Prometheus 文本格式 (可交给 node_exporter 的 textfile 收集器) 或 JSON 快照。
+
+记录一次只是加锁更新几个计数，开销在微秒级；设置环境变量 YYTICKET_METRICS=0
+或调用 set_enabled(False) 后 record 直接返回，不做任何统计。
+"""
+import bisect
+import collections
+import json
+import math
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+# --- 配置 ---
+ENABLED = os.environ.get('YYTICKET_METRICS', '1') != '0'
+# 直方图桶上界 (秒)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SAMPLE_WINDOW = 1024     # 每个接口保留最近多少次耗时用来算分位数
+PREFIX = 'yyticket'
+
+
+def endpoint_name(url):
+    """URL -> 接口名: /cd/GetDayPlay?... -> GetDayPlay；图片统一归为 image"""
+    path = urlparse(url).path
+    if path.lower().startswith('/content/'):
+        return 'image'
+    return path.rstrip('/').rsplit('/', 1)[-1] or '/'
+
+
+def _error_name(error):
+    return error if isinstance(error, str) else type(error).__name__
+
+
+def quantile(sorted_values, q):
+    """最近秩法: 不小于 q 比例样本的最小值 (样本少时不会偏向较大的一侧)"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+class EndpointStats:
+    """单个接口的计数 (由 Metrics 加锁访问)"""
+
+    def __init__(self):
+        self.count = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)   # 最后一个是 +Inf
+        self.samples = collections.deque(maxlen=SAMPLE_WINDOW)
+        self.bytes = 0
+        self.status = collections.Counter()
+        self.errors = collections.Counter()
+        self.cookie_rotations = 0
+
+    def snapshot(self):
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "latency_sum": round(self.latency_sum, 6),
+            "p50": quantile(ordered, 0.50),
+            "p95": quantile(ordered, 0.95),
+            "p99": quantile(ordered, 0.99),
+            "max": ordered[-1] if ordered else None,
+            "bytes": self.bytes,
+            "status": {str(k): v for k, v in sorted(self.status.items())},
+            "errors": dict(self.errors),
+            "cookie_rotations": self.cookie_rotations,
+        }
+
+
+class Metrics:
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.started = time.time()
+
+    def record(self, endpoint, latency, status=None, nbytes=0, error=None, rotated=False):
+        """
+        记录一次请求
+        :param latency: 秒
+        :param status: HTTP 状态码，请求没有拿到响应时为 None
+        :param error: 异常对象或异常类名
+        :param rotated: 这次响应是否改动了保存的 Cookie
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stats(endpoint)
+            stats.count += 1
+            stats.latency_sum += latency
+            stats.buckets[bisect.bisect_left(BUCKETS, latency)] += 1
+            stats.samples.append(latency)
+            stats.bytes += nbytes
+            if status is not None:
+                stats.status[status] += 1
+            if error is not None:
+                stats.errors[_error_name(error)] += 1
+            if rotated:
+                stats.cookie_rotations += 1
+
+    def record_error(self, endpoint, error):
+        """只补记异常类型 (响应已经按 record 记过，之后解析失败时使用)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._stats(endpoint).errors[_error_name(error)] += 1
+
+    def _stats(self, endpoint):
+        """调用方需持有 _lock"""
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self.started = time.time()
+
+    # --- 导出 ---
+    def snapshot(self):
+        """JSON 快照: {"ts", "since", "endpoints": {接口名: {...}}}，耗时单位为秒"""
+        with self._lock:
+            endpoints = {name: stats.snapshot() for name, stats in sorted(self._endpoints.items())}
+        return {"ts": time.time(), "since": self.started, "enabled": self.enabled, "endpoints": endpoints}
+
+    def to_prometheus(self):
+        """Prometheus 文本格式"""
+        with self._lock:
+            items = sorted(self._endpoints.items())
+            rows = [(name, s.count, s.latency_sum, list(s.buckets), s.bytes,
+                     dict(s.status), dict(s.errors), s.cookie_rotations) for name, s in items]
+        p = PREFIX
+        lines = [
+            f"# HELP {p}_request_duration_seconds 接口请求耗时",
+            f"# TYPE {p}_request_duration_seconds histogram",
+        ]
+        for name, count, total, buckets, *_ in rows:
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ('+Inf',), buckets):
+                cumulative += n
+                lines.append(f'{p}_request_duration_seconds_bucket{{endpoint="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{p}_request_duration_seconds_sum{{endpoint="{name}"}} {total:.6f}')
+            lines.append(f'{p}_request_duration_seconds_count{{endpoint="{name}"}} {count}')
+
+        lines += [f"# HELP {p}_response_bytes_total 收到的响应字节数", f"# TYPE {p}_response_bytes_total counter"]
+        lines += [f'{p}_response_bytes_total{{endpoint="{r[0]}"}} {r[4]}' for r in rows]
+
+        lines += [f"# HELP {p}_responses_total 按 HTTP 状态码统计的响应数", f"# TYPE {p}_responses_total counter"]
+        for r in rows:
+            lines += [f'{p}_responses_total{{endpoint="{r[0]}",code="{code}"}} {n}'
+                      for code, n in sorted(r[5].items())]
+
+        lines += [f"# HELP {p}_request_errors_total 按异常类型统计的失败请求数",
+                  f"# TYPE {p}_request_errors_total counter"]
+        for r in rows:
+            lines += [f'{p}_request_errors_total{{endpoint="{r[0]}",error="{err}"}} {n}'
+                      for err, n in sorted(r[6].items())]
+
+        lines += [f"# HELP {p}_cookie_rotations_total 响应改动了保存的 Cookie 的次数",
+                  f"# TYPE {p}_cookie_rotations_total counter"]
+        lines += [f'{p}_cookie_rotations_total{{endpoint="{r[0]}"}} {r[7]}' for r in rows]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        _atomic_write(path, self.to_prometheus())
+
+    def write_json(self, path):
+        _atomic_write(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2) + "\n")
+
+
+def _atomic_write(path, text):
+    """临时文件 + 原子替换，收集器不会读到写了一半的文件"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# 进程内共享的默认实例
+_default_metrics = Metrics()
+
+
+def get_metrics():
+    return _default_metrics
+
+
+def set_enabled(enabled):
+    _default_metrics.enabled = enabled
+
+
+def record(endpoint, latency, status=None, nbytes=0, error=None, rotated=False):
+    _default_metrics.record(endpoint, latency, status, nbytes, error, rotated)
+
+
+def record_error(endpoint, error):
+    _default_metrics.record_error(endpoint, error)
+
+
+def record_request(url, started, status=None, nbytes=0, error=None, rotated=False):
+    """
+    记录一次 HTTP 请求 (api_handler 与 async_api 共用): 按 URL 归到接口，耗时从 started (perf_counter) 算起
+    关闭时不解析 URL、不计数
+    """
+    if _default_metrics.enabled:
+        _default_metrics.record(endpoint_name(url), time.perf_counter() - started, status, nbytes, error, rotated)
+
+
+def record_request_error(url, error):
+    """只补记异常类型 (响应已经按 record_request 记过，之后解析失败时使用)"""
+    if _default_metrics.enabled:
+        _default_metrics.record_error(endpoint_name(url), error)
+
+
+def snapshot():
+    return _default_metrics.snapshot()
+
+
+def to_prometheus():
+    return _default_metrics.to_prometheus()
+
+
+def write_prometheus(path):
+    _default_metrics.write_prometheus(path)
+
+
+def write_json(path):
+    _default_metrics.write_json(path)
+
+
+def reset():
+    _default_metrics.reset()
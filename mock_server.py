@@ -0,0 +1,381 @@
+"""
+yyticket 本地替身服务
+实现 api_handler 用到的全部接口，返回与线上结构一致的数据，用于离线调试与高并发性能测试:
+- /JNMY/SendSMSVerifyCode、/JNMY/CheckPhoneCode   登录 (任意 6 位验证码均可通过)
+- /CD/Index2、/cd/home、/cd/particulars            主页 / 预热页 / 项目页 (HTML)
+- /cd/GetDayPlay                                   场地数据 (同一区域、日期的数据固定，下单后状态随之变化)
+- /cd/SubmitOrder                                  下单 (同一张票只有第一次成功)
+- /Content/images/...                              图标 (纯色 PNG)
+
+可按接口配置延迟分布 (对数正态)、错误率、慢请求比例，以及 Cookie 轮换与服务器时钟偏差。
+
+运行:
+    python -m mock_server --port 8090 --latency 30 --error-rate 0.01
+    YYTICKET_BASE_URL=http://127.0.0.1:8090 python main.py
+
+代码中使用:
+    server = mock_server.start(profiles={'GetDayPlay': mock_server.Profile(latency_ms=80)})
+    api_handler.set_base_url(server.base_url)
+"""
+import argparse
+import datetime
+import email.utils
+import json
+import math
+import random
+import secrets
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# --- 配置 ---
+SESSION_COOKIE = 'ASP.NET_SessionId'
+ROTATE_EVERY = 0         # 每个会话每多少次请求下发一个新的会话 Cookie (0 为不轮换)
+COURTS = 12
+TIMES = [f"{h:02d}:00" for h in range(7, 22)]
+BOOKED_RATIO = 0.25      # 初始时已被占用的比例
+
+ITEMS = [
+    ('0001', '游泳', ['游泳馆']),
+    ('0002', '篮球', ['篮球馆', '室外篮球场']),
+    ('0004', '羽毛球', ['羽毛球北训场', '羽毛球南训场', '体育馆羽毛球场']),
+    ('0005', '乒乓球', ['乒乓球馆']),
+    ('0006', '网球', ['室外网球场', '室内网球馆']),
+]
+
+
+class Profile:
+    """
+    单个接口的响应特征
+    :param latency_ms: 延迟中位数 (毫秒)
+    :param jitter: 对数正态分布的 sigma，0 表示固定延迟
+    :param error_rate: 返回 HTTP 500 的比例
+    :param slow_rate: 慢请求比例，慢请求额外等待 slow_ms
+    """
+
+    def __init__(self, latency_ms=0.0, jitter=0.0, error_rate=0.0, slow_rate=0.0, slow_ms=2000.0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+    def delay(self, rng):
+        seconds = self.latency_ms / 1000
+        if self.jitter and seconds > 0:
+            seconds *= math.exp(rng.gauss(0, self.jitter))
+        if self.slow_rate and rng.random() < self.slow_rate:
+            seconds += self.slow_ms / 1000
+        return seconds
+
+    def fails(self, rng):
+        return bool(self.error_rate) and rng.random() < self.error_rate
+
+
+# 路径 (小写) -> 接口名，profiles 按接口名配置
+ENDPOINTS = {
+    '/jnmy/sendsmsverifycode': 'SendSMSVerifyCode',
+    '/jnmy/checkphonecode': 'CheckPhoneCode',
+    '/cd/index2': 'Index2',
+    '/cd/home': 'home',
+    '/cd/particulars': 'particulars',
+    '/cd/getdayplay': 'GetDayPlay',
+    '/cd/submitorder': 'SubmitOrder',
+}
+
+
+class MockState:
+    """服务端状态: 会话、场地占用情况、请求计数 (线程安全)"""
+
+    def __init__(self, seed=0, rotate_every=ROTATE_EVERY, clock_skew=0.0):
+        self.seed = seed
+        self.rotate_every = rotate_every
+        self.clock_skew = clock_skew
+        self._lock = threading.Lock()
+        self._sessions = {}   # 会话 id -> 该会话已处理的请求数
+        self._booked = {}     # (type, area, day) -> {(场地, 时间)}
+        self.counts = {}      # 接口名 -> 请求数
+
+    def count(self, endpoint):
+        with self._lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+    # --- 会话 ---
+    def new_session(self):
+        sid = secrets.token_hex(12)
+        with self._lock:
+            self._sessions[sid] = 0
+        return sid
+
+    def touch(self, sid):
+        """会话有效时返回需要下发的新会话 id (不轮换时为 None)；无效返回 False"""
+        with self._lock:
+            if sid not in self._sessions:
+                return False
+            self._sessions[sid] += 1
+            if self.rotate_every and self._sessions[sid] % self.rotate_every == 0:
+                new_sid = secrets.token_hex(12)
+                self._sessions[new_sid] = 0  # 旧会话继续有效，与线上宽松的行为一致
+                return new_sid
+            return None
+
+    # --- 场地 ---
+    def _rng(self, *key):
+        return random.Random(f"{self.seed}|{'|'.join(key)}")
+
+    def venue_data(self, item_type, area, day):
+        rng = self._rng(item_type, area, day)
+        with self._lock:
+            booked = set(self._booked.get((item_type, area, day), ()))
+        data = []
+        for i in range(1, COURTS + 1):
+            name = f"{area}{i}号场"
+            rtnlist = []
+            for t in TIMES:
+                hour = int(t[:2])
+                c8 = "1" if rng.random() < BOOKED_RATIO or (name, t) in booked else "0"
+                rtnlist.append({
+                    "TicketLevelName": t,
+                    "MemberPrice": 40.0 if hour < 17 else 50.0,
+                    "TicketTypeNo": f"{item_type}-{i:02d}",
+                    "TicketLevelNo": f"{day.replace('-', '')}{hour:02d}{i:02d}",
+                    "CDefault7": "可预约",
+                    "CDefault8": c8,
+                    "Description": "锁场" if rng.random() < 0.03 else None,
+                })
+            data.append({"name": name, "rtnlist": rtnlist})
+        return data
+
+    def book(self, item_type, area, day, type_no, level_no):
+        """下单: 找到对应的格子，可预约则占用并返回 (True, msg)"""
+        for venue in self.venue_data(item_type, area, day):
+            for item in venue['rtnlist']:
+                if item['TicketTypeNo'] == type_no and item['TicketLevelNo'] == level_no:
+                    if item['CDefault8'] == "1" or item['Description'] == "锁场":
+                        return False, "该场地已被预订"
+                    slot = (venue['name'], item['TicketLevelName'])
+                    with self._lock:
+                        booked = self._booked.setdefault((item_type, area, day), set())
+                        if slot in booked:
+                            return False, "该场地已被预订"
+                        booked.add(slot)
+                    return True, "预订成功"
+        return False, "场地不存在"
+
+
+# --- 页面与图片 ---
+def _next_days(n=7):
+    today = datetime.date.today()
+    return [(today + datetime.timedelta(days=i)) for i in range(n)]
+
+
+def render_dashboard():
+    links = "\n".join(
+        f'            <a href="/cd/particulars?type={t}"><img src="/Content/images/cd/{t}.png" alt="{name}" />'
+        f'<p>{name}</p></a>'
+        for t, name, _ in ITEMS)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>场馆服务</title></head>
+<body>
+    <div class="header"><div class="notice">本地替身服务</div></div>
+    <div class="content">
+        <div class="menuCont clearfix">
+{links}
+        </div>
+    </div>
+</body></html>"""
+
+
+def render_login():
+    return """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>登录</title></head>
+<body><div class="login"><input id="phone" /><button>获取验证码</button></div></body></html>"""
+
+
+def render_particulars(item_type):
+    areas = next((a for t, _, a in ITEMS if t == item_type), [])
+    week = "一二三四五六日"
+    days = "\n".join(
+        f'        <span data-day="{d.isoformat()}"><em>{d:%m-%d}</em><i>周{week[d.weekday()]}</i></span>'
+        for d in _next_days())
+    area_spans = "\n".join(f'        <span data-day="{a}">{a}</span>' for a in areas)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{item_type}</title></head>
+<body>
+    <div class="dataCont clearfix">
+{days}
+    </div>
+    <div class="dataCont123 clearfix">
+{area_spans}
+    </div>
+</body></html>"""
+
+
+def make_png(seed, size=64):
+    """生成一张纯色 PNG (不依赖 PIL)"""
+    rng = random.Random(seed)
+    pixel = bytes(rng.randrange(256) for _ in range(3))
+    raw = b"".join(b"\x00" + pixel * size for _ in range(size))
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xffffffff)
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+# --- HTTP ---
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'Microsoft-IIS/8.5'
+    # 头和正文分两次写出，不关 Nagle 的话长连接上每个响应都会多等一次延迟确认 (~40ms)
+    disable_nagle_algorithm = True
+
+    def date_time_string(self, timestamp=None):
+        # 模拟服务器时钟偏差，供 clock_sync 测试
+        if timestamp is None:
+            timestamp = time.time()
+        return email.utils.formatdate(timestamp + self.server.state.clock_skew, usegmt=True)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path.lower()
+        endpoint = ENDPOINTS.get(path, 'image' if path.startswith('/content/') else None)
+        state = self.server.state
+        if endpoint is None:
+            return self._send(404, b"not found", 'text/plain')
+        state.count(endpoint)
+
+        profile = self.server.profiles.get(endpoint, self.server.default_profile)
+        rng = random.Random()
+        time.sleep(profile.delay(rng))
+        if profile.fails(rng):
+            return self._send(500, b"Internal Server Error", 'text/plain')
+
+        cookies = {}
+        sid = self._session_id()
+        if endpoint == 'CheckPhoneCode':
+            if len(query.get('code', '')) == 6:
+                cookies[SESSION_COOKIE] = state.new_session()
+                return self._json({"Code": 1, "Msg": "登录成功"}, cookies)
+            return self._json({"Code": 0, "Msg": "验证码错误"})
+        if endpoint == 'SendSMSVerifyCode':
+            return self._json({"Code": 1, "Msg": "发送成功", "Data": {"Phone": query.get('Phone')}})
+        if endpoint == 'image':
+            return self._send(200, make_png(path), 'image/png')
+        if endpoint == 'home':
+            return self._send(200, render_login().encode('utf-8'), 'text/html; charset=utf-8')
+
+        # 以下接口需要登录
+        rotated = state.touch(sid) if sid else False
+        if rotated is False:
+            if endpoint in ('Index2', 'particulars'):
+                return self._send(200, render_login().encode('utf-8'), 'text/html; charset=utf-8')
+            return self._json({"Code": -1, "Msg": "请先登录"})
+        if rotated:
+            cookies[SESSION_COOKIE] = rotated
+
+        if endpoint == 'Index2':
+            return self._send(200, render_dashboard().encode('utf-8'), 'text/html; charset=utf-8', cookies)
+        if endpoint == 'particulars':
+            body = render_particulars(query.get('type', '')).encode('utf-8')
+            return self._send(200, body, 'text/html; charset=utf-8', cookies)
+        if endpoint == 'GetDayPlay':
+            data = state.venue_data(query.get('type', ''), query.get('Evaluate', ''), query.get('Day', ''))
+            return self._json({"Code": 1, "Msg": "", "Data": data}, cookies)
+        if endpoint == 'SubmitOrder':
+            ok, msg = state.book(query.get('type', ''), query.get('Evaluate', ''), query.get('Day', ''),
+                                 query.get('TicketTypeNo', ''), query.get('TicketLevelNo', ''))
+            return self._json({"Code": 1 if ok else 0, "Msg": msg}, cookies)
+
+    def _session_id(self):
+        for part in self.headers.get('Cookie', '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == SESSION_COOKIE:
+                return value
+        return None
+
+    def _json(self, obj, cookies=None):
+        body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+        self._send(200, body, 'application/json; charset=utf-8', cookies)
+
+    def _send(self, status, body, content_type, cookies=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (cookies or {}).items():
+            self.send_header('Set-Cookie', f"{name}={value}; path=/; HttpOnly")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 2048
+
+    def __init__(self, address, state=None, profiles=None, default_profile=None):
+        super().__init__(address, MockHandler)
+        self.state = state or MockState()
+        self.profiles = dict(profiles or {})
+        self.default_profile = default_profile or Profile()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start(host='127.0.0.1', port=0, profiles=None, default_profile=None, **state_kwargs):
+    """在后台线程启动替身服务并返回 server (server.base_url 为接口地址，server.shutdown() 停止)"""
+    server = MockServer((host, port), MockState(**state_kwargs), profiles, default_profile)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m mock_server', description="yyticket 本地替身服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.0, help="所有接口的延迟中位数 (毫秒)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="延迟的对数正态 sigma")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="返回 500 的比例")
+    parser.add_argument('--slow-rate', type=float, default=0.0, help="慢请求比例")
+    parser.add_argument('--slow-ms', type=float, default=2000.0, help="慢请求额外延迟 (毫秒)")
+    parser.add_argument('--rotate-every', type=int, default=ROTATE_EVERY, help="每 N 次请求轮换一次会话 Cookie")
+    parser.add_argument('--clock-skew', type=float, default=0.0, help="服务器时钟比本机快多少秒")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profiles', help='按接口配置的 JSON 文件: {"GetDayPlay": {"latency_ms": 80, "error_rate": 0.05}}')
+    args = parser.parse_args(argv)
+
+    profiles = {}
+    if args.profiles:
+        with open(args.profiles, 'r', encoding='utf-8') as f:
+            profiles = {name: Profile.from_dict(d) for name, d in json.load(f).items()}
+    default_profile = Profile(args.latency, args.jitter, args.error_rate, args.slow_rate, args.slow_ms)
+    server = MockServer((args.host, args.port),
+                        MockState(seed=args.seed, rotate_every=args.rotate_every, clock_skew=args.clock_skew),
+                        profiles, default_profile)
+    print(f"替身服务已启动: {server.base_url}  (YYTICKET_BASE_URL={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+预订页面配置 (日期 / 场地列表) 的持久化缓存
+日期与场地列表一天最多变化一次，按 item_type 缓存到磁盘，当天有效；
+主页加载完成后在后台刷新所有项目，打开任意项目可以直接跳到场地数据请求。
+"""
+import asyncio
+import datetime
+import json
+import os
+import threading
+
+import api_handler
+import async_api
+
+OPTIONS_FILE = 'booking_options.json'
+
+
+class OptionsCache:
+    def __init__(self, path=OPTIONS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None  # item_type -> {"day": "YYYY-MM-DD", "options": {...}}
+
+    def _load(self):
+        """调用方需持有 _lock"""
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._entries = json.load(f)
+                except Exception as e:
+                    print(f"加载预订配置缓存失败: {e}")
+        return self._entries
+
+    def _save(self):
+        """调用方需持有 _lock"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"保存预订配置缓存失败: {e}")
+
+    def get(self, item_type):
+        """返回当天缓存的配置，没有或已过期返回 None"""
+        with self._lock:
+            entry = self._load().get(item_type)
+        if entry and entry.get("day") == _today():
+            return entry["options"]
+        return None
+
+    def put(self, item_type, options):
+        """写入新配置；与当天的旧缓存不一致时打印差异，返回是否不一致"""
+        return self.put_many({item_type: options})[item_type]
+
+    def put_many(self, options_by_type):
+        """
+        批量写入 {item_type: options}，只写一次文件；返回 {item_type: 是否与旧缓存不一致}
+        日期列表每天都会顺延，只和当天的缓存比较，前一天的缓存不算不一致
+        """
+        today = _today()
+        with self._lock:
+            entries = self._load()
+            olds = {t: entries.get(t) for t in options_by_type}
+            for item_type, options in options_by_type.items():
+                entries[item_type] = {"day": today, "options": options}
+            self._save()
+        return {t: bool(old and old.get("day") == today and _report_drift(t, old["options"], options_by_type[t]))
+                for t, old in olds.items()}
+
+    def get_booking_options(self, item_type):
+        """与 api_handler.get_booking_options 相同的返回值: (success, result)"""
+        options = self.get(item_type)
+        if options is not None:
+            return True, options
+        success, result = api_handler.get_booking_options(item_type)
+        if success:
+            self.put(item_type, result)
+        return success, result
+
+    def refresh_all(self, item_types):
+        """并发刷新所有项目的配置 (在后台线程中调用)，返回 {item_type: 是否与旧缓存不一致}"""
+        async def fetch_all():
+            return await asyncio.gather(*(async_api.get_booking_options(t) for t in item_types))
+
+        fresh = {}
+        for item_type, (success, result) in zip(item_types, async_api.run(fetch_all())):
+            if success:
+                fresh[item_type] = result
+            else:
+                print(f"后台刷新预订配置失败 [{item_type}]: {result}")
+        return self.put_many(fresh) if fresh else {}
+
+
+def _today():
+    return datetime.date.today().strftime("%Y-%m-%d")
+
+
+def _report_drift(item_type, old, new):
+    changed = [k for k in ("dates", "areas") if old.get(k) != new.get(k)]
+    if not changed:
+        return False
+    for k in changed:
+        print(f"预订配置缓存与页面不一致 [{item_type}] {k}: 缓存={old.get(k)} 页面={new.get(k)}")
+    return True
+
+
+_cache = OptionsCache()
+
+
+def get_booking_options(item_type):
+    return _cache.get_booking_options(item_type)
+
+
+def refresh_all(item_types):
+    return _cache.refresh_all(item_types)
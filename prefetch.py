@@ -0,0 +1,69 @@
+"""
+打开项目时并发预取 "所有区域 × 未来7天" 的场地数据
+结果按 (area, date) 索引，每个单元到达时立即回调，便于窗口边收边用；
+成功的单元写入 venue_cache，之后切换日期/区域只需本地查表；
+缓存中仍然新鲜的单元不会重复请求。
+"""
+import asyncio
+import time
+
+import async_api
+import venue_cache
+
+PREFETCH_CONCURRENCY = 8  # 同时在途的 GetDayPlay 请求数
+
+
+async def prefetch_matrix(item_type, areas, dates, concurrency=PREFETCH_CONCURRENCY,
+                          on_cell=None, first=None):
+    """
+    并发获取 areas × dates 的全部场地数据
+    :param first: 优先请求的 (area, date)，通常是窗口默认显示的那一格
+    :param on_cell: 回调 on_cell(area, date, cell)，在事件循环线程中调用
+    :return: {(area, date): {"success": bool, "result": data/错误信息, "latency": 秒}}
+    """
+    keys = [(a, d) for a in areas for d in dates]
+    if first in keys:
+        keys.remove(first)
+        keys.insert(0, first)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+
+    async def fetch(area, date):
+        start = time.perf_counter()
+        cached = venue_cache.peek(item_type, area, date)
+        if cached is not None:
+            success, result = True, cached
+        else:
+            async with semaphore:
+                start = time.perf_counter()
+                success, result = await async_api.get_venue_data(item_type, area, date)
+            if success:
+                venue_cache.put(item_type, area, date, result)
+        latency = time.perf_counter() - start
+        cell = {"success": success, "result": result, "latency": latency}
+        results[(area, date)] = cell
+        if on_cell:
+            on_cell(area, date, cell)
+
+    await asyncio.gather(*(fetch(a, d) for a, d in keys))
+    return results
+
+
+def prefetch(item_type, areas, dates, concurrency=PREFETCH_CONCURRENCY, on_cell=None, first=None):
+    """同步入口 (在工作线程中调用，阻塞直到全部单元返回)"""
+    start = time.perf_counter()
+    results = async_api.run(prefetch_matrix(item_type, areas, dates, concurrency, on_cell, first))
+    print(format_report(results, time.perf_counter() - start))
+    return results
+
+
+def format_report(results, elapsed):
+    """预取耗时汇总: 成功数、总耗时、单元延迟分布"""
+    latencies = sorted(c["latency"] for c in results.values())
+    if not latencies:
+        return "预取完成: 0 个单元"
+    ok = sum(1 for c in results.values() if c["success"])
+    p50 = latencies[len(latencies) // 2]
+    return (f"预取完成: {ok}/{len(results)} 个单元成功, 总耗时 {elapsed:.2f}s, "
+            f"单元延迟 p50={p50 * 1000:.0f}ms max={latencies[-1] * 1000:.0f}ms")
@@ -0,0 +1,202 @@
+"""
+任务列表 (虚拟化，单个 Canvas 绘制)
+原来每次刷新都重新读库、销毁并重建每个任务的卡片 (1 个 Frame + 4 个控件)，几百个任务时明显变慢。
+这里:
+1. 任务按日期分组排好行，只绘制视口内的行，滚动时补画/删除
+2. 由 task_manager 的增删改通知增量更新，不再整表重读
+3. "取消" 按任务的稳定 id 删除，不依赖列表下标
+"""
+import tkinter as tk
+
+# --- 配置 ---
+ROW_H = 66          # 任务行高度 (像素)
+GROUP_H = 26        # 日期分组标题行高度
+PAD = 5
+BTN_W = 48
+BTN_H = 24
+OVERSCAN = 2        # 视口外额外多画的行数
+
+BG = "#f2f2f2"
+CARD_BG = "white"
+
+STATUS_TEXT = {
+    'success': ("抢票成功", "#2E8B57"),
+    'failed': ("抢票失败", "#FF6347"),
+    'expired': ("已过期", "#888"),
+}
+
+
+def layout_rows(tasks):
+    """
+    按日期分组排版: 返回 [(kind, payload, y), ...] 与总高度
+    kind 为 'group' (payload 为日期) 或 'task' (payload 为任务)
+    """
+    rows = []
+    y = 0
+    current = None
+    for task in sorted(tasks, key=lambda t: (t['date'], t['time'], t['id'])):
+        if task['date'] != current:
+            current = task['date']
+            rows.append(('group', current, y))
+            y += GROUP_H
+        rows.append(('task', task, y))
+        y += ROW_H
+    return rows, y
+
+
+class TaskListView(tk.Frame):
+    """
+    on_delete(task_id) 在点击某行的 "取消" 时触发
+    """
+
+    def __init__(self, parent, on_delete=None, width=310):
+        super().__init__(parent, bg=BG)
+        self.on_delete = on_delete
+        self.width = width
+        self.tasks = {}      # id -> task
+        self.rows = []
+        self._drawn = {}     # 行号 -> [item id, ...]
+        self._visible = None
+
+        scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.canvas = tk.Canvas(self, bg=BG, highlightthickness=0, width=width, yscrollcommand=scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<Configure>", lambda e: self._render_viewport())
+        self.canvas.bind("<Button-1>", self._on_click)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind(seq, self._on_mousewheel)
+
+    # --- 数据 ---
+    def set_tasks(self, tasks):
+        """整表替换 (首次加载或手动刷新)"""
+        self.tasks = {t['id']: t for t in tasks}
+        self._relayout()
+
+    def add_tasks(self, tasks):
+        for t in tasks:
+            self.tasks[t['id']] = t
+        self._relayout()
+
+    def remove_task(self, task_id):
+        if self.tasks.pop(task_id, None) is not None:
+            self._relayout()
+
+    def update_task(self, task_id, fields):
+        """任务状态等附加字段变化: 位置不变，只重画这一行 (若可见)"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return
+        task.update(fields)
+        for i, (kind, payload, _) in enumerate(self.rows):
+            if kind == 'task' and payload['id'] == task_id:
+                if i in self._drawn:
+                    self.canvas.delete(*self._drawn.pop(i))
+                    self._drawn[i] = self._draw_row(i)
+                break
+
+    def _relayout(self):
+        """行的位置变化后重新排版；只有视口内的行会被重新绘制"""
+        self.rows, height = layout_rows(self.tasks.values())
+        self.canvas.delete("all")
+        self._drawn = {}
+        self._visible = None
+        self.canvas.configure(scrollregion=(0, 0, self.width, max(height, 1)))
+        self._render_viewport()
+
+    # --- 滚动 ---
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self._render_viewport()
+
+    def yview_scroll(self, number, what):
+        self.canvas.yview_scroll(number, what)
+        self._render_viewport()
+
+    def _on_mousewheel(self, event):
+        if event.num == 5 or event.delta < 0:
+            self.yview_scroll(1, "units")
+        elif event.num == 4 or event.delta > 0:
+            self.yview_scroll(-1, "units")
+
+    # --- 绘制 ---
+    def _row_at(self, y):
+        """二分查找 y 坐标所在的行"""
+        lo, hi = 0, len(self.rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.rows[mid][2] <= y:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    def _render_viewport(self):
+        if not self.rows:
+            if self._visible != 'empty':
+                self._visible = 'empty'
+                self.canvas.create_text(self.width / 2, 40, text="暂无抢票任务", fill="#888")
+            return
+        y0 = self.canvas.canvasy(0)
+        y1 = y0 + max(self.canvas.winfo_height(), 1)
+        first = max(0, self._row_at(y0) - OVERSCAN)
+        last = min(len(self.rows), self._row_at(y1) + 1 + OVERSCAN)
+        if (first, last) == self._visible:
+            return
+        self._visible = (first, last)
+        for i in list(self._drawn):
+            if not first <= i < last:
+                self.canvas.delete(*self._drawn.pop(i))
+        for i in range(first, last):
+            if i not in self._drawn:
+                self._drawn[i] = self._draw_row(i)
+
+    def _draw_row(self, i):
+        kind, payload, y = self.rows[i]
+        c = self.canvas
+        if kind == 'group':
+            count = sum(1 for t in self.tasks.values() if t['date'] == payload)
+            return [c.create_text(PAD, y + GROUP_H / 2, anchor="w", text=f"{payload}  ({count})",
+                                  font=("Arial", 10, "bold"), fill="#555")]
+
+        task = payload
+        x0, y0, x1, y1 = PAD, y + PAD, self.width - PAD, y + ROW_H - PAD
+        items = [
+            c.create_rectangle(x0, y0, x1, y1, fill=CARD_BG, outline="#999"),
+            c.create_text(x0 + 10, y0 + 12, anchor="w", text=task['time'],
+                          font=("Arial", 10, "bold"), fill="#FF8C00"),
+            c.create_text(x0 + 10, y0 + 29, anchor="w", text=task['venue_name'], font=("Arial", 9)),
+            c.create_text(x0 + 10, y0 + 45, anchor="w", text=f"区域: {task['area_name']}",
+                          font=("Arial", 9, "italic"), fill="#666"),
+        ]
+        if task.get('account'):
+            items.append(c.create_text(x0 + 150, y0 + 45, anchor="w", text=f"账号尾号 {task['account'][-4:]}",
+                                       font=("Arial", 8), fill="#666"))
+        if task.get('ladder'):
+            items.append(c.create_text(x0 + 70, y0 + 12, anchor="w", text=f"+{len(task['ladder'])} 候补",
+                                       font=("Arial", 8), fill="#4682B4"))
+        status = STATUS_TEXT.get(task.get('status'))
+        if status:
+            items.append(c.create_text(x0 + 140, y0 + 12, anchor="w", text=status[0],
+                                       font=("Arial", 9, "bold"), fill=status[1]))
+        bx0, by0 = x1 - 10 - BTN_W, (y0 + y1) / 2 - BTN_H / 2
+        items.append(c.create_rectangle(bx0, by0, bx0 + BTN_W, by0 + BTN_H,
+                                        fill="#999" if status else "#FF6347", outline=""))
+        items.append(c.create_text(bx0 + BTN_W / 2, by0 + BTN_H / 2, text="删除" if status else "取消",
+                                   fill="white", font=("Arial", 9)))
+        return items
+
+    # --- 交互 ---
+    def _on_click(self, event):
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        i = self._row_at(y)
+        if i < 0 or self.on_delete is None:
+            return
+        kind, task, row_y = self.rows[i]
+        if kind != 'task':
+            return
+        bx1 = self.width - PAD - 10
+        by0 = row_y + ROW_H / 2 - BTN_H / 2
+        if bx1 - BTN_W <= x <= bx1 and by0 <= y <= by0 + BTN_H:
+            self.on_delete(task['id'])
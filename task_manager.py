@@ -1,59 +1,390 @@
 import json
 import os
+import sqlite3
 import threading
+import time
+from collections import defaultdict
 
-TASK_FILE = 'booking_tasks.json'
+import accounts
+
+TASK_FILE = 'booking_tasks.json'   # 旧版 JSON 存储，首次启动时自动迁移
+TASK_DB = 'booking_tasks.db'
 _lock = threading.Lock()
+_local = threading.local()
+_initialized = set()
+_listeners = []
 
-def load_tasks():
-    """加载所有任务"""
+# 单独建列 (带索引) 的字段，其余字段整体存入 extra
+_COLUMNS = ('venue_name', 'area_name', 'date', 'time', 'price', 'account', 'created_at')
+
+# 候补阶梯: 首选场地被抢走时按顺序尝试的其他 (场地, 时间)，票号提前从 GetDayPlay 数据中取出。
+# 内存中每一级是 dict，库中按下列字段顺序存成紧凑的 JSON 数组 [[场地, 时间, 票型, 票号, 价格], ...]
+LADDER_FIELDS = ('venue_name', 'time', 'TicketTypeNo', 'TicketLevelNo', 'price')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    venue_name  TEXT NOT NULL,
+    area_name   TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    time        TEXT NOT NULL,
+    price       REAL,
+    data        TEXT,
+    extra       TEXT,
+    ladder      TEXT,
+    account     TEXT NOT NULL DEFAULT '',
+    created_at  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_date ON tasks (date);
+CREATE INDEX IF NOT EXISTS idx_tasks_area_date ON tasks (area_name, date);
+"""
+# 同一场地时段每个账号各一个任务 (account 为空串表示默认账号)；旧库的 idx_tasks_slot 不含账号，升级时删除
+_SLOT_INDEX = """
+DROP INDEX IF EXISTS idx_tasks_slot;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_slot_account ON tasks (date, time, venue_name, area_name, account);
+"""
+
+class TaskIndex:
+    """
+    内存中的任务索引: (区域, 日期) -> {(场地, 时间): {账号, ...}}
+    查询与去重都是哈希查找，和任务总数无关；保存/删除任务时增量更新
+    同一场地时段可以给多个账号各设一个任务，网格上只显示为一个已设自动抢的格子
+    """
+
+    def __init__(self, tasks=()):
+        self._lock = threading.Lock()
+        self._cells = defaultdict(dict)
+        for t in tasks:
+            self.add(t)
+
+    @staticmethod
+    def key(task):
+        return (task['area_name'], task['date']), (task['venue_name'], task['time'])
+
+    def add(self, task):
+        group, slot = self.key(task)
+        with self._lock:
+            self._cells[group].setdefault(slot, set()).add(task.get('account'))
+
+    def remove(self, task):
+        group, slot = self.key(task)
+        with self._lock:
+            slots = self._cells.get(group)
+            if slots is None or slot not in slots:
+                return
+            slots[slot].discard(task.get('account'))
+            if not slots[slot]:
+                del slots[slot]
+            if not slots:
+                del self._cells[group]
+
+    def contains(self, task):
+        """该账号在这个场地时段是否已有任务"""
+        group, slot = self.key(task)
+        with self._lock:
+            return task.get('account') in self._cells.get(group, {}).get(slot, ())
+
+    def slots(self, area_name, date_str):
+        """返回该区域、日期下已设任务 (任一账号) 的 {(场地, 时间)} (副本)"""
+        with self._lock:
+            return set(self._cells.get((area_name, date_str), ()))
+
+_index = None
+
+def get_index():
+    """获取任务索引，首次调用时从数据库构建"""
+    global _index
+    with _lock:
+        if _index is not None:
+            return _index
+    index = TaskIndex(load_tasks())
+    with _lock:
+        if _index is None:
+            _index = index
+        return _index
+
+def reload_index():
+    """其他进程改动过任务库时，丢弃索引以便下次重建"""
+    global _index
+    with _lock:
+        _index = None
+
+def _connect():
+    """每个线程一个连接；首次连接时建表并迁移旧的 JSON 任务文件"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and getattr(_local, 'path', None) == TASK_DB:
+        return conn
+    conn = sqlite3.connect(TASK_DB, timeout=10)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    _local.conn, _local.path = conn, TASK_DB
+    with _lock:
+        if TASK_DB not in _initialized:
+            conn.executescript(_SCHEMA)
+            columns = {r[1] for r in conn.execute('PRAGMA table_info(tasks)')}
+            if 'ladder' not in columns:
+                conn.execute('ALTER TABLE tasks ADD COLUMN ladder TEXT')
+            if 'created_at' not in columns:
+                conn.execute('ALTER TABLE tasks ADD COLUMN created_at REAL')
+            if 'account' not in columns:
+                with conn:
+                    conn.execute("ALTER TABLE tasks ADD COLUMN account TEXT NOT NULL DEFAULT ''")
+                    _migrate_account_column(conn)
+            conn.executescript(_SLOT_INDEX)
+            _migrate_json(conn)
+            _initialized.add(TASK_DB)
+    return conn
+
+def _migrate_account_column(conn):
+    """旧库的 account 存在 extra 里，移到单独的列 (参与唯一索引)"""
+    rows = conn.execute("SELECT id, extra FROM tasks WHERE extra LIKE '%\"account\"%'").fetchall()
+    for task_id, extra in rows:
+        extra = json.loads(extra)
+        account = extra.pop('account', None)
+        conn.execute('UPDATE tasks SET account = ?, extra = ? WHERE id = ?',
+                     (accounts.canonical(account) or '', json.dumps(extra, ensure_ascii=False) if extra else None,
+                      task_id))
+
+def _migrate_json(conn):
+    """把旧版 booking_tasks.json 导入数据库，完成后重命名为 .migrated"""
     if not os.path.exists(TASK_FILE):
-        return []
+        return
     try:
         with open(TASK_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
+            tasks = json.load(f)
+    except Exception as e:
+        print(f"迁移旧任务文件失败: {e}")
+        return
+    with conn:
+        _insert_tasks(conn, tasks)
+    try:
+        os.replace(TASK_FILE, TASK_FILE + '.migrated')
+    except FileNotFoundError:
+        return  # 其他进程已完成迁移
+    print(f"已迁移 {len(tasks)} 个任务到 {TASK_DB}")
+
+def _is_extra(key):
+    return key not in _COLUMNS and key not in ('id', 'data', 'ladder')
+
+def _dump_ladder(ladder):
+    if not ladder:
+        return None
+    return json.dumps([[r.get(f) for f in LADDER_FIELDS] for r in ladder], ensure_ascii=False, separators=(',', ':'))
+
+def _to_row(task):
+    extra = {k: v for k, v in task.items() if _is_extra(k)}
+    return (task['venue_name'], task['area_name'], task['date'], task['time'], task.get('price'),
+            json.dumps(task.get('data'), ensure_ascii=False),
+            json.dumps(extra, ensure_ascii=False) if extra else None,
+            _dump_ladder(task.get('ladder')),
+            task.get('account') or '', task.get('created_at'))
+
+def _from_row(row):
+    task_id, venue_name, area_name, date, time, price, data, extra, ladder, account, created_at = row
+    # 先放 extra 再放列: 列是唯一可信的值 (旧版 update_task 可能把列字段也写进了 extra)
+    task = json.loads(extra) if extra else {}
+    task.update({"id": task_id, "venue_name": venue_name, "area_name": area_name,
+                 "date": date, "time": time, "price": price,
+                 "data": json.loads(data) if data else None, "created_at": created_at})
+    if account:
+        task["account"] = account
+    else:
+        task.pop("account", None)
+    if ladder:
+        task["ladder"] = [dict(zip(LADDER_FIELDS, r)) for r in json.loads(ladder)]
+    return task
+
+_INSERT_SQL = ('INSERT OR IGNORE INTO tasks '
+               '(venue_name, area_name, date, time, price, data, extra, ladder, account, created_at) '
+               'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)')
+
+def _normalize(task):
+    """account 统一成规范形式 (见 accounts.canonical)：默认账号的任务不带该字段"""
+    account = accounts.canonical(task.get('account'))
+    if account == task.get('account'):
+        return task
+    task = dict(task)
+    if account is None:
+        task.pop('account', None)
+    else:
+        task['account'] = account
+    return task
+
+def _insert_tasks(conn, tasks):
+    """批量插入，同一账号 (日期、时间、场地、区域) 重复的自动忽略；返回实际插入的条数"""
+    before = conn.total_changes
+    conn.executemany(_INSERT_SQL, [_to_row(_normalize(t)) for t in tasks])
+    return conn.total_changes - before
+
+def _insert_tasks_with_ids(conn, tasks):
+    """逐条插入并返回实际插入的任务 (带上新分配的 id)，供增量通知使用"""
+    inserted = []
+    for t in tasks:
+        cur = conn.execute(_INSERT_SQL, _to_row(t))
+        if cur.rowcount:
+            inserted.append(dict(t, id=cur.lastrowid))
+    return inserted
+
+def add_listener(callback):
+    """
+    订阅任务变动: callback(event, payload)，在改动任务的线程里调用
+    - ('added', [task, ...])      新增的任务 (带 id)
+    - ('deleted', task_id)
+    - ('updated', (task_id, fields))
+    """
+    with _lock:
+        _listeners.append(callback)
+
+def remove_listener(callback):
+    with _lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+def _notify(event, payload):
+    with _lock:
+        listeners = list(_listeners)
+    for callback in listeners:
+        try:
+            callback(event, payload)
+        except Exception as e:
+            print(f"任务变动通知失败: {e}")
+
+def load_tasks():
+    """加载所有任务 (按添加顺序)，每个任务带有稳定的 id"""
+    try:
+        rows = _connect().execute(
+            'SELECT id, venue_name, area_name, date, time, price, data, extra, ladder, account, created_at '
+            'FROM tasks ORDER BY id').fetchall()
+    except Exception as e:
+        print(f"加载任务失败: {e}")
         return []
+    return [_from_row(r) for r in rows]
 
 def save_task(new_tasks):
-    """保存新任务列表 (追加)"""
-    with _lock:
-        current_tasks = load_tasks()
-        # 简单的去重逻辑 (根据日期、时间、场地名)
-        for new_t in new_tasks:
-            is_exist = False
-            for old_t in current_tasks:
-                if (old_t['date'] == new_t['date'] and 
-                    old_t['time'] == new_t['time'] and 
-                    old_t['venue_name'] == new_t['venue_name'] and 
-                    old_t['area_name'] == new_t['area_name']):
-                    is_exist = True
-                    break
-            if not is_exist:
-                current_tasks.append(new_t)
-        
-        with open(TASK_FILE, 'w', encoding='utf-8') as f:
-            json.dump(current_tasks, f, indent=4, ensure_ascii=False)
+    """保存新任务列表 (追加)，同一事务内批量写入；没有 created_at 的任务记下创建时间 (执行器据此计算放行时刻)"""
+    index = get_index()
+    now = round(time.time(), 3)
+    new_tasks = [_normalize(t if 'created_at' in t else dict(t, created_at=now)) for t in new_tasks]
+    # 简单的去重逻辑 (根据账号、日期、时间、场地名、区域)：先查内存索引，
+    # 数据库唯一索引兜底其他进程写入的重复任务；不同账号可以各抢同一场地时段
+    fresh, seen = [], set()
+    for t in new_tasks:
+        key = TaskIndex.key(t) + (t.get('account'),)
+        if key not in seen and not index.contains(t):
+            seen.add(key)
+            fresh.append(t)
+    if not fresh:
+        return 0
+    conn = _connect()
+    with conn:
+        inserted = _insert_tasks_with_ids(conn, fresh)
+    for t in fresh:
+        index.add(t)
+    if inserted:
+        _notify('added', inserted)
+    return len(inserted)
+
+def make_ladder_task(selections):
+    """
+    把按优先顺序排列的多个选中格子合成一个带候补阶梯的任务:
+    第一个为首选，其余依次作为候补 (同一区域、日期)
+    """
+    primary, rest = selections[0], selections[1:]
+    task = dict(primary)
+    task["ladder"] = [{"venue_name": s["venue_name"], "time": s["time"],
+                       "TicketTypeNo": s["data"]["TicketTypeNo"], "TicketLevelNo": s["data"]["TicketLevelNo"],
+                       "price": s.get("price")}
+                      for s in rest]
+    return task
+
+def ladder_slots(task):
+    """任务依次尝试的全部场地: 首选 + 候补，每一级带好票号，执行时无需再查询"""
+    data = task['data']
+    slots = [{"venue_name": task['venue_name'], "time": task['time'],
+              "TicketTypeNo": data['TicketTypeNo'], "TicketLevelNo": data['TicketLevelNo'],
+              "price": task.get('price')}]
+    slots.extend(task.get('ladder') or ())
+    return slots
 
 def delete_task(task_index):
-    """删除指定索引的任务"""
-    with _lock:
-        tasks = load_tasks()
-        if 0 <= task_index < len(tasks):
-            tasks.pop(task_index)
-            with open(TASK_FILE, 'w', encoding='utf-8') as f:
-                json.dump(tasks, f, indent=4, ensure_ascii=False)
-            return True
+    """删除指定索引的任务 (索引对应 load_tasks() 的顺序)"""
+    if task_index < 0:
+        return False
+    conn = _connect()
+    with conn:
+        row = conn.execute('SELECT id FROM tasks ORDER BY id LIMIT 1 OFFSET ?', (task_index,)).fetchone()
+    if row is None:
+        return False
+    return delete_task_by_id(row[0])
+
+def delete_task_by_id(task_id):
+    """按任务 id 删除"""
+    index = get_index()
+    conn = _connect()
+    with conn:
+        row = conn.execute('SELECT venue_name, area_name, date, time, account FROM tasks WHERE id = ?',
+                           (task_id,)).fetchone()
+        if row is None:
+            return False
+        conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+    index.remove(_slot_of(row))
+    _notify('deleted', task_id)
+    return True
+
+_SLOT_FIELDS = ('venue_name', 'area_name', 'date', 'time', 'account')
+
+def _slot_of(row):
+    """(场地, 区域, 日期, 时间, 账号) 行 -> 索引用的任务 dict"""
+    return dict(zip(_SLOT_FIELDS, row[:4] + (row[4] or None,)))
+
+def update_task(task_id, **fields):
+    """
+    更新任务字段: 建了列的字段 (场地/区域/日期/时间/账号/价格/创建时间、data、ladder) 写回各自的列并同步索引，
+    其余 (执行状态、结果等) 合并进 extra；改成与同账号已有任务重复的场地时段时不做修改，返回 False
+    """
+    if 'account' in fields:
+        fields = dict(fields, account=accounts.canonical(fields['account']))
+    index = get_index()
+    conn = _connect()
+    try:
+        with conn:
+            row = conn.execute('SELECT venue_name, area_name, date, time, account, extra FROM tasks WHERE id = ?',
+                               (task_id,)).fetchone()
+            if row is None:
+                return False
+            extra = json.loads(row[5]) if row[5] else {}
+            extra.update((k, v) for k, v in fields.items() if _is_extra(k))
+            values = {k: fields[k] for k in _COLUMNS if k in fields}
+            if 'account' in values:
+                values['account'] = values['account'] or ''
+            if 'data' in fields:
+                values['data'] = json.dumps(fields['data'], ensure_ascii=False)
+            if 'ladder' in fields:
+                values['ladder'] = _dump_ladder(fields['ladder'])
+            values['extra'] = json.dumps(extra, ensure_ascii=False) if extra else None
+            conn.execute('UPDATE tasks SET ' + ', '.join(f'{k} = ?' for k in values) + ' WHERE id = ?',
+                         (*values.values(), task_id))
+    except sqlite3.IntegrityError:
+        print(f"更新任务 {task_id} 失败: 该账号在这个场地时段已有任务")
         return False
+    old = _slot_of(row)
+    new = dict(old, **{k: fields[k] for k in _SLOT_FIELDS if k in fields})
+    if new != old:
+        index.remove(old)
+        index.add(new)
+    _notify('updated', (task_id, fields))
+    return True
 
 def get_scheduled_cells(area_name, date_str):
     """
     获取指定区域和日期下，已经被设置为自动抢的时间点集合
     返回 set: {'08:00', '09:00'}
     """
-    tasks = load_tasks()
-    booked_times = set()
-    for t in tasks:
-        if t.get('area_name') == area_name and t.get('date') == date_str:
-            booked_times.add(t.get('time'))
-    return booked_times
\ No newline at end of file
+    return {time for _, time in get_index().slots(area_name, date_str)}
+
+def get_scheduled_slots(area_name, date_str):
+    """
+    获取指定区域和日期下，已经被设置为自动抢的 (场地, 时间) 集合
+    返回 set: {('北训场20号场', '21:00')}
+    """
+    return get_index().slots(area_name, date_str)
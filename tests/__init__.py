@@ -0,0 +1,18 @@
+"""
+测试在临时目录中运行: Cookie、任务库、缓存等按相对路径读写的文件都落在这里，不会改动工作目录下的真实数据
+运行: python -m unittest discover -s tests -t .
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix='yyticket-test-')
+os.chdir(WORKDIR)
+# 先注册的后执行: 各 Cookie 存储退出时的写盘完成后再删除临时目录
+atexit.register(shutil.rmtree, WORKDIR, True)
@@ -0,0 +1,96 @@
+"""
+测试公用: 本地替身服务、登录、独立任务库、假时钟
+"""
+import datetime
+import os
+import threading
+import unittest
+
+import accounts
+import api_handler
+import mock_server
+import task_manager
+
+ITEM_TYPE = '0004'
+AREAS = ('羽毛球北训场', '羽毛球南训场')
+PHONE = '13800000000'
+
+
+class FakeClock:
+    """executor 可注入的时钟: sleep / spin_until 不真正等待，直接把时间拨到目标时刻"""
+
+    def __init__(self, start):
+        self._now = start
+        self._lock = threading.Lock()
+        self.slept = 0.0
+
+    def now(self):
+        with self._lock:
+            return self._now
+
+    def sleep(self, seconds):
+        with self._lock:
+            if seconds > 0:
+                self._now += seconds
+                self.slept += seconds
+
+    def spin_until(self, target):
+        with self._lock:
+            self._now = max(self._now, target)
+
+
+def at(day, hour=0, minute=0):
+    """本地时间 day (date) 的 hour:minute 对应的时间戳"""
+    return datetime.datetime.combine(day, datetime.time(hour, minute)).timestamp()
+
+
+def login(account=None, phone=PHONE):
+    """在替身服务上登录 (任意 6 位验证码均可通过)"""
+    ok, msg = api_handler.check_login(phone, '123456', account=account)
+    assert ok, msg
+    api_handler.save_user_phone(phone, account=account)
+
+
+def free_tasks(server, day, count, area=AREAS[0], **fields):
+    """从替身服务的场地数据中取 count 个 (None 为全部) 当前可预约的格子，构造成界面保存的任务格式"""
+    tasks = []
+    for venue in server.state.venue_data(ITEM_TYPE, area, day):
+        for cell in venue['rtnlist']:
+            if cell['CDefault8'] == "0" and not cell['Description']:
+                tasks.append(dict({"item_type": ITEM_TYPE, "venue_name": venue['name'], "area_name": area,
+                                   "date": day, "time": cell['TicketLevelName'], "price": cell['MemberPrice'],
+                                   "data": cell}, **fields))
+                if len(tasks) == count:
+                    return tasks
+    if count is None:
+        return tasks
+    raise AssertionError(f"{area} {day} 没有 {count} 个可预约的格子")
+
+
+class MockServerTestCase(unittest.TestCase):
+    """每个用例一个替身服务、一个空任务库，默认账号已登录"""
+
+    server_kwargs = {}
+
+    def setUp(self):
+        self.server = mock_server.start(**self.server_kwargs)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        api_handler.set_base_url(self.server.base_url)
+
+        old_db = task_manager.TASK_DB
+        task_manager.TASK_DB = os.path.abspath(f"tasks-{id(self)}.db")
+        task_manager.reload_index()
+
+        def restore_db():
+            task_manager.TASK_DB = old_db
+            task_manager.reload_index()
+        self.addCleanup(restore_db)
+
+        api_handler.clear_login_info()
+        login()
+
+    def add_account(self, phone):
+        account = accounts.get_account(phone)
+        login(account, phone)
+        return account
@@ -0,0 +1,206 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from unittest import mock
+
+import accounts
+import api_handler
+import async_api
+import executor
+import mock_server
+import task_manager
+from tests import support
+
+OTHER = '13900000001'
+THIRD = '13900000002'
+
+
+class AccountIsolationTest(support.MockServerTestCase):
+    def test_sessions_and_pools_are_separate(self):
+        other = self.add_account(OTHER)
+        default = accounts.get_account()
+        self.assertIsNot(other.client, default.client)
+        sid = other.cookies.get(mock_server.SESSION_COOKIE)
+        self.assertIsNotNone(sid)
+        self.assertNotEqual(sid, default.cookies.get(mock_server.SESSION_COOKIE))
+        self.assertEqual(api_handler.get_current_user(OTHER), OTHER)
+        self.assertEqual(api_handler.get_current_user(), support.PHONE)
+
+        day = (datetime.date.today() + datetime.timedelta(days=2)).isoformat()
+        task = support.free_tasks(self.server, day, 1, account=OTHER)[0]
+        prepared = api_handler.prepare_booking(task)
+        self.assertIs(prepared.account, other)
+        self.assertIn(f"{mock_server.SESSION_COOKIE}={sid}", prepared.headers['Cookie'])
+
+        before = dict(self.server.state._sessions)
+        self.assertEqual(api_handler.send_booking(prepared), (True, "预订成功"))
+        after = self.server.state._sessions
+        self.assertEqual(after[sid], before[sid] + 1)
+        default_sid = default.cookies.get(mock_server.SESSION_COOKIE)
+        self.assertEqual(after[default_sid], before[default_sid])
+
+    def test_reads_use_the_given_account(self):
+        other = self.add_account(OTHER)
+        sid = other.cookies.get(mock_server.SESSION_COOKIE)
+        default_sid = accounts.get_account().cookies.get(mock_server.SESSION_COOKIE)
+        day = (datetime.date.today() + datetime.timedelta(days=2)).isoformat()
+        sessions = self.server.state._sessions
+
+        before = dict(sessions)
+        ok, _ = api_handler.get_venue_data(support.ITEM_TYPE, support.AREAS[0], day, account=OTHER)
+        self.assertTrue(ok)
+        ok, _ = async_api.run(async_api.get_venue_data(support.ITEM_TYPE, support.AREAS[0], day, account=OTHER))
+        self.assertTrue(ok)
+        self.assertEqual(sessions[sid], before[sid] + 2)
+        self.assertEqual(sessions[default_sid], before[default_sid])
+
+        async_api.run(async_api.get_venue_data(support.ITEM_TYPE, support.AREAS[0], day))
+        self.assertEqual(sessions[default_sid], before[default_sid] + 1)
+
+    def test_default_phone_is_the_default_account(self):
+        self.assertIs(accounts.get_account(support.PHONE), accounts.get_account())
+        self.assertIsNone(accounts.canonical(support.PHONE))
+        self.assertEqual(accounts.canonical(OTHER), OTHER)
+
+
+class MultiAccountTaskTest(support.MockServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.day = (datetime.date.today() + datetime.timedelta(days=2)).isoformat()
+        self.task = support.free_tasks(self.server, self.day, 1)[0]
+
+    def test_same_slot_for_two_accounts_is_kept(self):
+        self.assertEqual(task_manager.save_task([self.task]), 1)
+        self.assertEqual(task_manager.save_task([dict(self.task, account=OTHER)]), 1)
+        tasks = task_manager.load_tasks()
+        self.assertEqual([t.get('account') for t in tasks], [None, OTHER])
+        self.assertEqual(task_manager.get_scheduled_slots(self.task['area_name'], self.day),
+                         {(self.task['venue_name'], self.task['time'])})
+
+        task_manager.delete_task_by_id(tasks[0]['id'])
+        self.assertEqual(len(task_manager.get_scheduled_slots(self.task['area_name'], self.day)), 1)
+
+    def test_default_phone_duplicates_default_account(self):
+        self.assertEqual(task_manager.save_task([self.task]), 1)
+        self.assertEqual(task_manager.save_task([dict(self.task, account=support.PHONE)]), 0)
+        self.assertNotIn('account', task_manager.load_tasks()[0])
+
+    def test_database_rejects_same_account_duplicate(self):
+        # 绕过内存索引 (模拟另一进程写入)，由唯一索引兜底
+        task_manager.save_task([dict(self.task, account=OTHER)])
+        task_manager.reload_index()
+        conn = task_manager._connect()
+        with conn:
+            self.assertEqual(task_manager._insert_tasks(conn, [dict(self.task, account=OTHER)]), 0)
+            self.assertEqual(task_manager._insert_tasks(conn, [dict(self.task, account=THIRD)]), 1)
+
+    def test_update_writes_slot_fields_to_columns(self):
+        task_manager.save_task([self.task, dict(self.task, account=OTHER)])
+        first, second = task_manager.load_tasks()
+        area = self.task['area_name']
+        self.assertTrue(task_manager.update_task(first['id'], time='23:00', account=THIRD, status='pending'))
+
+        task = task_manager.load_tasks()[0]
+        self.assertEqual((task['time'], task['account'], task['status']), ('23:00', THIRD, 'pending'))
+        conn = task_manager._connect()
+        time_col, account_col, extra = conn.execute(
+            'SELECT time, account, extra FROM tasks WHERE id = ?', (first['id'],)).fetchone()
+        self.assertEqual((time_col, account_col), ('23:00', THIRD))
+        self.assertEqual(json.loads(extra).keys() & set(task_manager._COLUMNS), set())
+        self.assertEqual(task_manager.get_scheduled_slots(area, self.day),
+                         {(self.task['venue_name'], self.task['time']), (self.task['venue_name'], '23:00')})
+        self.assertTrue(task_manager.get_index().contains(dict(self.task, time='23:00', account=THIRD)))
+        self.assertFalse(task_manager.get_index().contains(self.task))
+
+        # 改成同账号已有的场地时段: 唯一索引拒绝，库和索引都保持原样
+        self.assertFalse(task_manager.update_task(first['id'], time=self.task['time'], account=OTHER))
+        self.assertEqual(task_manager.load_tasks()[0]['time'], '23:00')
+        self.assertTrue(task_manager.get_index().contains(dict(self.task, time='23:00', account=THIRD)))
+
+        # 改回默认账号 (用默认手机号表示) 时列存空串，读出时不带 account
+        self.assertTrue(task_manager.update_task(second['id'], account=support.PHONE))
+        self.assertNotIn('account', task_manager.load_tasks()[1])
+        self.assertTrue(task_manager.get_index().contains(self.task))
+
+    def test_hedge_key_and_inflight_are_normalized(self):
+        runner = executor.BookingExecutor()
+        explicit = dict(self.task, account=support.PHONE)
+        self.assertEqual(executor.hedge_key(self.task), executor.hedge_key(explicit))
+        self.assertIs(runner.inflight_limit(None), runner.inflight_limit(support.PHONE))
+        self.assertIs(runner.inflight_limit(None), runner.inflight_limit(accounts.get_account()))
+        self.assertIsNot(runner.inflight_limit(None), runner.inflight_limit(OTHER))
+
+
+class AccountColumnMigrationTest(support.MockServerTestCase):
+    def test_old_database_is_upgraded(self):
+        path = os.path.abspath(f"old-{id(self)}.db")
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, venue_name TEXT NOT NULL,
+                area_name TEXT NOT NULL, date TEXT NOT NULL, time TEXT NOT NULL, price REAL,
+                data TEXT, extra TEXT, ladder TEXT);
+            CREATE UNIQUE INDEX idx_tasks_slot ON tasks (date, time, venue_name, area_name);
+        """)
+        conn.execute("INSERT INTO tasks (venue_name, area_name, date, time, data, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                     ('1号场', 'A', '2026-01-01', '08:00', '{}', json.dumps({"account": OTHER, "status": "pending"})))
+        conn.commit()
+        conn.close()
+        task_manager.TASK_DB = path
+        task_manager.reload_index()
+
+        task = task_manager.load_tasks()[0]
+        self.assertEqual(task['account'], OTHER)
+        self.assertEqual(task['status'], 'pending')
+        same_slot = {"venue_name": '1号场', "area_name": 'A', "date": '2026-01-01', "time": '08:00',
+                     "data": {"TicketTypeNo": 't', "TicketLevelNo": 'l'}}
+        self.assertEqual(task_manager.save_task([same_slot]), 1)
+        self.assertEqual(task_manager.save_task([dict(same_slot, account=OTHER)]), 0)
+
+
+class InflightCapTest(support.MockServerTestCase):
+    """每个账号的在途下单请求不超过 max_inflight，且账号之间互不占用"""
+
+    MAX_INFLIGHT = 2
+
+    def test_cap_is_per_account(self):
+        self.add_account(OTHER)
+        today = datetime.date.today()
+        clock = support.FakeClock(support.at(today, 20, 30))
+        day = (today + datetime.timedelta(days=2)).isoformat()
+        tasks = (support.free_tasks(self.server, day, 3, created_at=clock.now()) +
+                 support.free_tasks(self.server, day, 3, area=support.AREAS[1], account=OTHER,
+                                    created_at=clock.now()))
+        task_manager.save_task(tasks)
+
+        lock = threading.Lock()
+        inflight, peak = {}, {}
+        total = {"now": 0, "peak": 0}
+
+        def slow_failure(prepared):
+            # 全部失败，每一份对冲都会真正发出，在途数才能压到上限
+            name = prepared.account.name
+            with lock:
+                inflight[name] = inflight.get(name, 0) + 1
+                peak[name] = max(peak.get(name, 0), inflight[name])
+                total["now"] += 1
+                total["peak"] = max(total["peak"], total["now"])
+            time.sleep(0.05)
+            with lock:
+                inflight[name] -= 1
+                total["now"] -= 1
+            return False, "该场地已被预订"
+
+        runner = executor.BookingExecutor(clock=clock, hedge_attempts=4, hedge_stagger=0,
+                                          max_inflight=self.MAX_INFLIGHT)
+        with mock.patch.object(api_handler, 'send_booking', slow_failure):
+            results = runner.run_once()
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(peak, {None: self.MAX_INFLIGHT, OTHER: self.MAX_INFLIGHT})
+        self.assertEqual(total["peak"], 2 * self.MAX_INFLIGHT)
+        attempts = [a for t in task_manager.load_tasks() for a in t['attempts']]
+        self.assertEqual(len(attempts), 6 * 4)
+        self.assertFalse(any(a.get('cancelled') for a in attempts))
@@ -0,0 +1,87 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import clock_sync
+from tests import support
+
+
+class EstimateTest(unittest.TestCase):
+    def test_bounds_from_synthetic_samples(self):
+        # 服务器比本地快 2.3 秒，RTT 20ms，Date 截断到整秒
+        skew, rtt = 2.3, 0.02
+        samples = []
+        for i in range(20):
+            t0 = 1000.0 + i * 0.37
+            server_read = t0 + rtt / 2 + skew
+            samples.append((t0, t0 + rtt, float(int(server_read))))
+        est = clock_sync.estimate(samples)
+        self.assertTrue(est["consistent"])
+        self.assertLessEqual(est["lower"], skew)
+        self.assertGreaterEqual(est["upper"], skew)
+        self.assertLess(est["upper"] - est["lower"], 0.1)
+        self.assertAlmostEqual(est["rtt_min"], rtt)
+
+    def test_inconsistent_samples_fall_back_to_midpoints(self):
+        est = clock_sync.estimate([(0.0, 0.01, 10.0), (1.0, 1.01, 5.0)])
+        self.assertFalse(est["consistent"])
+        self.assertLessEqual(est["lower"], est["offset"])
+        self.assertLessEqual(est["offset"], est["upper"])
+
+    def test_empty(self):
+        self.assertIsNone(clock_sync.estimate([]))
+
+    def test_rtt_quantiles_match_metrics(self):
+        samples = [(0.0, rtt / 100, 10.0) for rtt in range(1, 11)]
+        est = clock_sync.estimate(samples)
+        self.assertAlmostEqual(est["rtt_p50"], 0.05)
+        self.assertAlmostEqual(est["rtt_p90"], 0.09)
+        self.assertAlmostEqual(est["rtt_p99"], 0.10)
+
+
+class RefreshLoopTest(unittest.TestCase):
+    def _run_loop(self, sync):
+        measured = threading.Event()
+        with mock.patch.object(sync, 'measure', side_effect=measured.set):
+            sync.start(interval=60)
+            try:
+                measured.wait(0.2)
+            finally:
+                sync.stop()
+        return measured.is_set()
+
+    def test_fresh_estimate_is_not_measured_again(self):
+        sync = clock_sync.ClockSync()
+        sync._estimate = {"offset": 0.0, "measured_at": time.time()}
+        self.assertFalse(self._run_loop(sync))
+
+    def test_measures_immediately_without_estimate(self):
+        self.assertTrue(self._run_loop(clock_sync.ClockSync()))
+
+
+class SkewedServerTest(support.MockServerTestCase):
+    """对 --clock-skew 的替身服务实测: 估计的区间应包含注入的偏差"""
+
+    SKEW = 2.5
+    server_kwargs = {"clock_skew": SKEW}
+
+    def test_estimate_contains_injected_skew(self):
+        sync = clock_sync.ClockSync(samples=10)
+        est = sync.measure()
+        self.assertIsNotNone(est)
+        self.assertEqual(est["samples"], 10)
+        self.assertTrue(est["consistent"])
+        self.assertLessEqual(est["lower"], self.SKEW)
+        self.assertGreaterEqual(est["upper"], self.SKEW)
+        # 探测相位错开在一秒内，区间应收窄到远小于 Date 的 1 秒精度
+        self.assertLess(est["upper"] - est["lower"], 0.5)
+
+    def test_send_time_is_never_early(self):
+        sync = clock_sync.ClockSync(samples=10)
+        est = sync.measure()
+        release = 2_000_000_000.0
+        send_at = sync.local_send_time(release)
+        # 按真实偏差换算，请求到达服务器时 (发送 + 单程时延) 不早于放号时刻
+        self.assertGreaterEqual(send_at + self.SKEW + est["rtt_min"] / 2, release)
+        self.assertLess(send_at + self.SKEW - release, 0.5)
@@ -0,0 +1,179 @@
+import copy
+import datetime
+import threading
+import unittest
+from unittest import mock
+
+import executor
+import task_manager
+import watcher
+from tests import support
+
+
+class ExecutorClockTest(support.MockServerTestCase):
+    """执行器在假时钟下对替身服务下单: 等待不真正睡眠，放行时刻可精确断言"""
+
+    def setUp(self):
+        super().setUp()
+        self.today = datetime.date.today()
+        self.clock = support.FakeClock(support.at(self.today, 20, 30))
+        self.day = (self.today + datetime.timedelta(days=3)).isoformat()
+        self.runner = executor.BookingExecutor(clock=self.clock, hedge_attempts=1)
+
+    def submitted(self):
+        return self.server.state.counts.get('SubmitOrder', 0)
+
+    def test_task_created_in_the_evening_fires_next_morning(self):
+        task_manager.save_task(support.free_tasks(self.server, self.day, 1, created_at=self.clock.now()))
+
+        release_at, batch = self.runner.next_batch()
+        next_morning = support.at(self.today + datetime.timedelta(days=1), 8)
+        self.assertEqual(release_at, next_morning)
+        self.assertGreater(release_at, self.clock.now())
+        self.assertEqual(self.submitted(), 0)
+
+        results = self.runner.run_once()
+        self.assertEqual(list(results.values()), [(True, "预订成功")])
+        self.assertEqual(self.submitted(), 1)
+        task = task_manager.load_tasks()[0]
+        self.assertEqual(task['status'], executor.STATUS_SUCCESS)
+        self.assertGreaterEqual(task['fired_at'], next_morning)
+        self.assertLess(task['fired_at'], next_morning + 1)
+        self.assertGreater(self.clock.slept, 11 * 3600)
+
+    def test_visible_dates_are_all_scheduled_in_the_future(self):
+        days = [(self.today + datetime.timedelta(days=i)).isoformat() for i in range(7)]
+        for day in days:
+            task_manager.save_task(support.free_tasks(self.server, day, 1, created_at=self.clock.now()))
+        release_at, batch = self.runner.next_batch()
+        self.assertGreater(release_at, self.clock.now())
+        self.assertEqual(sorted(t['date'] for t in batch), days)
+
+    def test_missed_release_is_expired_not_fired(self):
+        created = self.clock.now() - 3 * 86400
+        task_manager.save_task(support.free_tasks(self.server, self.day, 1, created_at=created))
+
+        self.assertIsNone(self.runner.run_once())
+        self.assertEqual(self.submitted(), 0)
+        task = task_manager.load_tasks()[0]
+        self.assertEqual(task['status'], executor.STATUS_EXPIRED)
+        self.assertIn("错过放行时刻", task['result'])
+
+    def test_late_within_grace_fires_immediately(self):
+        self.clock = support.FakeClock(support.at(self.today, 8) + executor.LATE_GRACE / 2)
+        self.runner = executor.BookingExecutor(clock=self.clock, hedge_attempts=1)
+        created = support.at(self.today - datetime.timedelta(days=1), 21)
+        task_manager.save_task(support.free_tasks(self.server, self.day, 1, created_at=created))
+
+        results = self.runner.run_once()
+        self.assertEqual(list(results.values()), [(True, "预订成功")])
+        self.assertEqual(self.clock.slept, 0)
+
+    def test_legacy_task_gets_created_at(self):
+        task = support.free_tasks(self.server, self.day, 1)[0]
+        task_manager.save_task([task])
+        task_manager.update_task(task_manager.load_tasks()[0]['id'], created_at=None)
+
+        release_at, _ = self.runner.next_batch()
+        self.assertEqual(task_manager.load_tasks()[0]['created_at'], self.clock.now())
+        self.assertEqual(release_at, support.at(self.today + datetime.timedelta(days=1), 8))
+
+    def test_release_at_overrides_rule(self):
+        release = datetime.datetime.combine(self.today, datetime.time(22, 0))
+        task_manager.save_task(support.free_tasks(self.server, self.day, 1, release_at=release.isoformat(),
+                                                  created_at=self.clock.now()))
+        release_at, _ = self.runner.next_batch()
+        self.assertEqual(release_at, release.timestamp())
+
+
+
+class HedgeGroupTest(support.MockServerTestCase):
+    def setUp(self):
+        super().setUp()
+        today = datetime.date.today()
+        self.clock = support.FakeClock(support.at(today, 20, 30))
+        self.day = (today + datetime.timedelta(days=3)).isoformat()
+        self.runner = executor.BookingExecutor(clock=self.clock, hedge_attempts=2, hedge_stagger=0.005)
+
+    def same_ticket_in_two_areas(self):
+        """替身服务的票号只由项目、场地序号、日期和钟点决定，两个区域同一位置的格子票号相同"""
+        by_ticket = {}
+        for area in support.AREAS:
+            for t in support.free_tasks(self.server, self.day, None, area=area, created_at=self.clock.now()):
+                by_ticket.setdefault((t['data']['TicketTypeNo'], t['data']['TicketLevelNo']), []).append(t)
+        pair = next((tasks for tasks in by_ticket.values() if len(tasks) == 2), None)
+        self.assertIsNotNone(pair, "两个区域没有票号相同且都可预约的格子")
+        return pair
+
+    def test_same_ticket_in_different_areas_is_booked_separately(self):
+        north, south = self.same_ticket_in_two_areas()
+        self.assertNotEqual(executor.hedge_key(north), executor.hedge_key(south))
+        task_manager.save_task([north, south])
+
+        results = self.runner.run_once()
+        self.assertEqual(sorted(results.values()), [(True, "预订成功"), (True, "预订成功")])
+        for area in support.AREAS:
+            booked = self.server.state._booked.get((support.ITEM_TYPE, area, self.day), set())
+            self.assertIn((north['venue_name'].replace(support.AREAS[0], area), north['time']), booked)
+
+    def test_duplicate_slot_shares_one_group(self):
+        task = support.free_tasks(self.server, self.day, 1, created_at=self.clock.now())[0]
+        groups = self.runner._prepare_groups([dict(task, id=1), dict(task, id=2)])
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(len(groups[0].tasks), 2)
+
+
+class ObserveTest(support.MockServerTestCase):
+    """监视器报告首选场地被订走后，执行器直接从候补开始下单"""
+
+    def test_taken_primary_is_skipped(self):
+        today = datetime.date.today()
+        clock = support.FakeClock(support.at(today, 20, 30))
+        day = (today + datetime.timedelta(days=3)).isoformat()
+        area = support.AREAS[0]
+        primary, backup = support.free_tasks(self.server, day, 2, created_at=clock.now())
+        task_manager.save_task([task_manager.make_ladder_task([primary, backup])])
+
+        data = self.server.state.venue_data(support.ITEM_TYPE, area, day)
+        responses = [data, copy.deepcopy(data)]
+        for venue in responses[1]:
+            for cell in venue['rtnlist']:
+                if venue['name'] == primary['venue_name'] and cell['TicketLevelName'] == primary['time']:
+                    cell['CDefault8'] = "1"
+        w = watcher.AvailabilityWatcher(fetch=lambda *key: (True, responses.pop(0)), clock=clock.now)
+        runner = executor.BookingExecutor(clock=clock, hedge_attempts=1)
+        runner.observe(w)
+        key = (support.ITEM_TYPE, area, day)
+        self.assertIn(key, w._targets)
+        self.assertEqual(w._targets[key].release_at, support.at(today + datetime.timedelta(days=1), 8))
+
+        self.assertEqual(w.poll(key), [])
+        self.assertEqual(len(w.poll(key)), 1)
+        self.assertIn((area, day, primary['venue_name'], primary['time']), runner._taken)
+        groups = runner._prepare_groups(task_manager.load_tasks())
+        self.assertEqual([(r.slot['venue_name'], r.slot['time']) for r in groups[0].rungs],
+                         [(backup['venue_name'], backup['time'])])
+
+
+class RunForeverTest(unittest.TestCase):
+    def test_batch_error_does_not_stop_scheduling(self):
+        stop = threading.Event()
+        errors = []
+
+        class Flaky(executor.BookingExecutor):
+            calls = 0
+
+            def next_batch(self, tasks=None):
+                return self.clock.now(), []
+
+            def run_batch(self, release_at, tasks):
+                Flaky.calls += 1
+                if Flaky.calls == 1:
+                    raise RuntimeError("boom")
+                stop.set()
+
+        runner = Flaky(clock=support.FakeClock(0.0))
+        with mock.patch.object(executor, 'ERROR_RETRY_INTERVAL', 0):
+            runner.run_forever(stop, on_error=errors.append)
+        self.assertEqual(Flaky.calls, 2)
+        self.assertEqual([str(e) for e in errors], ["boom"])
@@ -0,0 +1,92 @@
+import unittest
+
+import metrics
+
+
+class QuantileTest(unittest.TestCase):
+    def test_nearest_rank(self):
+        self.assertIsNone(metrics.quantile([], 0.5))
+        self.assertEqual(metrics.quantile([7], 0.99), 7)
+        self.assertEqual(metrics.quantile([1, 2], 0.5), 1)
+        values = list(range(1, 101))
+        self.assertEqual(metrics.quantile(values, 0.50), 50)
+        self.assertEqual(metrics.quantile(values, 0.95), 95)
+        self.assertEqual(metrics.quantile(values, 0.99), 99)
+        self.assertEqual(metrics.quantile(values, 1.0), 100)
+
+    def test_snapshot_percentiles(self):
+        m = metrics.Metrics(enabled=True)
+        for latency in (0.01, 0.02, 0.03, 0.04):
+            m.record('GetDayPlay', latency, 200, 100)
+        snap = m.snapshot()['endpoints']['GetDayPlay']
+        self.assertEqual(snap['count'], 4)
+        self.assertEqual(snap['p50'], 0.02)
+        self.assertEqual(snap['p95'], 0.04)
+        self.assertEqual(snap['max'], 0.04)
+        self.assertEqual(snap['bytes'], 400)
+
+
+class PrometheusTest(unittest.TestCase):
+    def setUp(self):
+        self.m = metrics.Metrics(enabled=True)
+        self.m.record('GetDayPlay', 0.003, 200, 1000)
+        self.m.record('GetDayPlay', 0.2, 200, 1000, rotated=True)
+        self.m.record('GetDayPlay', 30.0, 500, 20)
+        self.m.record('SubmitOrder', 0.04, error=ConnectionError())
+        self.m.record_error('GetDayPlay', 'JSONDecodeError')
+        self.lines = self.m.to_prometheus().splitlines()
+
+    def value(self, series):
+        matches = [line.rsplit(' ', 1)[1] for line in self.lines if line.startswith(series + ' ')]
+        self.assertEqual(len(matches), 1, series)
+        return matches[0]
+
+    def test_histogram_is_cumulative(self):
+        p = 'yyticket_request_duration_seconds'
+        self.assertEqual(self.value(f'{p}_bucket{{endpoint="GetDayPlay",le="0.005"}}'), '1')
+        self.assertEqual(self.value(f'{p}_bucket{{endpoint="GetDayPlay",le="0.1"}}'), '1')
+        self.assertEqual(self.value(f'{p}_bucket{{endpoint="GetDayPlay",le="0.25"}}'), '2')
+        self.assertEqual(self.value(f'{p}_bucket{{endpoint="GetDayPlay",le="10.0"}}'), '2')
+        self.assertEqual(self.value(f'{p}_bucket{{endpoint="GetDayPlay",le="+Inf"}}'), '3')
+        self.assertEqual(self.value(f'{p}_count{{endpoint="GetDayPlay"}}'), '3')
+        self.assertEqual(self.value(f'{p}_sum{{endpoint="GetDayPlay"}}'), '30.203000')
+
+    def test_counters(self):
+        self.assertEqual(self.value('yyticket_response_bytes_total{endpoint="GetDayPlay"}'), '2020')
+        self.assertEqual(self.value('yyticket_responses_total{endpoint="GetDayPlay",code="200"}'), '2')
+        self.assertEqual(self.value('yyticket_responses_total{endpoint="GetDayPlay",code="500"}'), '1')
+        self.assertEqual(self.value('yyticket_request_errors_total{endpoint="GetDayPlay",error="JSONDecodeError"}'), '1')
+        self.assertEqual(self.value('yyticket_request_errors_total{endpoint="SubmitOrder",error="ConnectionError"}'), '1')
+        self.assertEqual(self.value('yyticket_cookie_rotations_total{endpoint="GetDayPlay"}'), '1')
+
+    def test_every_family_has_help_and_type(self):
+        families = {line.split()[2] for line in self.lines if line.startswith('# TYPE')}
+        helps = {line.split()[2] for line in self.lines if line.startswith('# HELP')}
+        self.assertEqual(families, helps)
+        for line in self.lines:
+            if not line.startswith('#'):
+                name = line.split('{', 1)[0]
+                self.assertTrue(any(name == f or name.startswith(f + '_') for f in families), line)
+
+
+class RecordRequestTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = metrics.get_metrics().enabled
+        self.addCleanup(metrics.set_enabled, self.saved)
+        self.addCleanup(metrics.reset)
+        metrics.reset()
+
+    def test_endpoint_from_url(self):
+        metrics.set_enabled(True)
+        metrics.record_request('http://h/cd/GetDayPlay?type=1', 0.0, 200, 10)
+        metrics.record_request('http://h/Content/images/a.png', 0.0, 200, 10)
+        metrics.record_request_error('http://h/cd/GetDayPlay', ValueError())
+        endpoints = metrics.snapshot()['endpoints']
+        self.assertEqual(sorted(endpoints), ['GetDayPlay', 'image'])
+        self.assertEqual(endpoints['GetDayPlay']['errors'], {'ValueError': 1})
+
+    def test_disabled_records_nothing(self):
+        metrics.set_enabled(False)
+        metrics.record_request('http://h/cd/GetDayPlay', 0.0, 200, 10)
+        metrics.record_request_error('http://h/cd/GetDayPlay', ValueError())
+        self.assertEqual(metrics.snapshot()['endpoints'], {})
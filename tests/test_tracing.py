@@ -0,0 +1,58 @@
+import json
+import threading
+import unittest
+
+import tracing
+
+
+class TracingTest(unittest.TestCase):
+    def setUp(self):
+        self.tracer = tracing.Tracer(enabled=True)
+
+    def phases(self):
+        return [(e["name"], e["ph"]) for e in self.tracer.events() if e["ph"] != 'M']
+
+    def test_disabled_records_nothing(self):
+        tracer = tracing.Tracer()
+        with tracer.span("x"):
+            pass
+        func = lambda: None
+        self.assertIs(tracer.wrap(func), func)
+        self.assertEqual([e for e in tracer.events() if e["ph"] != 'M'], [])
+
+    def test_unrun_wrap_leaves_no_orphan_begin(self):
+        with self.tracer.span("outer"):
+            self.tracer.wrap(lambda: None, name="never_run")
+        self.assertEqual(self.phases(), [("outer", 'X')])
+
+    def test_wrap_across_threads(self):
+        seen = []
+        with self.tracer.span("outer") as outer:
+            callback = self.tracer.wrap(lambda: seen.append(self.tracer.current()), name="handoff")
+        worker = threading.Thread(target=callback, name="worker")
+        worker.start()
+        worker.join()
+
+        self.assertIs(seen[0], outer)
+        events = [e for e in self.tracer.events() if e["name"] == "handoff"]
+        begin, end = sorted(events, key=lambda e: e["ph"])
+        self.assertEqual((begin["ph"], end["ph"]), ('b', 'e'))
+        self.assertEqual(begin["id"], end["id"])
+        self.assertLessEqual(begin["ts"], end["ts"])
+        self.assertEqual(begin["tid"], threading.get_ident())
+        self.assertEqual(end["tid"], worker.ident)
+        self.assertEqual(end["args"]["trace"], outer.trace_id)
+        names = {e["args"]["name"] for e in self.tracer.events() if e["ph"] == 'M'}
+        self.assertIn("worker", names)
+
+    def test_export_chrome(self):
+        span = self.tracer.begin("open_item")
+        with self.tracer.activate(span), self.tracer.span("child"):
+            pass
+        span.end()
+        path = "trace.json"  # 测试在临时目录中运行
+        count = self.tracer.export_chrome(path, trace_id=span.trace_id)
+        with open(path, encoding='utf-8') as f:
+            events = json.load(f)["traceEvents"]
+        self.assertEqual(len(events), count)
+        self.assertEqual(sorted(e["ph"] for e in events if e["ph"] != 'M'), ['X', 'b', 'e'])
@@ -0,0 +1,79 @@
+import datetime
+import unittest
+
+import executor
+import watcher
+from tests import support
+
+
+def venue(state="0"):
+    return [{"name": "1号场", "rtnlist": [{"TicketLevelName": "08:00", "TicketLevelNo": "L8",
+                                           "CDefault8": state, "CDefault7": "可预约"}]}]
+
+
+class WatcherPollTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.responses = []
+        self.events = []
+        self.w = watcher.AvailabilityWatcher(fetch=self.fetch, clock=lambda: self.now)
+        self.w.subscribe(lambda key, changes, data: self.events.append(changes))
+
+    def fetch(self, *key):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def due(self):
+        return sorted(due_at for due_at, _, key, target in self.w._due if self.w._targets.get(key) is target)
+
+    def test_seeded_watch_does_not_fetch_immediately(self):
+        key = self.w.watch('0004', 'A', '2026-01-01', release_at=0, data=venue())
+        self.assertEqual(self.due(), [self.now + watcher.MIN_INTERVAL])
+        self.assertEqual(self.w._next_due(), (None, watcher.MIN_INTERVAL))
+
+        self.responses.append((True, venue()))
+        self.assertEqual(self.w.poll(key), [])
+        self.responses.append((True, venue("1")))
+        changes = self.w.poll(key)
+        self.assertEqual([c['new'] for c in changes], [("1", "可预约")])
+        self.assertEqual(self.events, [changes])
+
+    def test_fetch_error_keeps_target_scheduled(self):
+        key = self.w.watch('0004', 'A', '2026-01-01', release_at=0)
+        self.w._next_due()
+        self.responses.append(RuntimeError("boom"))
+        with self.assertRaises(RuntimeError):
+            self.w.poll(key)
+        self.assertEqual(len(self.due()), 1)
+
+    def test_empty_data_is_not_a_change(self):
+        key = self.w.watch('0004', 'A', '2026-01-01', release_at=0, data=venue())
+        self.responses.append((True, []))
+        self.assertIsNone(self.w.poll(key))
+        self.assertEqual(self.events, [])
+        self.assertEqual(self.w._targets[key].data, venue())
+
+
+class ReleaseTargetTest(unittest.TestCase):
+    def setUp(self):
+        self.today = datetime.date.today()
+        self.clock = support.FakeClock(support.at(self.today, 7, 50))
+        self.w = watcher.AvailabilityWatcher(fetch=lambda *key: (True, venue()), clock=self.clock.now)
+
+    def test_watch_before_release_targets_today(self):
+        key = self.w.watch('0004', 'A', '2026-01-01')
+        target = self.w._targets[key]
+        self.assertEqual(target.release_at, support.at(self.today, 8))
+        self.assertGreater(self.w.next_interval(target, False), watcher.MIN_INTERVAL)
+
+        self.clock.sleep(9 * 60)  # 07:59，进入放号前的 NEAR_RELEASE 窗口
+        self.assertEqual(self.w.next_interval(target, False), watcher.MIN_INTERVAL)
+
+    def test_watch_after_release_targets_tomorrow(self):
+        self.clock.sleep(3600)
+        key = self.w.watch('0004', 'A', '2026-01-01')
+        self.assertEqual(self.w._targets[key].release_at,
+                         support.at(self.today + datetime.timedelta(days=1), 8))
+        self.assertEqual(executor.upcoming_release(support.at(self.today, 8)), support.at(self.today, 8))
@@ -0,0 +1,271 @@
+"""
+轻量跨线程追踪
+一次逻辑操作 (例如打开一个项目) 会经过工作线程、事件循环、Tk 的 after 队列，这里把它串成一条追踪:
+- span(name)       当前线程内的一段耗时 (with 语句)，自动挂在当前 span 之下
+- begin(name)      可在其他线程结束的长操作 (打开项目从点击到窗口画完)
+- wrap(func)       交给其他线程 / after(0, ...) 之前包一层: 记录在队列里等待的时间，
+                   并让 func 在原来的追踪上下文中运行
+当前 span 存在 contextvars 里，asyncio 任务自动继承；线程与 Tk 队列靠 wrap 传递。
+
+导出为 Chrome trace-event 格式 (JSON)，可以直接拖进 chrome://tracing 或 https://ui.perfetto.dev。
+默认关闭，关闭时 span / wrap 几乎没有开销。打开时必须给出导出文件: 入口 (main.py / headless) 的
+--trace 路径，或环境变量 YYTICKET_TRACE_FILE=路径，由 export_on_exit() 打开并在进程退出时写出；
+只调用 enable() 时需自行 export_chrome()。
+
+分类 (cat): op 整体操作、net 网络、parse 解析、queue 排队等待、ui 控件构建
+"""
+import atexit
+import collections
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+# --- 配置 ---
+TRACE_FILE = os.environ.get('YYTICKET_TRACE_FILE') or None
+MAX_EVENTS = 100_000     # 内存中最多保留的事件数，超出后丢弃最早的
+
+_current = contextvars.ContextVar('tracing_span', default=None)
+
+
+def _now_us():
+    return time.perf_counter_ns() / 1000
+
+
+def _in_event_loop():
+    """当前是否运行在 asyncio 事件循环里 (同一线程上的协程会交错，不能画成嵌套的区间)"""
+    asyncio = sys.modules.get('asyncio')  # 没用过 asyncio 的进程不必导入它
+    if asyncio is None:
+        return False
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class Span:
+    """
+    一段耗时；trace_id 相同的 span 属于同一次逻辑操作
+    跨线程结束或运行在事件循环里的 span 导出为 async 事件 (b/e)，其余导出为普通区间；
+    b 事件在结束时才与 e 一起写入，从未结束的 span (例如没有执行的回调) 不会留下孤立的 b
+    """
+
+    def __init__(self, tracer, name, cat, args, parent=None, detached=False):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.span_id = next(tracer._ids)
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.detached = detached or _in_event_loop()
+        self.start = _now_us()
+        self.thread = threading.current_thread()  # 开始所在的线程，b 事件记在这里
+        self._token = None
+        self._ended = False
+
+    def _event(self, ph, ts, thread=None, **extra):
+        thread = thread or threading.current_thread()
+        event = {"name": self.name, "cat": self.cat, "ph": ph, "ts": ts, "tid": thread.ident,
+                 "thread": thread.name}
+        if ph in ('b', 'e'):
+            event["id"] = hex(self.span_id)
+        event.update(extra)
+        return event
+
+    def end(self, **args):
+        """结束 span (可在任意线程调用，只生效一次)；args 追加到事件参数里"""
+        if self._ended:
+            return
+        self._ended = True
+        self.args.update(args)
+        self.args.update(trace=self.trace_id, span=self.span_id, parent=self.parent_id)
+        now = _now_us()
+        if self.detached:
+            self.tracer._emit(self._event('b', self.start, self.thread))
+            self.tracer._emit(self._event('e', now, args=self.args))
+        else:
+            self.tracer._emit(self._event('X', self.start, dur=now - self.start, args=self.args))
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.end(**({"error": exc_type.__name__} if exc_type else {}))
+        return False
+
+
+class _NoopSpan:
+    """追踪关闭时返回的占位对象"""
+    trace_id = span_id = None
+
+    def end(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Tracer:
+    def __init__(self, enabled=False, max_events=MAX_EVENTS):
+        self.enabled = enabled
+        self._events = collections.deque(maxlen=max_events)
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _emit(self, event):
+        thread_name = event.pop("thread")
+        with self._lock:
+            if event["tid"] not in self._threads:
+                self._threads[event["tid"]] = thread_name
+            self._events.append(event)
+
+    # --- 记录 ---
+    def span(self, name, cat='app', **args):
+        """with tracer.span("parse", cat="parse"): ...  当前线程内的一段耗时"""
+        if not self.enabled:
+            return _NOOP
+        return Span(self, name, cat, args, parent=_current.get())
+
+    def begin(self, name, cat='op', **args):
+        """开始一个可在其他线程结束的操作，返回的 span 需要调用 end()；用 with activate(span) 让子 span 挂在其下"""
+        if not self.enabled:
+            return _NOOP
+        return Span(self, name, cat, args, parent=_current.get(), detached=True)
+
+    def activate(self, span):
+        """把 span 设为当前 span (with 语句)，不改变它的起止时间"""
+        return _Activation(span)
+
+    def wrap(self, func, name='queue'):
+        """
+        包装交给其他线程或 Tk 队列的回调:
+        从包装到真正开始运行之间记为一个 queue span，func 在包装时的追踪上下文中运行；
+        回调没有执行时不产生任何事件
+        """
+        if not self.enabled:
+            return func
+        parent = _current.get()
+        wait = Span(self, name, 'queue', {}, parent=parent, detached=True)
+
+        def run(*args, **kwargs):
+            wait.end()
+            token = _current.set(parent)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current.reset(token)
+        return run
+
+    def current(self):
+        return _current.get()
+
+    # --- 导出 ---
+    def events(self, trace_id=None):
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        if trace_id is not None:
+            events = [e for e in events if e.get("args", {}).get("trace") == trace_id or e["ph"] == 'b']
+            ended = {e["id"] for e in events if e["ph"] == 'e'}
+            events = [e for e in events if e["ph"] != 'b' or e["id"] in ended]
+        pid = os.getpid()
+        out = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+               for tid, name in threads.items()]
+        for e in events:
+            out.append(dict(e, pid=pid))
+        return out
+
+    def export_chrome(self, path, trace_id=None):
+        """写出 Chrome trace-event JSON；返回写出的事件数"""
+        events = self.events(trace_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return len(events)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def export_on_exit(self, path):
+        """打开追踪，进程退出时导出到 path"""
+        self.enabled = True
+
+        def export():
+            print(f"追踪已导出: {path} ({self.export_chrome(path)} 个事件)")
+        atexit.register(export)
+
+
+class _Activation:
+    def __init__(self, span):
+        self.span = span
+        self._token = None
+
+    def __enter__(self):
+        if isinstance(self.span, Span):
+            self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._token is not None:
+            _current.reset(self._token)
+        return False
+
+
+# 进程内共享的默认实例
+_default_tracer = Tracer()
+
+
+def get_tracer():
+    return _default_tracer
+
+
+def enable(enabled=True):
+    _default_tracer.enabled = enabled
+
+
+def span(name, cat='app', **args):
+    return _default_tracer.span(name, cat, **args)
+
+
+def begin(name, cat='op', **args):
+    return _default_tracer.begin(name, cat, **args)
+
+
+def activate(span):
+    return _default_tracer.activate(span)
+
+
+def wrap(func, name='queue'):
+    return _default_tracer.wrap(func, name)
+
+
+def current():
+    return _default_tracer.current()
+
+
+def export_chrome(path, trace_id=None):
+    return _default_tracer.export_chrome(path, trace_id)
+
+
+def export_on_exit(path=None):
+    """打开追踪并在退出时导出；path 为空时用 YYTICKET_TRACE_FILE，两者都没有时什么也不做，返回实际使用的路径"""
+    path = path or TRACE_FILE
+    if path:
+        _default_tracer.export_on_exit(path)
+    return path
@@ -0,0 +1,145 @@
+"""
+get_venue_data 的 TTL 缓存
+- 按 (item_type, area, day) 缓存，容量有限，超出后按 LRU 淘汰
+- 今天/明天的数据变化快，使用更短的 TTL
+- 过期但仍在宽限期内的数据立即返回，同时后台刷新 (stale-while-revalidate)；
+  超过宽限期则同步重新请求
+"""
+import datetime
+import threading
+import time
+from collections import OrderedDict
+
+import api_handler
+
+# --- 配置 ---
+DEFAULT_TTL = 300     # 秒，后天及以后的数据
+NEAR_TTL = 30         # 秒，今天和明天的数据
+STALE_GRACE = 60      # 秒，过期后还允许先展示旧数据的时长
+MAX_ENTRIES = 256
+
+
+class VenueCache:
+    def __init__(self, fetch=None, ttl=DEFAULT_TTL, near_ttl=NEAR_TTL, stale_grace=STALE_GRACE,
+                 max_entries=MAX_ENTRIES, clock=time.monotonic):
+        self._fetch = fetch or api_handler.get_venue_data
+        self.ttl = ttl
+        self.near_ttl = near_ttl
+        self.stale_grace = stale_grace
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (data, stored_at)
+        self._refreshing = set()
+        self._counts = {"hits": 0, "stale_hits": 0, "misses": 0}
+
+    def ttl_for(self, day):
+        """今天和明天使用短 TTL"""
+        tomorrow = (datetime.date.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+        return self.near_ttl if day <= tomorrow else self.ttl
+
+    def put(self, item_type, area, day, data):
+        key = (item_type, area, day)
+        with self._lock:
+            self._entries[key] = (data, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def peek(self, item_type, area, day, on_refresh=None):
+        """
+        只查缓存，不阻塞: 新鲜数据直接返回；宽限期内的旧数据也返回并触发后台刷新；
+        没有可用数据返回 None
+        :param on_refresh: 后台刷新成功后回调 on_refresh(data) (在刷新线程中调用)
+        """
+        key = (item_type, area, day)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counts["misses"] += 1
+                return None
+            data, stored_at = entry
+            age = self._clock() - stored_at
+            ttl = self.ttl_for(day)
+            if age <= ttl:
+                self._entries.move_to_end(key)
+                self._counts["hits"] += 1
+                return data
+            if age > ttl + self.stale_grace:
+                del self._entries[key]
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["stale_hits"] += 1
+            start_refresh = key not in self._refreshing
+            if start_refresh:
+                self._refreshing.add(key)
+        if start_refresh:
+            threading.Thread(target=self._refresh, args=(key, on_refresh), daemon=True).start()
+        return data
+
+    def get(self, item_type, area, day, on_refresh=None):
+        """与 api_handler.get_venue_data 相同的返回值: (success, result)"""
+        data = self.peek(item_type, area, day, on_refresh)
+        if data is not None:
+            return True, data
+        success, result = self._fetch(item_type, area, day)
+        if success:
+            self.put(item_type, area, day, result)
+        return success, result
+
+    def _refresh(self, key, on_refresh):
+        try:
+            success, result = self._fetch(*key)
+            if success:
+                self.put(*key, result)
+                if on_refresh:
+                    on_refresh(result)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, item_type=None, area=None, day=None):
+        """按条件失效 (参数为 None 表示不限)，返回删除的条目数"""
+        with self._lock:
+            keys = [k for k in self._entries
+                    if (item_type is None or k[0] == item_type)
+                    and (area is None or k[1] == area)
+                    and (day is None or k[2] == day)]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            counts["size"] = len(self._entries)
+        total = counts["hits"] + counts["stale_hits"] + counts["misses"]
+        counts["hit_ratio"] = (counts["hits"] + counts["stale_hits"]) / total if total else 0.0
+        counts["miss_ratio"] = counts["misses"] / total if total else 0.0
+        return counts
+
+
+# 进程内共享的默认缓存
+_cache = VenueCache()
+
+
+def get_venue_data(item_type, evaluate_name, day, on_refresh=None):
+    """带缓存的 api_handler.get_venue_data"""
+    return _cache.get(item_type, evaluate_name, day, on_refresh)
+
+
+def peek(item_type, evaluate_name, day, on_refresh=None):
+    return _cache.peek(item_type, evaluate_name, day, on_refresh)
+
+
+def put(item_type, evaluate_name, day, data):
+    _cache.put(item_type, evaluate_name, day, data)
+
+
+def invalidate(item_type=None, evaluate_name=None, day=None):
+    return _cache.invalidate(item_type, evaluate_name, day)
+
+
+def stats():
+    return _cache.stats()
@@ -0,0 +1,243 @@
+"""
+场地网格 (单个 Canvas 绘制)
+原来每个格子是一个 tk.Button，20+ 场地 × 15 个时段就是几百个控件，开窗和提交后重绘都会明显卡顿。
+这里把格子画成 Canvas 上的矩形和文字:
+1. 点击按坐标换算出 (行, 列)，不给每个格子绑定回调
+2. 只绘制当前可见区域内的格子，滚动时补画新露出的、删除移出视口的
+3. 格子状态的判断是纯函数 cell_status，不依赖 Tk，可以单独测试/压测
+4. 数据刷新时 update_cells 只改动状态有变化的格子；场地列表或时间轴变了才整表重建，
+   重建时保留滚动位置
+"""
+import tkinter as tk
+
+# --- 配置 ---
+CELL_W = 92         # 格子宽度 (像素)
+CELL_H = 56         # 格子高度
+HEADER_H = 44       # 顶部场地名一行的高度
+TIME_W = 72         # 左侧时间一列的宽度
+GAP = 1             # 格子之间的间隙
+OVERSCAN = 1        # 视口外额外多画几行/列，滚动时不露白
+
+HEADER_BG = "#ddd"
+GRID_BG = "#e0e0e0"
+
+# 状态 -> (背景色, 文字颜色, 是否可点击)，颜色与原来按钮版本一致
+STATUS_AVAILABLE = 'available'      # 可预约
+STATUS_SELECTED = 'selected'        # 本次选中
+STATUS_SCHEDULED = 'scheduled'      # 已设自动抢
+STATUS_UNAVAILABLE = 'unavailable'  # 不可预约
+STATUS_BOOKED = 'booked'            # 已占用
+STATUS_LOCKED = 'locked'            # 锁场
+STATUS_EMPTY = 'empty'              # 该时段无数据
+
+STYLES = {
+    STATUS_AVAILABLE: ("#ffffff", "#000", True),
+    STATUS_SELECTED: ("#90EE90", "#000", True),
+    STATUS_SCHEDULED: ("#FFA500", "#333", False),
+    STATUS_UNAVAILABLE: ("#D3D3D3", "#888", False),
+    STATUS_BOOKED: ("#87CEFA", "#888", False),
+    STATUS_LOCKED: ("#D3D3D3", "#888", False),
+    STATUS_EMPTY: ("#D3D3D3", "#888", False),
+}
+
+
+def cell_status(cell_data, is_scheduled):
+    """
+    单个格子的状态与显示文字 (与原 _draw_grid 的判断顺序一致)
+    :param cell_data: GetDayPlay rtnlist 中的一项，该时段无数据时为 None
+    :param is_scheduled: 该 (场地, 时间) 是否已设自动抢
+    :return: (status, text)
+    """
+    if not cell_data:
+        return STATUS_EMPTY, ""
+    if is_scheduled:
+        return STATUS_SCHEDULED, "已设自动"
+    if cell_data.get('CDefault7') == "不可预约":
+        return STATUS_UNAVAILABLE, "不可预约"
+    if str(cell_data.get('CDefault8')) == "1":
+        return STATUS_BOOKED, "已占用"
+    if cell_data.get('Description') == "锁场":
+        return STATUS_LOCKED, "锁场"
+    return STATUS_AVAILABLE, f"￥{cell_data['MemberPrice']}"
+
+
+def build_cells(venue_data, times, scheduled):
+    """
+    计算整张网格: 返回 {(行, 列): (status, text, cell_data)}
+    :param scheduled: 已设自动抢的 {(场地, 时间)}
+    """
+    cells = {}
+    for col, venue_obj in enumerate(venue_data):
+        time_map = {item['TicketLevelName']: item for item in venue_obj['rtnlist']}
+        name = venue_obj['name']
+        for row, time_slot in enumerate(times):
+            cell_data = time_map.get(time_slot)
+            status, text = cell_status(cell_data, (name, time_slot) in scheduled)
+            cells[(row, col)] = (status, text, cell_data)
+    return cells
+
+
+class VenueGrid(tk.Frame):
+    """
+    Canvas 版场地网格
+    on_click(row, col) 只在可点击的格子上触发
+    """
+
+    def __init__(self, parent, on_click=None):
+        super().__init__(parent)
+        self.on_click = on_click
+        self.venues = []
+        self.times = []
+        self.cells = {}
+        self._drawn = {}     # (行, 列) -> (矩形 id, 文字 id)；表头用 ('v', 列) / ('t', 行)
+        self._visible = None
+
+        v_scroll = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        h_scroll = tk.Scrollbar(self, orient="horizontal", command=self.xview)
+        self.canvas = tk.Canvas(self, bg=GRID_BG, highlightthickness=0,
+                                yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
+        v_scroll.pack(side="right", fill="y")
+        h_scroll.pack(side="bottom", fill="x")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda e: self._render_viewport())
+        self.canvas.bind("<Button-1>", self._on_canvas_click)
+
+    # --- 数据 ---
+    def update_cells(self, venues, times, cells):
+        """
+        用新数据刷新网格，返回实际改动的格子数
+        场地列表与时间轴不变时只改状态或文字有变化的格子，否则整表重建
+        """
+        if list(venues) != self.venues or list(times) != self.times:
+            self.set_grid(venues, times, cells)
+            return len(cells)
+        touched = 0
+        for key, new in cells.items():
+            old = self.cells.get(key)
+            if old is not None and old[:2] == new[:2]:
+                self.cells[key] = new  # 状态没变，票号等数据仍以新的为准
+                continue
+            self.cells[key] = new
+            self._restyle(key)
+            touched += 1
+        return touched
+
+    def set_grid(self, venues, times, cells):
+        """整表替换 (场地列表或时间轴变化时)，保留滚动位置"""
+        x_frac = self.canvas.xview()[0]
+        y_frac = self.canvas.yview()[0]
+        self.canvas.delete("all")
+        self._drawn = {}
+        self._visible = None
+        self.venues = list(venues)
+        self.times = list(times)
+        self.cells = dict(cells)
+        width = TIME_W + len(self.venues) * CELL_W
+        height = HEADER_H + len(self.times) * CELL_H
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+        self.canvas.xview_moveto(x_frac)
+        self.canvas.yview_moveto(y_frac)
+        self._render_viewport()
+
+    def set_cell(self, row, col, status, text=None):
+        """更新单个格子的状态；已画出的格子直接改颜色/文字"""
+        old = self.cells.get((row, col))
+        if text is None:
+            text = old[1] if old else ""
+        self.cells[(row, col)] = (status, text, old[2] if old else None)
+        self._restyle((row, col))
+
+    def _restyle(self, key):
+        items = self._drawn.get(key)
+        if items is not None:
+            status, text, _ = self.cells[key]
+            bg, fg, _ = STYLES[status]
+            self.canvas.itemconfigure(items[0], fill=bg)
+            self.canvas.itemconfigure(items[1], text=text, fill=fg)
+
+    # --- 滚动 ---
+    def xview(self, *args):
+        self.canvas.xview(*args)
+        self._render_viewport()
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self._render_viewport()
+
+    def yview_scroll(self, number, what):
+        self.canvas.yview_scroll(number, what)
+        self._render_viewport()
+
+    # --- 绘制 ---
+    def _visible_range(self):
+        x0 = self.canvas.canvasx(0)
+        y0 = self.canvas.canvasy(0)
+        x1 = x0 + max(self.canvas.winfo_width(), 1)
+        y1 = y0 + max(self.canvas.winfo_height(), 1)
+        col0 = max(0, int((x0 - TIME_W) // CELL_W) - OVERSCAN)
+        col1 = min(len(self.venues), int((x1 - TIME_W) // CELL_W) + 1 + OVERSCAN)
+        row0 = max(0, int((y0 - HEADER_H) // CELL_H) - OVERSCAN)
+        row1 = min(len(self.times), int((y1 - HEADER_H) // CELL_H) + 1 + OVERSCAN)
+        return row0, row1, col0, col1
+
+    def _render_viewport(self):
+        """补画视口内尚未绘制的格子，删除已移出视口的"""
+        visible = self._visible_range()
+        if visible == self._visible:
+            return
+        self._visible = visible
+        row0, row1, col0, col1 = visible
+
+        wanted = {(r, c) for r in range(row0, row1) for c in range(col0, col1)}
+        wanted.update(('v', c) for c in range(col0, col1))
+        wanted.update(('t', r) for r in range(row0, row1))
+        for key in list(self._drawn):
+            if key not in wanted:
+                rect, label = self._drawn.pop(key)
+                self.canvas.delete(rect, label)
+        for key in wanted:
+            if key not in self._drawn:
+                self._drawn[key] = self._draw_item(key)
+        # 表头画在格子之上
+        self.canvas.tag_raise("header")
+
+    def _draw_item(self, key):
+        a, b = key
+        if a == 'v':
+            x = TIME_W + b * CELL_W
+            return self._draw_box(x, 0, CELL_W, HEADER_H, HEADER_BG, "#000", self.venues[b],
+                                  font=("Arial", 9), tags="header", width=CELL_W - 4)
+        if a == 't':
+            y = HEADER_H + b * CELL_H
+            return self._draw_box(0, y, TIME_W, CELL_H, HEADER_BG, "#000", self.times[b],
+                                  font=("Arial", 10), tags="header")
+        status, text, _ = self.cells.get(key, (STATUS_EMPTY, "", None))
+        bg, fg, _ = STYLES[status]
+        return self._draw_box(TIME_W + b * CELL_W, HEADER_H + a * CELL_H, CELL_W, CELL_H, bg, fg, text)
+
+    def _draw_box(self, x, y, w, h, bg, fg, text, font=None, tags=(), width=0):
+        rect = self.canvas.create_rectangle(x + GAP, y + GAP, x + w - GAP, y + h - GAP,
+                                            fill=bg, outline="#bbb", tags=tags)
+        label = self.canvas.create_text(x + w / 2, y + h / 2, text=text, fill=fg, font=font,
+                                        width=width, tags=tags)
+        return rect, label
+
+    # --- 交互 ---
+    def hit_test(self, x, y):
+        """画布坐标 -> (行, 列)，落在表头或网格外返回 None"""
+        if x < TIME_W or y < HEADER_H:
+            return None
+        col = int((x - TIME_W) // CELL_W)
+        row = int((y - HEADER_H) // CELL_H)
+        if 0 <= row < len(self.times) and 0 <= col < len(self.venues):
+            return row, col
+        return None
+
+    def _on_canvas_click(self, event):
+        hit = self.hit_test(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        if hit is None or self.on_click is None:
+            return
+        status = self.cells.get(hit, (STATUS_EMPTY,))[0]
+        if STYLES[status][2]:
+            self.on_click(*hit)
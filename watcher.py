@@ -0,0 +1,259 @@
+"""
+场地余量监视
+后台轮询选定的 (item_type, 区域, 日期) 的 get_venue_data，只把状态有变化的格子作为事件推给订阅者
+(打开的场地窗口、执行器):
+- 自适应间隔: 没有变化时逐步放慢到 MAX_INTERVAL；有变化或临近放号时刻时回到 MIN_INTERVAL
+- 变化检测: 按 (场地, TicketLevelNo) 比较 CDefault8 (是否已订) 与 CDefault7 (是否可预约)
+- 全局请求预算: 所有目标共用一个令牌桶，无论监视多少目标都不会超过 REQUEST_BUDGET 次/分钟
+- 只看接口的真实数据: 接口没有返回数据时不生成模拟数据，也不推送变化
+"""
+import functools
+import heapq
+import itertools
+import threading
+import time
+
+import api_handler
+import executor
+import venue_cache
+
+# --- 配置 ---
+MIN_INTERVAL = 3         # 秒，有变化或临近放号时的轮询间隔
+MAX_INTERVAL = 60        # 秒，长时间无变化时的最大间隔
+BACKOFF = 1.5            # 每次无变化，间隔乘以该系数
+NEAR_RELEASE = 120       # 秒，距放号时刻这么近时按最小间隔轮询
+REQUEST_BUDGET = 20      # 全局每分钟最多请求数
+BUDGET_WINDOW = 60       # 秒
+
+
+def cell_state(item):
+    return str(item.get('CDefault8')), item.get('CDefault7')
+
+
+def diff_venue_data(old, new):
+    """
+    比较两次 GetDayPlay 数据，返回有变化的格子:
+    [{"venue_name", "time", "TicketLevelNo", "old": (CDefault8, CDefault7) 或 None, "new": ..., "cell"}, ...]
+    """
+    before = {}
+    for venue in old or ():
+        for item in venue['rtnlist']:
+            before[(venue['name'], item['TicketLevelNo'])] = cell_state(item)
+    changes = []
+    for venue in new or ():
+        for item in venue['rtnlist']:
+            key = (venue['name'], item['TicketLevelNo'])
+            state = cell_state(item)
+            prev = before.pop(key, None)
+            if prev != state:
+                changes.append({"venue_name": venue['name'], "time": item['TicketLevelName'],
+                                "TicketLevelNo": item['TicketLevelNo'], "old": prev, "new": state, "cell": item})
+    for (venue_name, level_no), prev in before.items():
+        changes.append({"venue_name": venue_name, "time": None, "TicketLevelNo": level_no,
+                        "old": prev, "new": None, "cell": None})
+    return changes
+
+
+class TokenBucket:
+    """令牌桶: 每 window 秒补满 capacity 个令牌，acquire 在没有令牌时阻塞"""
+
+    def __init__(self, capacity=REQUEST_BUDGET, window=BUDGET_WINDOW, clock=time.monotonic, sleep=time.sleep):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self._tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, stop_event=None):
+        """等到有令牌为止；stop_event 被置位时放弃并返回 False"""
+        while not self.try_acquire():
+            wait = 1 / self.rate
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                self._sleep(wait)
+        return True
+
+
+class _Target:
+    def __init__(self, key, release_at):
+        self.key = key
+        self.release_at = release_at
+        self.interval = MIN_INTERVAL
+        self.data = None
+        self.refs = 1
+
+
+class AvailabilityWatcher:
+    """
+    watch(item_type, area, date) 登记目标 (同一目标引用计数)，subscribe(callback) 订阅变化:
+    callback(key, changes, data)，在监视线程中调用；key 为 (item_type, area, date)
+    """
+
+    def __init__(self, fetch=None, budget=None, clock=time.time):
+        self._fetch = fetch or functools.partial(api_handler.get_venue_data, mock_empty=False)
+        self.budget = budget or TokenBucket()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._targets = {}
+        self._due = []        # 堆: (下次轮询时刻, 序号, key, target)
+        self._seq = itertools.count()
+        self._subscribers = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- 目标与订阅 ---
+    def watch(self, item_type, area, date, release_at=None, data=None):
+        """
+        登记监视目标，返回 key
+        :param release_at: 该目标关心的放号时刻，默认取最近一次 (今天 08:00 还没到就是今天)
+        :param data: 调用方手上已有的该目标数据 (例如窗口刚显示的)，作为比较基准，首次轮询推迟 MIN_INTERVAL 秒
+        """
+        key = (item_type, area, date)
+        if release_at is None:
+            release_at = executor.upcoming_release(self._clock())
+        with self._lock:
+            target = self._targets.get(key)
+            if target is not None:
+                target.refs += 1
+                if target.data is None and data:
+                    target.data = data
+                return key
+            target = self._targets[key] = _Target(key, release_at)
+            if data:
+                target.data = data
+                self._schedule(target, self._clock() + MIN_INTERVAL)
+            else:
+                self._schedule(target, self._clock())
+        self._wake.set()
+        return key
+
+    def unwatch(self, key):
+        with self._lock:
+            target = self._targets.get(key)
+            if target is None:
+                return
+            target.refs -= 1
+            if target.refs <= 0:
+                del self._targets[key]  # 堆里残留的条目在出堆时跳过
+
+    def _schedule(self, target, due_at):
+        heapq.heappush(self._due, (due_at, next(self._seq), target.key, target))
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    # --- 轮询 ---
+    def next_interval(self, target, changed):
+        """有变化或临近放号回到最小间隔，否则逐步放慢"""
+        if changed or abs(target.release_at - self._clock()) <= NEAR_RELEASE:
+            return MIN_INTERVAL
+        return min(MAX_INTERVAL, target.interval * BACKOFF)
+
+    def poll(self, key):
+        """轮询一个目标并通知变化，返回变化的格子列表 (请求失败或没有数据时返回 None)"""
+        with self._lock:
+            target = self._targets.get(key)
+        if target is None:
+            return None
+        changes = None
+        try:
+            success, data = self._fetch(*key)
+            if not success:
+                print(f"[监视] {key} 请求失败: {data}")
+            elif data:
+                venue_cache.put(*key, data)
+                changes = diff_venue_data(target.data, data) if target.data is not None else []
+                target.data = data
+        finally:
+            # 无论请求或比较是否出错都要重新排期，否则该目标从此不再被监视
+            with self._lock:
+                target.interval = self.next_interval(target, bool(changes))
+                if self._targets.get(key) is target:
+                    self._schedule(target, self._clock() + target.interval)
+                subscribers = list(self._subscribers)
+        if changes:
+            for callback in subscribers:
+                try:
+                    callback(key, changes, data)
+                except Exception as e:
+                    print(f"[监视] 通知订阅者失败: {e}")
+        return changes
+
+    def _next_due(self):
+        """取出下一个到期的目标，返回 (key, 需等待的秒数)；没有目标返回 (None, None)"""
+        with self._lock:
+            while self._due:
+                due_at, _, key, target = self._due[0]
+                if self._targets.get(key) is not target:
+                    heapq.heappop(self._due)
+                    continue
+                wait = due_at - self._clock()
+                if wait <= 0:
+                    heapq.heappop(self._due)
+                    return key, 0
+                return None, wait
+            return None, None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            key, wait = self._next_due()
+            if key is None:
+                self._wake.wait(wait)
+                continue
+            if not self.budget.acquire(self._stop):
+                break
+            try:
+                self.poll(key)
+            except Exception as e:
+                print(f"[监视] {key} 轮询异常: {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread = None
+
+
+_default_watcher = None
+_default_lock = threading.Lock()
+
+
+def get_watcher():
+    """进程内共享的监视器 (首次调用时创建并启动)"""
+    global _default_watcher
+    with _default_lock:
+        if _default_watcher is None:
+            _default_watcher = AvailabilityWatcher()
+            _default_watcher.start()
+        return _default_watcher